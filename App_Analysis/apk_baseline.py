@@ -37,6 +37,14 @@ class APKPermissionBaselineAnalyzer:
             self.permission_frequency.update(perms)
             self.apk_details[entry.name] = {"permissions": perms}
 
+    # ------------------------------------------------------------------
+    def load_permission_map(self, permissions: Dict[str, List[str]]) -> None:
+        """Add apps whose permissions were collected elsewhere, e.g. on a device."""
+        for name, perms in sorted(permissions.items()):
+            perms = list(perms)
+            self.permission_frequency.update(perms)
+            self.apk_details[name] = {"permissions": perms}
+
     # ------------------------------------------------------------------
     def compute_statistics(self) -> None:
         """Calculate averages, rare permissions and excessive apps."""
@@ -0,0 +1,139 @@
+"""Persistent cache of APK digests keyed by file identity.
+
+A cached digest is reused only while the file's ``(st_dev, st_ino,
+st_size, st_mtime_ns)`` tuple is unchanged, so rescanning an archive of
+unchanged APKs costs one ``stat`` per file instead of a full read.
+
+The store is a SQLite database in WAL mode. Each thread gets its own
+connection and writers wait on a busy timeout, which keeps the cache
+safe when several hashing threads or Stonehaven processes share it.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from typing import Optional, Tuple
+
+from Utils.logging_utils import log_manager
+
+CACHE_PATH = os.path.join("Output", "Cache", "apk_hash_cache.sqlite3")
+
+# Lookup modes understood by ``apk_hashing``:
+#   cache  - return the cached digest when the stat key matches
+#   verify - always rehash, warn when a matching entry disagrees
+#   force  - always rehash and overwrite the entry
+MODE_CACHE = "cache"
+MODE_VERIFY = "verify"
+MODE_FORCE = "force"
+CACHE_MODES = (MODE_CACHE, MODE_VERIFY, MODE_FORCE)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS apk_hashes (
+    st_dev     INTEGER NOT NULL,
+    st_ino     INTEGER NOT NULL,
+    algorithm  TEXT    NOT NULL,
+    size       INTEGER NOT NULL,
+    mtime_ns   INTEGER NOT NULL,
+    digest     TEXT    NOT NULL,
+    path       TEXT,
+    PRIMARY KEY (st_dev, st_ino, algorithm)
+)
+"""
+
+
+def stat_key(path: str) -> Optional[Tuple[int, int, int, int]]:
+    """Return the ``(device, inode, size, mtime_ns)`` identity of ``path``."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns
+
+
+class APKHashCache:
+    """SQLite-backed digest cache shared across threads and processes."""
+
+    def __init__(self, db_path: str = CACHE_PATH, timeout: float = 30.0):
+        self.db_path = db_path
+        self.timeout = timeout
+        self._local = threading.local()
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connect()
+
+    # ------------------------------------------------------------------
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=self.timeout)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(_SCHEMA)
+            conn.commit()
+            self._local.conn = conn
+        return conn
+
+    # ------------------------------------------------------------------
+    def get(
+        self, key: Tuple[int, int, int, int], algorithm: str = "sha256"
+    ) -> Optional[str]:
+        """Return the cached digest for ``key`` or ``None`` on a miss."""
+        dev, ino, size, mtime_ns = key
+        try:
+            row = self._connect().execute(
+                "SELECT size, mtime_ns, digest FROM apk_hashes "
+                "WHERE st_dev = ? AND st_ino = ? AND algorithm = ?",
+                (dev, ino, algorithm),
+            ).fetchone()
+        except sqlite3.Error as e:
+            log_manager.log_warning(f"Hash cache lookup failed: {e}")
+            return None
+        if row and row[0] == size and row[1] == mtime_ns:
+            return row[2]
+        return None
+
+    # ------------------------------------------------------------------
+    def put(
+        self,
+        key: Tuple[int, int, int, int],
+        digest: str,
+        path: str = "",
+        algorithm: str = "sha256",
+    ) -> None:
+        """Store ``digest`` for ``key``, replacing any stale entry."""
+        dev, ino, size, mtime_ns = key
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO apk_hashes "
+                    "(st_dev, st_ino, algorithm, size, mtime_ns, digest, path) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (dev, ino, algorithm, size, mtime_ns, digest, path),
+                )
+        except sqlite3.Error as e:
+            log_manager.log_warning(f"Hash cache write failed for {path}: {e}")
+
+    # ------------------------------------------------------------------
+    def lookup(self, path: str, algorithm: str = "sha256") -> Optional[str]:
+        """Return the cached digest for ``path`` if the file is unchanged."""
+        key = stat_key(path)
+        return self.get(key, algorithm) if key else None
+
+    # ------------------------------------------------------------------
+    def clear(self) -> None:
+        """Remove every cached entry."""
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM apk_hashes")
+
+    # ------------------------------------------------------------------
+    def close(self) -> None:
+        """Close the connection owned by the calling thread."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
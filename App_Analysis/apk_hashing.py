@@ -3,58 +3,512 @@
 These helpers are primarily used to detect whether an APK file has
 changed between versions. Calculating and comparing SHA-256 digests is
 often easier than parsing version metadata from the manifest.
+
+Large collections of APKs are hashed concurrently with a thread pool.
+``hashlib`` releases the GIL while digesting large buffers, so several
+files can be hashed in parallel without spawning processes. Passing an
+``APKHashCache`` skips the read entirely for files whose stat identity
+has not changed.
+
+For intake records, ``hash_apk_record`` computes several whole-file
+digests in a single read pass and hashes selected ZIP entries (DEX
+files, the manifest and signing certificates) straight from the archive
+without extracting them to disk.
+
+``find_duplicate_apks`` narrows candidates by file size and a hash of
+each file's head and tail before paying for a full-file digest.
+
+Supplying a ``KnownBadIndex`` to the bulk and record APIs attaches a
+known-bad verdict to every SHA-256 they produce.
 """
 
 from __future__ import annotations
 
+import fnmatch
 import hashlib
+import json
 import os
-from typing import Dict
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from Utils.logging_utils import log_manager
 
+from . import apk_hash_cache
+from .apk_hash_cache import APKHashCache, MODE_CACHE, MODE_FORCE, MODE_VERIFY
+from .known_bad_index import KnownBadIndex
+
+# Read buffer used when streaming files into the hash. Larger buffers cut
+# the number of read syscalls and let hashlib drop the GIL for longer.
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+# Upper bound on worker threads used by the bulk hashing API.
+MAX_HASH_WORKERS = 16
+
+# Whole-file digests used for VirusTotal-style lookups.
+DEFAULT_DIGESTS = ("md5", "sha1", "sha256")
+
+# Bytes sampled from the start and end of a file by the duplicate prefilter.
+PARTIAL_HASH_SIZE = 16 * 1024
+
+DUPLICATE_REPORT_PATH = os.path.join("Output", "Json", "apk_duplicates.json")
+
+# ZIP entries hashed individually by ``hash_apk_record``.
+ENTRY_PATTERNS = (
+    "classes*.dex",
+    "AndroidManifest.xml",
+    "META-INF/*.RSA",
+    "META-INF/*.DSA",
+    "META-INF/*.EC",
+)
+
 
-def _hash_file(path: str) -> str:
+def _hash_file(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> str:
     """Return the SHA-256 hash for a single file."""
     if not os.path.isfile(path):
         log_manager.log_warning(f"File not found: {path}")
         return ""
 
-    sha256 = hashlib.sha256()
     try:
         with open(path, "rb") as f:
-            for chunk in iter(lambda: f.read(8192), b""):
-                sha256.update(chunk)
-        return sha256.hexdigest()
+            if chunk_size == DEFAULT_CHUNK_SIZE and hasattr(hashlib, "file_digest"):
+                # Python 3.11+: zero-copy loop implemented in C
+                return hashlib.file_digest(f, "sha256").hexdigest()
+
+            sha256 = hashlib.sha256()
+            buffer = bytearray(chunk_size)
+            view = memoryview(buffer)
+            while True:
+                size = f.readinto(buffer)
+                if not size:
+                    break
+                sha256.update(view[:size])
+            return sha256.hexdigest()
     except Exception as e:
         log_manager.log_exception(f"Failed to hash {path}: {e}")
         return ""
 
 
+def _multi_hash_file(
+    path: str,
+    algorithms: Iterable[str] = DEFAULT_DIGESTS,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Dict[str, str]:
+    """Return ``{algorithm: hexdigest}`` for ``path`` using one read pass."""
+    hashers = {name: hashlib.new(name) for name in algorithms}
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(path, "rb") as f:
+        while True:
+            size = f.readinto(buffer)
+            if not size:
+                break
+            chunk = view[:size]
+            for hasher in hashers.values():
+                hasher.update(chunk)
+    return {name: h.hexdigest() for name, h in hashers.items()}
+
+
+def _hash_zip_entries(
+    path: str,
+    patterns: Iterable[str] = ENTRY_PATTERNS,
+    algorithm: str = "sha256",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Dict[str, Dict[str, Any]]:
+    """Hash the uncompressed contents of matching entries in an APK.
+
+    Entries are located through the ZIP central directory and streamed
+    from the archive, so nothing is written to disk.
+    """
+    pattern_list = list(patterns)
+    entries: Dict[str, Dict[str, Any]] = {}
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            if not any(fnmatch.fnmatchcase(info.filename, p) for p in pattern_list):
+                continue
+            hasher = hashlib.new(algorithm)
+            with archive.open(info) as member:
+                for chunk in iter(lambda: member.read(chunk_size), b""):
+                    hasher.update(chunk)
+            entries[info.filename] = {
+                algorithm: hasher.hexdigest(),
+                "size": info.file_size,
+                "compressed_size": info.compress_size,
+                "crc32": f"{info.CRC:08x}",
+            }
+    return entries
+
+
+def _partial_hash(path: str, size: int, sample: int = PARTIAL_HASH_SIZE) -> str:
+    """Hash the first and last ``sample`` bytes of a file of ``size`` bytes."""
+    hasher = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            hasher.update(f.read(sample))
+            if size > sample:
+                f.seek(max(sample, size - sample))
+                hasher.update(f.read(sample))
+    except OSError as e:
+        log_manager.log_warning(f"Failed to sample {path}: {e}")
+        return ""
+    return hasher.hexdigest()
+
+
+def _hash_cached(
+    path: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    cache: Optional[APKHashCache] = None,
+    mode: str = MODE_CACHE,
+) -> Tuple[str, bool]:
+    """Return ``(digest, was_read)`` for ``path``, consulting ``cache``."""
+    if cache is None:
+        return _hash_file(path, chunk_size), True
+    if mode not in apk_hash_cache.CACHE_MODES:
+        raise ValueError(f"Unknown cache mode: {mode}")
+
+    key = apk_hash_cache.stat_key(path)
+    if key is None:
+        return _hash_file(path, chunk_size), True
+
+    cached = cache.get(key) if mode != MODE_FORCE else None
+    if cached and mode == MODE_CACHE:
+        return cached, False
+
+    digest = _hash_file(path, chunk_size)
+    if not digest:
+        return digest, True
+    if mode == MODE_VERIFY and cached and cached != digest:
+        log_manager.log_warning(
+            f"Cached hash mismatch for unchanged file {path}: "
+            f"{cached} != {digest}"
+        )
+    # Only record the digest if the file was not modified while hashing
+    if apk_hash_cache.stat_key(path) == key:
+        cache.put(key, digest, path)
+    return digest, True
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _default_workers(count: int) -> int:
+    return max(1, min(count, os.cpu_count() or 1, MAX_HASH_WORKERS))
+
+
+def _iter_apk_paths(directory: str) -> List[str]:
+    paths: List[str] = []
+    for root_dir, _dirs, files in os.walk(directory):
+        for name in files:
+            if name.lower().endswith(".apk"):
+                paths.append(os.path.join(root_dir, name))
+    return paths
+
+
 @log_manager.log_call("info")
-def calculate_apk_hash(path: str) -> str:
-    """Compute the SHA-256 hash of an APK file."""
-    return _hash_file(path)
+def calculate_apk_hash(
+    path: str,
+    cache: Optional[APKHashCache] = None,
+    mode: str = MODE_CACHE,
+) -> str:
+    """Compute the SHA-256 hash of an APK file.
+
+    When ``cache`` is given the digest is served from it for unchanged
+    files. ``mode`` selects ``"cache"``, ``"verify"`` or ``"force"``.
+    """
+    return _hash_cached(path, DEFAULT_CHUNK_SIZE, cache, mode)[0]
 
 
 @log_manager.log_call("info")
-def apk_changed(path: str, known_hash: str) -> bool:
+def apk_changed(
+    path: str,
+    known_hash: str,
+    cache: Optional[APKHashCache] = None,
+    mode: str = MODE_CACHE,
+) -> bool:
     """Return ``True`` if the APK hash differs from ``known_hash``."""
-    current = calculate_apk_hash(path)
+    current = calculate_apk_hash(path, cache, mode)
     return current != known_hash
 
 
 @log_manager.log_call("info")
-def hash_apk_directory(directory: str) -> Dict[str, str]:
+def bulk_hash_apks(
+    paths: Iterable[str],
+    max_workers: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    cache: Optional[APKHashCache] = None,
+    cache_mode: str = MODE_CACHE,
+    known_bad: Optional[KnownBadIndex] = None,
+) -> Dict[str, Any]:
+    """Hash many APK files concurrently.
+
+    Args:
+        paths: APK file paths to hash.
+        max_workers: Thread pool size. Defaults to the CPU count, capped
+            at ``MAX_HASH_WORKERS``.
+        chunk_size: Read buffer size in bytes.
+        cache: Optional persistent digest cache.
+        cache_mode: ``"cache"``, ``"verify"`` or ``"force"``.
+        known_bad: Optional index used to flag known-malicious digests.
+
+    Returns:
+        dict: ``hashes`` maps each path to its digest in input order;
+        ``total_bytes`` (bytes actually read), ``cache_hits``, ``elapsed``
+        and ``mb_per_sec`` describe the run. With ``known_bad`` set,
+        ``known_bad`` maps each path to its verdict.
+    """
+    path_list = list(paths)
+    workers = max_workers or _default_workers(len(path_list))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(
+            pool.map(
+                lambda p: _hash_cached(p, chunk_size, cache, cache_mode),
+                path_list,
+            )
+        )
+    elapsed = time.perf_counter() - start
+
+    total_bytes = sum(
+        _file_size(p) for p, (d, was_read) in zip(path_list, results)
+        if d and was_read
+    )
+    cache_hits = sum(1 for _d, was_read in results if not was_read)
+    mb_per_sec = (total_bytes / (1024 * 1024)) / elapsed if elapsed > 0 else 0.0
+    log_manager.log_info(
+        f"Hashed {len(path_list)} file(s), {total_bytes} bytes in {elapsed:.2f}s "
+        f"({mb_per_sec:.1f} MB/s, {workers} worker(s), {cache_hits} cache hit(s))"
+    )
+    report = {
+        "hashes": {p: d for p, (d, _was_read) in zip(path_list, results)},
+        "total_bytes": total_bytes,
+        "cache_hits": cache_hits,
+        "elapsed": elapsed,
+        "mb_per_sec": mb_per_sec,
+        "workers": workers,
+    }
+    if known_bad is not None:
+        report["known_bad"] = {
+            p: bool(d) and known_bad.contains(d) for p, d in report["hashes"].items()
+        }
+        flagged = sum(report["known_bad"].values())
+        if flagged:
+            log_manager.log_warning(f"{flagged} APK(s) matched the known-bad index")
+    return report
+
+
+@log_manager.log_call("info")
+def hash_apk_record(
+    path: str,
+    algorithms: Iterable[str] = DEFAULT_DIGESTS,
+    entry_patterns: Iterable[str] = ENTRY_PATTERNS,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    cache: Optional[APKHashCache] = None,
+    known_bad: Optional[KnownBadIndex] = None,
+) -> Dict[str, Any]:
+    """Build a structured hash record for a single APK.
+
+    Args:
+        path: APK file path.
+        algorithms: Whole-file digest names understood by ``hashlib``.
+        entry_patterns: Glob patterns of ZIP entries to hash individually.
+            Pass an empty tuple to skip the entry walk.
+        chunk_size: Read buffer size in bytes.
+        cache: Optional digest cache consulted for the whole-file digests.
+        known_bad: Optional index checked against the SHA-256 digest.
+
+    Returns:
+        dict: ``path``, ``size``, ``digests`` (algorithm -> hex),
+        ``entries`` (entry name -> sha256/size/crc32), ``known_bad``
+        (``None`` when no index or SHA-256 is available) and ``error``.
+    """
+    algo_list = list(algorithms)
+    record: Dict[str, Any] = {
+        "path": path,
+        "size": _file_size(path),
+        "digests": {},
+        "entries": {},
+        "known_bad": None,
+        "error": None,
+    }
+    if not os.path.isfile(path):
+        log_manager.log_warning(f"File not found: {path}")
+        record["error"] = "File not found"
+        return record
+
+    key = apk_hash_cache.stat_key(path) if cache else None
+    try:
+        if key:
+            cached = {a: cache.get(key, a) for a in algo_list}
+            if all(cached.values()):
+                record["digests"] = cached
+        if not record["digests"]:
+            record["digests"] = _multi_hash_file(path, algo_list, chunk_size)
+            if key and apk_hash_cache.stat_key(path) == key:
+                for algorithm, digest in record["digests"].items():
+                    cache.put(key, digest, path, algorithm)
+    except Exception as e:
+        log_manager.log_exception(f"Failed to hash {path}: {e}")
+        record["error"] = str(e)
+        return record
+
+    if known_bad is not None and record["digests"].get("sha256"):
+        record["known_bad"] = known_bad.contains(record["digests"]["sha256"])
+        if record["known_bad"]:
+            log_manager.log_warning(f"Known-bad APK detected: {path}")
+
+    patterns = list(entry_patterns)
+    if patterns:
+        try:
+            record["entries"] = _hash_zip_entries(path, patterns, "sha256", chunk_size)
+        except zipfile.BadZipFile as e:
+            log_manager.log_warning(f"Not a valid APK archive {path}: {e}")
+            record["error"] = f"Bad ZIP archive: {e}"
+        except Exception as e:
+            log_manager.log_exception(f"Failed to hash entries of {path}: {e}")
+            record["error"] = str(e)
+    return record
+
+
+@log_manager.log_call("info")
+def bulk_hash_apk_records(
+    paths: Iterable[str],
+    algorithms: Iterable[str] = DEFAULT_DIGESTS,
+    entry_patterns: Iterable[str] = ENTRY_PATTERNS,
+    max_workers: int | None = None,
+    cache: Optional[APKHashCache] = None,
+    known_bad: Optional[KnownBadIndex] = None,
+) -> List[Dict[str, Any]]:
+    """Build ``hash_apk_record`` results for many APKs in input order."""
+    path_list = list(paths)
+    if not path_list:
+        return []
+    algo_list = list(algorithms)
+    pattern_list = list(entry_patterns)
+    workers = max_workers or _default_workers(len(path_list))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(
+            pool.map(
+                lambda p: hash_apk_record(
+                    p, algo_list, pattern_list, DEFAULT_CHUNK_SIZE, cache, known_bad
+                ),
+                path_list,
+            )
+        )
+
+
+@log_manager.log_call("info")
+def find_duplicate_apks(
+    directory: str,
+    sample_size: int = PARTIAL_HASH_SIZE,
+    max_workers: int | None = None,
+    cache: Optional[APKHashCache] = None,
+) -> Dict[str, Any]:
+    """Find byte-identical APKs under ``directory``.
+
+    Files are grouped by size, then by a hash of their first and last
+    ``sample_size`` bytes. Only files still sharing a group are fully
+    hashed.
+
+    Returns:
+        dict: ``groups`` (list of ``{"sha256", "size", "paths"}``),
+        ``files_scanned``, ``total_bytes`` (archive size), ``bytes_read``
+        and ``full_hashes`` (number of files fully hashed).
+    """
+    by_size: Dict[int, List[str]] = {}
+    total_bytes = 0
+    paths = _iter_apk_paths(directory)
+    for path in paths:
+        size = _file_size(path)
+        total_bytes += size
+        if size > 0:
+            by_size.setdefault(size, []).append(path)
+
+    bytes_read = 0
+    candidates: List[Tuple[int, List[str]]] = []
+    workers = max_workers or _default_workers(len(paths))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for size, group in by_size.items():
+            if len(group) < 2:
+                continue
+            partials = pool.map(lambda p: _partial_hash(p, size, sample_size), group)
+            by_partial: Dict[str, List[str]] = {}
+            for path, digest in zip(group, partials):
+                bytes_read += min(size, 2 * sample_size)
+                if digest:
+                    by_partial.setdefault(digest, []).append(path)
+            candidates.extend(
+                (size, same) for same in by_partial.values() if len(same) > 1
+            )
+
+    full_paths = [p for _size, group in candidates for p in group]
+    groups: List[Dict[str, Any]] = []
+    if full_paths:
+        result = bulk_hash_apks(full_paths, max_workers, DEFAULT_CHUNK_SIZE, cache)
+        bytes_read += result["total_bytes"]
+        for size, group in candidates:
+            by_digest: Dict[str, List[str]] = {}
+            for path in group:
+                digest = result["hashes"].get(path)
+                if digest:
+                    by_digest.setdefault(digest, []).append(path)
+            groups.extend(
+                {"sha256": digest, "size": size, "paths": same}
+                for digest, same in by_digest.items()
+                if len(same) > 1
+            )
+
+    groups.sort(key=lambda g: g["size"], reverse=True)
+    log_manager.log_info(
+        f"Duplicate scan: {len(groups)} group(s) across {len(paths)} file(s); "
+        f"read {bytes_read} of {total_bytes} bytes"
+    )
+    return {
+        "groups": groups,
+        "files_scanned": len(paths),
+        "total_bytes": total_bytes,
+        "bytes_read": bytes_read,
+        "full_hashes": len(full_paths),
+    }
+
+
+def export_duplicates_json(
+    report: Dict[str, Any], path: str = DUPLICATE_REPORT_PATH
+) -> None:
+    """Save a ``find_duplicate_apks`` report as JSON."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    try:
+        with open(path, "w", encoding="utf-8") as out:
+            json.dump(report, out, indent=2)
+    except Exception as e:
+        log_manager.log_exception(f"Failed to write duplicate report: {e}")
+
+
+@log_manager.log_call("info")
+def hash_apk_directory(
+    directory: str,
+    max_workers: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    cache: Optional[APKHashCache] = None,
+    cache_mode: str = MODE_CACHE,
+) -> Dict[str, str]:
     """Recursively hash all APK files under ``directory``.
 
     The returned mapping can be stored to compare against future builds
     or to correlate hashes with specific manifest versions.
     """
-    hashes: Dict[str, str] = {}
-    for root_dir, _dirs, files in os.walk(directory):
-        for name in files:
-            if name.lower().endswith(".apk"):
-                file_path = os.path.join(root_dir, name)
-                hashes[file_path] = _hash_file(file_path)
-    return hashes
+    paths = _iter_apk_paths(directory)
+    if not paths:
+        return {}
+    return bulk_hash_apks(
+        paths, max_workers, chunk_size, cache, cache_mode
+    )["hashes"]
@@ -9,6 +9,8 @@ from Utils.security_utils import cvss
 from . import apk_permission_analysis as perm
 from . import security_misconfig as misconfig
 from . import apk_baseline
+from . import apk_hashing
+from . import known_bad_index
 
 # ----------------------------------------------------------------------
 # CVSS Vectors for Common Findings
@@ -16,7 +18,7 @@ from . import apk_baseline
 API_KEY_VECTOR = "AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:N/A:N"
 CLEARTEXT_VECTOR = "AV:N/AC:H/PR:N/UI:N/S:U/C:L/I:N/A:N"
 INSECURE_STORAGE_VECTOR = "AV:L/AC:L/PR:N/UI:N/S:U/C:L/I:N/A:N"
-WEAK_CRYPTO_VECTOR = "AV:N/AC:H/PR:N/UI:N/S:U/C:M/I:N/A:N"
+WEAK_CRYPTO_VECTOR = "AV:N/AC:H/PR:N/UI:N/S:U/C:L/I:N/A:N"
 EXCESSIVE_PERMISSION_VECTOR = "AV:N/AC:L/PR:N/UI:N/S:U/C:L/I:L/A:N"
 
 
@@ -209,6 +211,56 @@ def _run_single_scan() -> None:
     log_manager.log_info("APK scan completed")
 
 
+@log_manager.log_call("info")
+def _run_duplicate_scan() -> None:
+    """Prompt for a directory, list byte-identical APKs and save the JSON report."""
+    path = input(cli_colors.cyan("Enter path to directory containing APK files: ")).strip()
+    if not path:
+        cli_colors.print_warning("No directory provided.")
+        return
+    if not os.path.isdir(path):
+        cli_colors.print_error("Invalid directory path.")
+        return
+
+    log_manager.log_info(f"Finding duplicate APKs in: {path}")
+    report = apk_hashing.find_duplicate_apks(path)
+    cli_colors.print_info(
+        f"{report['files_scanned']} APK(s) scanned, {len(report['groups'])} duplicate group(s); "
+        f"read {report['bytes_read']} of {report['total_bytes']} bytes"
+    )
+    for group in report["groups"]:
+        print(cli_colors.yellow(f"{group['sha256'][:16]}  {group['size']} bytes"))
+        for apk_path in group["paths"]:
+            print(f"  {apk_path}")
+    apk_hashing.export_duplicates_json(report)
+    cli_colors.print_success(f"Report saved to {apk_hashing.DUPLICATE_REPORT_PATH}")
+    log_manager.log_info("Duplicate APK scan completed")
+
+
+@log_manager.log_call("info")
+def _run_build_known_bad_index() -> None:
+    """Prompt for a SHA-256 hash list and build the known-bad index from it."""
+    path = input(cli_colors.cyan("Enter path to hash list (one SHA-256 per line): ")).strip()
+    if not path:
+        cli_colors.print_warning("No file provided.")
+        return
+    if not os.path.isfile(path):
+        cli_colors.print_error("Invalid file path.")
+        return
+
+    log_manager.log_info(f"Building known-bad index from: {path}")
+    try:
+        result = known_bad_index.build_index(path)
+    except Exception as e:
+        cli_colors.print_error("Failed to build known-bad index.")
+        log_manager.log_exception(f"Known-bad index build failed: {e}")
+        return
+    cli_colors.print_success(
+        f"Indexed {result['count']} hash(es) into {known_bad_index.INDEX_DIR}; "
+        "APK pulls and hash scans now flag matches."
+    )
+
+
 @log_manager.log_call("info")
 def run_scan_menu() -> None:
     """CLI wrapper for APK analysis options."""
@@ -216,6 +268,8 @@ def run_scan_menu() -> None:
     options = {
         "1": "Scan a single decompiled APK",
         "2": "Baseline analysis of APK directory",
+        "3": "Find duplicate APK files",
+        "4": "Build known-bad hash index",
         "0": "Return",
     }
     valid = set(options.keys())
@@ -225,5 +279,9 @@ def run_scan_menu() -> None:
         _run_single_scan()
     elif choice == "2":
         apk_baseline.run_baseline_menu()
+    elif choice == "3":
+        _run_duplicate_scan()
+    elif choice == "4":
+        _run_build_known_bad_index()
     else:
         return
@@ -0,0 +1,250 @@
+"""Compact known-bad SHA-256 lookup for APK hashes.
+
+Keeping tens of millions of malicious digests in a Python ``set`` costs
+gigabytes of RAM. This module instead builds two files from a plain
+hash list:
+
+* a Bloom filter answering "definitely not present" for almost every
+  clean APK, and
+* a sorted file of raw 32-byte digests used to confirm filter hits with
+  a binary search.
+
+Both files are memory-mapped when loaded, so lookups touch only a
+handful of pages and the index costs almost no resident memory.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import mmap
+import os
+import struct
+import tempfile
+from typing import Iterator, List, Optional
+
+from Utils.logging_utils import log_manager
+
+INDEX_DIR = os.path.join("Output", "Index")
+BLOOM_FILENAME = "known_bad.bloom"
+SORTED_FILENAME = "known_bad.sorted"
+
+DIGEST_SIZE = 32
+DEFAULT_FP_RATE = 0.001
+
+# Digests sorted in memory per run while building the sorted file.
+SORT_RUN_SIZE = 1_000_000
+
+_MAGIC = b"SHBLOOM1"
+_HEADER = struct.Struct("<8sQQI")  # magic, bit count, item count, hash count
+
+
+# ----------------------------------------------------------------------
+# Build
+# ----------------------------------------------------------------------
+
+def _iter_hash_list(path: str) -> Iterator[bytes]:
+    """Yield raw digests from a text file with one hex SHA-256 per line."""
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        for line_no, line in enumerate(f, start=1):
+            value = line.strip().split(None, 1)[0] if line.strip() else ""
+            if not value or value.startswith("#"):
+                continue
+            try:
+                digest = bytes.fromhex(value)
+            except ValueError:
+                log_manager.log_warning(f"Skipping invalid hash on line {line_no}")
+                continue
+            if len(digest) == DIGEST_SIZE:
+                yield digest
+
+
+def _write_sorted(hash_list_path: str, sorted_path: str) -> int:
+    """External merge sort of the hash list into fixed-size records."""
+    runs: List[str] = []
+    batch: List[bytes] = []
+
+    def flush() -> None:
+        if not batch:
+            return
+        batch.sort()
+        fd, run_path = tempfile.mkstemp(
+            suffix=".run", dir=os.path.dirname(sorted_path) or None
+        )
+        with os.fdopen(fd, "wb") as run:
+            run.write(b"".join(batch))
+        runs.append(run_path)
+        batch.clear()
+
+    for digest in _iter_hash_list(hash_list_path):
+        batch.append(digest)
+        if len(batch) >= SORT_RUN_SIZE:
+            flush()
+    flush()
+
+    def read_run(run_path: str) -> Iterator[bytes]:
+        with open(run_path, "rb") as run:
+            for record in iter(lambda: run.read(DIGEST_SIZE), b""):
+                yield record
+
+    count = 0
+    previous = None
+    try:
+        with open(sorted_path, "wb") as out:
+            for digest in heapq.merge(*(read_run(r) for r in runs)):
+                if digest != previous:
+                    out.write(digest)
+                    count += 1
+                    previous = digest
+    finally:
+        for run_path in runs:
+            os.remove(run_path)
+    return count
+
+
+def _bloom_parameters(count: int, fp_rate: float) -> tuple[int, int]:
+    count = max(count, 1)
+    bits = math.ceil(-count * math.log(fp_rate) / (math.log(2) ** 2))
+    bits = max(64, (bits + 7) // 8 * 8)
+    hashes = max(1, round(bits / count * math.log(2)))
+    return bits, hashes
+
+
+def _bit_positions(digest: bytes, bits: int, hashes: int) -> Iterator[int]:
+    # SHA-256 output is already uniform, so the digest itself seeds the
+    # double-hashing scheme instead of rehashing every key k times.
+    h1 = int.from_bytes(digest[0:8], "little")
+    h2 = int.from_bytes(digest[8:16], "little") | 1
+    for i in range(hashes):
+        yield (h1 + i * h2) % bits
+
+
+@log_manager.log_call("info")
+def build_index(
+    hash_list_path: str,
+    index_dir: str = INDEX_DIR,
+    fp_rate: float = DEFAULT_FP_RATE,
+) -> dict:
+    """Build the Bloom filter and sorted digest file from a hash list.
+
+    Args:
+        hash_list_path: Text file with one hex SHA-256 per line.
+        index_dir: Output directory for the index files.
+        fp_rate: Target false-positive rate of the Bloom filter.
+
+    Returns:
+        dict: ``count``, ``bits``, ``hashes`` and the two output paths.
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    sorted_path = os.path.join(index_dir, SORTED_FILENAME)
+    bloom_path = os.path.join(index_dir, BLOOM_FILENAME)
+
+    count = _write_sorted(hash_list_path, sorted_path)
+    bits, hashes = _bloom_parameters(count, fp_rate)
+    bit_array = bytearray(bits // 8)
+    with open(sorted_path, "rb") as f:
+        for digest in iter(lambda: f.read(DIGEST_SIZE), b""):
+            for pos in _bit_positions(digest, bits, hashes):
+                bit_array[pos >> 3] |= 1 << (pos & 7)
+
+    with open(bloom_path, "wb") as out:
+        out.write(_HEADER.pack(_MAGIC, bits, count, hashes))
+        out.write(bit_array)
+
+    log_manager.log_info(
+        f"Built known-bad index: {count} hashes, {bits // 8} filter bytes, "
+        f"{hashes} hash functions"
+    )
+    return {
+        "count": count,
+        "bits": bits,
+        "hashes": hashes,
+        "bloom_path": bloom_path,
+        "sorted_path": sorted_path,
+    }
+
+
+# ----------------------------------------------------------------------
+# Lookup
+# ----------------------------------------------------------------------
+
+class KnownBadIndex:
+    """Memory-mapped Bloom filter backed by a sorted digest file."""
+
+    def __init__(self, index_dir: str = INDEX_DIR):
+        self.index_dir = index_dir
+        self._bloom_file = self._sorted_file = None
+        self._bloom: Optional[mmap.mmap] = None
+        self._sorted: Optional[mmap.mmap] = None
+        # Whatever was opened before a failure is closed again
+        try:
+            self._bloom_file = open(os.path.join(index_dir, BLOOM_FILENAME), "rb")
+            self._sorted_file = open(os.path.join(index_dir, SORTED_FILENAME), "rb")
+            self._bloom = mmap.mmap(self._bloom_file.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                magic, self.bits, self.count, self.hashes = _HEADER.unpack_from(self._bloom)
+            except struct.error as e:
+                raise ValueError(f"Truncated Bloom filter header: {index_dir}") from e
+            if magic != _MAGIC:
+                raise ValueError(f"Not a Stonehaven Bloom filter: {index_dir}")
+            self._offset = _HEADER.size
+            if os.path.getsize(self._sorted_file.name) > 0:
+                self._sorted = mmap.mmap(
+                    self._sorted_file.fileno(), 0, access=mmap.ACCESS_READ
+                )
+        except BaseException:
+            self.close()
+            raise
+        self.records = len(self._sorted) // DIGEST_SIZE if self._sorted else 0
+
+    # ------------------------------------------------------------------
+    def might_contain(self, digest: bytes) -> bool:
+        """Bloom filter test; ``False`` means definitely not known-bad."""
+        bloom, offset = self._bloom, self._offset
+        for pos in _bit_positions(digest, self.bits, self.hashes):
+            if not bloom[offset + (pos >> 3)] & (1 << (pos & 7)):
+                return False
+        return True
+
+    # ------------------------------------------------------------------
+    def _confirm(self, digest: bytes) -> bool:
+        """Binary search the sorted digest file for an exact match."""
+        data = self._sorted
+        if data is None:
+            return False
+        lo, hi = 0, self.records
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = mid * DIGEST_SIZE
+            record = data[start:start + DIGEST_SIZE]
+            if record < digest:
+                lo = mid + 1
+            elif record > digest:
+                hi = mid
+            else:
+                return True
+        return False
+
+    # ------------------------------------------------------------------
+    def contains(self, sha256_hex: str) -> bool:
+        """Return ``True`` if ``sha256_hex`` is in the known-bad set."""
+        try:
+            digest = bytes.fromhex(sha256_hex)
+        except (ValueError, TypeError):
+            return False
+        if len(digest) != DIGEST_SIZE:
+            return False
+        return self.might_contain(digest) and self._confirm(digest)
+
+    # ------------------------------------------------------------------
+    def close(self) -> None:
+        """Release the memory maps and file handles."""
+        for handle in (self._bloom, self._sorted, self._bloom_file, self._sorted_file):
+            if handle is not None:
+                handle.close()
+
+    def __enter__(self) -> "KnownBadIndex":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
@@ -0,0 +1,337 @@
+# adb_client.py
+# Pure-Python client for the ADB host protocol (local adb server on port 5037)
+
+import re
+import secrets
+import socket
+import threading
+import time
+from collections import deque
+from Utils.app_utils.app_config import ADB_SERVER_HOST, ADB_SERVER_PORT
+from Utils.logging_utils import log_manager
+
+# ─────────────────────────────────────────────
+# PROTOCOL CONSTANTS
+# ─────────────────────────────────────────────
+DEFAULT_TIMEOUT = 6.0
+POOL_SIZE = 4           # idle shell sessions kept per device
+RECV_SIZE = 65536
+RETRY_INTERVAL = 30.0   # seconds before re-probing an unreachable server
+MAX_MARKER_LEN = 64     # upper bound on a read_until() match, in bytes
+
+
+class AdbProtocolError(Exception):
+    """Raised when the adb server rejects a request or violates the protocol."""
+
+
+# ─────────────────────────────────────────────
+# CONNECTION: one socket to the adb server
+# ─────────────────────────────────────────────
+class AdbConnection:
+    """A single socket speaking the adb server's length-prefixed protocol."""
+
+    def __init__(self, host: str, port: int, timeout: float = DEFAULT_TIMEOUT):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self._buffer = bytearray()
+
+    @classmethod
+    def from_socket(cls, sock: socket.socket) -> "AdbConnection":
+        """Wrap an already-connected socket (used by the fake server)."""
+        conn = cls.__new__(cls)
+        conn.sock, conn._buffer = sock, bytearray()
+        return conn
+
+    def settimeout(self, timeout: float | None) -> None:
+        self.sock.settimeout(timeout)
+
+    def send_request(self, payload: str) -> None:
+        """Send ``payload`` and raise AdbProtocolError unless the server says OKAY."""
+        data = payload.encode("utf-8")
+        self.sock.sendall(b"%04x" % len(data) + data)
+        status = self.read_exact(4)
+        if status == b"OKAY":
+            return
+        if status == b"FAIL":
+            raise AdbProtocolError(self.read_length_prefixed().decode("utf-8", "replace"))
+        raise AdbProtocolError(f"Unexpected adb server status: {status!r}")
+
+    def read_exact(self, size: int) -> bytes:
+        while len(self._buffer) < size:
+            chunk = self.sock.recv(RECV_SIZE)
+            if not chunk:
+                raise AdbProtocolError("adb server closed the connection")
+            self._buffer += chunk
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def read_length_prefixed(self) -> bytes:
+        length = int(self.read_exact(4), 16)
+        return self.read_exact(length)
+
+    def read_until(self, pattern: re.Pattern, max_len: int = MAX_MARKER_LEN) -> tuple[bytes, re.Match]:
+        """
+        Read until ``pattern`` matches; return (bytes before match, match).
+
+        ``max_len`` bounds the length of a match, so each search resumes
+        just before the bytes already searched and long output is scanned
+        once rather than from the start on every chunk.
+        """
+        searched = 0
+        while True:
+            match = pattern.search(self._buffer, searched)
+            if match:
+                before = bytes(self._buffer[:match.start()])
+                # Re-match on a copy: the buffer is reused once this returns
+                match = pattern.match(bytes(self._buffer[match.start():match.end()]))
+                del self._buffer[:match.end() + len(before)]
+                return before, match
+            searched = max(0, len(self._buffer) - max_len)
+            chunk = self.sock.recv(RECV_SIZE)
+            if not chunk:
+                raise AdbProtocolError("adb server closed the connection")
+            self._buffer += chunk
+
+    def read_all(self) -> bytes:
+        chunks = [bytes(self._buffer)]
+        self._buffer.clear()
+        while True:
+            chunk = self.sock.recv(RECV_SIZE)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    def iter_chunks(self):
+        """Yield buffered and then received bytes until the server closes the stream."""
+        if self._buffer:
+            data = bytes(self._buffer)
+            self._buffer.clear()
+            yield data
+        while True:
+            chunk = self.sock.recv(RECV_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+    def sendall(self, data: bytes) -> None:
+        self.sock.sendall(data)
+
+    def close(self) -> None:
+        # shutdown() first so a thread blocked in recv() on this socket wakes up
+        for action in (lambda: self.sock.shutdown(socket.SHUT_RDWR), self.sock.close):
+            try:
+                action()
+            except OSError:
+                pass
+
+
+# ─────────────────────────────────────────────
+# SHELL SESSION: persistent `exec:sh` on a device
+# ─────────────────────────────────────────────
+class _ShellSession:
+    """
+    A long-lived `sh` on the device reading commands from the socket.
+
+    Each command is followed by an echo of a random marker carrying its exit
+    status, so many commands can share one transport without re-handshaking.
+    """
+
+    def __init__(self, conn: AdbConnection, serial: str):
+        self.conn = conn
+        self.serial = serial
+        self.marker = f"__STONEHAVEN_RC_{secrets.token_hex(4)}"
+        self._pattern = re.compile(re.escape(self.marker.encode()) + rb":(\d+)\r?\n")
+
+    def run(self, command: str, timeout: float) -> tuple[int, str]:
+        self.conn.settimeout(timeout)
+        request = f'( {command} ) </dev/null 2>/dev/null; echo "{self.marker}:$?"\n'
+        self.conn.sendall(request.encode("utf-8"))
+        output, match = self.conn.read_until(self._pattern)
+        return int(match.group(1)), output.decode("utf-8", "replace")
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+# ─────────────────────────────────────────────
+# CLIENT
+# ─────────────────────────────────────────────
+class AdbClient:
+    """Talks to the local adb server directly, pooling device shell sessions."""
+
+    def __init__(
+        self,
+        host: str = ADB_SERVER_HOST,
+        port: int = ADB_SERVER_PORT,
+        timeout: float = DEFAULT_TIMEOUT,
+        pool_size: int = POOL_SIZE,
+    ):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._pool: dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    # ─────────────────────────────────────────
+    # Host services
+    # ─────────────────────────────────────────
+    def connect(self) -> AdbConnection:
+        return AdbConnection(self.host, self.port, self.timeout)
+
+    def host_command(self, service: str) -> str:
+        """Run a ``host:`` service that replies with one length-prefixed payload."""
+        conn = self.connect()
+        try:
+            conn.send_request(service)
+            return conn.read_length_prefixed().decode("utf-8", "replace")
+        finally:
+            conn.close()
+
+    def is_available(self) -> bool:
+        """Return True if an adb server answers on the configured port."""
+        try:
+            self.host_command("host:version")
+            return True
+        except (OSError, AdbProtocolError):
+            return False
+
+    def devices(self) -> list[tuple[str, str]]:
+        """Return ``(serial, state)`` pairs from ``host:devices``."""
+        return parse_device_list(self.host_command("host:devices"))
+
+    def get_state(self, serial: str) -> str:
+        """
+        Return the state of ``serial`` as `adb get-state` prints it.
+
+        Raises:
+            AdbProtocolError: If the server does not know the device.
+        """
+        return self.host_command(f"host-serial:{serial}:get-state").strip()
+
+    def open_stream(self, service: str) -> AdbConnection:
+        """Open a connection for a streaming host service such as track-devices."""
+        conn = self.connect()
+        try:
+            conn.send_request(service)
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    # ─────────────────────────────────────────
+    # Device services
+    # ─────────────────────────────────────────
+    def open_device_service(self, serial: str, service: str) -> AdbConnection:
+        """Switch a new connection to ``serial`` and start ``service`` on it."""
+        conn = self.connect()
+        try:
+            conn.send_request(f"host:transport:{serial}")
+            conn.send_request(service)
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    def run_service(self, serial: str, service: str) -> bytes:
+        """Run a one-shot device service (``shell:...`` or ``exec:...``) to EOF."""
+        conn = self.open_device_service(serial, service)
+        try:
+            return conn.read_all()
+        finally:
+            conn.close()
+
+    def exec_out(self, serial: str, command: str) -> bytes:
+        """Return raw stdout of ``command`` via the ``exec:`` service."""
+        return self.run_service(serial, f"exec:{command}")
+
+    def shell(self, serial: str, command: str, timeout: float | None = None) -> tuple[int, str]:
+        """
+        Run a shell command on a pooled persistent session.
+
+        Returns:
+            tuple: ``(exit_status, stdout)``.
+
+        Raises:
+            TimeoutError: If the command does not finish within ``timeout``.
+            AdbProtocolError / OSError: On transport failure.
+        """
+        session = self._acquire(serial)
+        try:
+            result = session.run(command, timeout or self.timeout)
+        except Exception:
+            session.close()
+            raise
+        self._release(session)
+        return result
+
+    # ─────────────────────────────────────────
+    # Session pool
+    # ─────────────────────────────────────────
+    def _acquire(self, serial: str) -> _ShellSession:
+        with self._lock:
+            idle = self._pool.get(serial)
+            if idle:
+                return idle.popleft()
+        return _ShellSession(self.open_device_service(serial, "exec:sh"), serial)
+
+    def _release(self, session: _ShellSession) -> None:
+        with self._lock:
+            idle = self._pool.setdefault(session.serial, deque())
+            if len(idle) < self.pool_size:
+                idle.append(session)
+                return
+        session.close()
+
+    def close(self, serial: str | None = None) -> None:
+        """Close pooled sessions for ``serial`` (or all devices)."""
+        with self._lock:
+            serials = [serial] if serial else list(self._pool)
+            sessions = [s for key in serials for s in self._pool.pop(key, ())]
+        for session in sessions:
+            session.close()
+
+
+def parse_device_list(payload: str) -> list[tuple[str, str]]:
+    """Parse ``serial<TAB>state`` lines from host:devices / track-devices."""
+    devices = []
+    for line in payload.splitlines():
+        parts = line.strip().split()
+        if len(parts) >= 2:
+            devices.append((parts[0], parts[1]))
+    return devices
+
+
+# ─────────────────────────────────────────────
+# SHARED CLIENT
+# ─────────────────────────────────────────────
+_client: AdbClient | None = None
+_client_lock = threading.Lock()
+_retry_after = 0.0
+
+
+def get_client() -> AdbClient | None:
+    """Return a shared client if an adb server is reachable, else None."""
+    global _client, _retry_after
+    with _client_lock:
+        if _client is None:
+            if time.monotonic() < _retry_after:
+                return None
+            candidate = AdbClient()
+            if not candidate.is_available():
+                log_manager.log_debug("No adb server reachable; using adb binary.")
+                _retry_after = time.monotonic() + RETRY_INTERVAL
+                return None
+            _client = candidate
+        return _client
+
+
+def reset_client() -> None:
+    """Drop the shared client and its pooled sessions."""
+    global _client, _retry_after
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+        _retry_after = 0.0
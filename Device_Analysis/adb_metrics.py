@@ -0,0 +1,190 @@
+# adb_metrics.py
+# In-memory latency histograms for every ADB invocation
+
+import bisect
+import json
+import os
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from Utils.logging_utils import log_manager
+
+# ─────────────────────────────────────────────
+# HISTOGRAM CONFIGURATION
+# ─────────────────────────────────────────────
+# Upper bounds (milliseconds) of the latency buckets; the last bucket is open-ended
+BUCKETS_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+REPORT_SIZE = 10
+
+# (command, serial) -> stats dict, see _new_stats
+_stats: dict[tuple[str, str], dict] = {}
+_models: dict[str, str] = {}
+_lock = threading.Lock()
+
+
+def _new_stats() -> dict:
+    return {
+        "calls": 0,
+        "failures": 0,
+        "total_seconds": 0.0,
+        "min_seconds": None,
+        "max_seconds": 0.0,
+        "output_bytes": 0,
+        "statuses": {},
+        "buckets": [0] * (len(BUCKETS_MS) + 1),
+    }
+
+# ─────────────────────────────────────────────
+# RECORDING
+# ─────────────────────────────────────────────
+def record(command: str, serial: str, seconds: float, output_bytes: int = 0, status="0") -> None:
+    """
+    Add one ADB invocation to the histograms.
+
+    Args:
+        command (str): Command or label (batches are recorded by label).
+        serial (str): Device serial ("" for host commands).
+        seconds (float): Wall time of the invocation.
+        output_bytes (int): Size of the captured stdout.
+        status: Exit status, "timeout" / "error", or None when the transport
+            reports no status (not counted as a failure).
+    """
+    status = "unknown" if status is None else str(status)
+    with _lock:
+        stats = _stats.setdefault((command, serial), _new_stats())
+        stats["calls"] += 1
+        stats["failures"] += status not in ("0", "unknown")
+        stats["total_seconds"] += seconds
+        stats["min_seconds"] = seconds if stats["min_seconds"] is None else min(stats["min_seconds"], seconds)
+        stats["max_seconds"] = max(stats["max_seconds"], seconds)
+        stats["output_bytes"] += output_bytes
+        stats["statuses"][status] = stats["statuses"].get(status, 0) + 1
+        stats["buckets"][bisect.bisect_left(BUCKETS_MS, seconds * 1000)] += 1
+
+
+@contextmanager
+def track(serial: str, command: str):
+    """
+    Time the ADB invocation inside the ``with`` block.
+
+    The block sets ``result["status"]`` and ``result["output"]`` (str or
+    bytes), or ``result["bytes"]`` when the output was streamed, on the
+    yielded dict; an exception is recorded as "timeout" or "error" and
+    re-raised.
+
+    Example:
+        with adb_metrics.track(serial, "get-state") as result:
+            proc = subprocess.run(...)
+            result.update(status=proc.returncode, output=proc.stdout)
+    """
+    result = {"status": 0, "output": ""}
+    started = time.perf_counter()
+    try:
+        yield result
+    except (TimeoutError, subprocess.TimeoutExpired):
+        result["status"] = "timeout"
+        raise
+    except Exception:
+        result["status"] = "error"
+        raise
+    finally:
+        output = result.get("output") or ""
+        if "bytes" in result:
+            size = result["bytes"]
+        elif isinstance(output, bytes):
+            size = len(output)
+        else:
+            size = len(output.encode("utf-8", "replace"))
+        record(command, serial, time.perf_counter() - started, size, result["status"])
+
+
+def label_device(serial: str, model: str) -> None:
+    """Associate a device model with ``serial`` for reports."""
+    if serial and model:
+        with _lock:
+            _models[serial] = model
+
+
+def reset() -> None:
+    """Forget all recorded invocations."""
+    with _lock:
+        _stats.clear()
+
+# ─────────────────────────────────────────────
+# REPORTING
+# ─────────────────────────────────────────────
+def _percentile_ms(buckets: list[int], fraction: float) -> float | None:
+    """Upper bucket bound containing the given fraction of calls (None if open-ended)."""
+    target = fraction * sum(buckets)
+    seen = 0
+    for idx, count in enumerate(buckets):
+        seen += count
+        if count and seen >= target:
+            return BUCKETS_MS[idx] if idx < len(BUCKETS_MS) else None
+    return None
+
+
+def snapshot() -> list[dict]:
+    """Return one row per (command, serial) with aggregate latency figures."""
+    with _lock:
+        items = [(key, dict(stats, statuses=dict(stats["statuses"]), buckets=list(stats["buckets"])))
+                 for key, stats in _stats.items()]
+        models = dict(_models)
+
+    rows = []
+    for (command, serial), stats in items:
+        rows.append({
+            "command": command,
+            "serial": serial,
+            "model": models.get(serial, ""),
+            "calls": stats["calls"],
+            "failures": stats["failures"],
+            "mean_seconds": round(stats["total_seconds"] / stats["calls"], 4),
+            "min_seconds": round(stats["min_seconds"], 4),
+            "max_seconds": round(stats["max_seconds"], 4),
+            "p95_ms_bound": _percentile_ms(stats["buckets"], 0.95),
+            "output_bytes": stats["output_bytes"],
+            "statuses": stats["statuses"],
+            "histogram": dict(zip([f"<={b}ms" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"],
+                                  stats["buckets"])),
+        })
+    return rows
+
+
+def slowest_commands(limit: int = REPORT_SIZE, serial: str | None = None) -> list[dict]:
+    """Return the rows with the highest mean latency, optionally for one device."""
+    rows = [row for row in snapshot() if serial is None or row["serial"] == serial]
+    rows.sort(key=lambda row: (row["mean_seconds"], row["max_seconds"]), reverse=True)
+    return rows[:limit]
+
+
+def format_report(rows: list[dict]) -> str:
+    """Render slowest_commands() rows as a fixed-width text table."""
+    if not rows:
+        return "No ADB invocations recorded."
+    lines = [f"{'Mean(s)':>8} {'Max(s)':>8} {'Calls':>5} {'Fail':>4} {'Bytes':>9}  Device / Command"]
+    for row in rows:
+        device = row["serial"] + (f" ({row['model']})" if row["model"] else "")
+        command = " ".join(row["command"].split())
+        if len(command) > 60:
+            command = command[:59] + "…"
+        lines.append(
+            f"{row['mean_seconds']:>8.3f} {row['max_seconds']:>8.3f} {row['calls']:>5} "
+            f"{row['failures']:>4} {row['output_bytes']:>9}  {device}: {command}"
+        )
+    return "\n".join(lines)
+
+
+def log_report(serial: str | None = None, limit: int = REPORT_SIZE) -> None:
+    """Write the slowest-commands table to the log."""
+    log_manager.log_info("Slowest ADB commands:\n" + format_report(slowest_commands(limit, serial)))
+
+
+def dump(path: str) -> str:
+    """Write every metrics row to ``path`` as JSON and return the path."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"generated": time.strftime("%Y-%m-%d %H:%M:%S"), "buckets_ms": BUCKETS_MS,
+                   "commands": snapshot()}, f, indent=2)
+    return path
@@ -0,0 +1,171 @@
+# adb_transport.py
+# Record/replay layer under adb_shell for offline tests and benchmarks
+
+import atexit
+import json
+import os
+import re
+import subprocess
+import threading
+import time
+from Utils.app_utils.app_config import (
+    ADB_PATH,
+    ADB_TRANSPORT,
+    ADB_FIXTURE_DIR,
+    ADB_REPLAY_LATENCY,
+)
+from Utils.logging_utils import log_manager
+
+# ─────────────────────────────────────────────
+# TRANSPORT MODES
+# ─────────────────────────────────────────────
+LIVE = "live"        # talk to real devices
+RECORD = "record"    # talk to real devices and save every command/output pair
+REPLAY = "replay"    # serve saved pairs, no device or adb executable needed
+MODES = (LIVE, RECORD, REPLAY)
+
+MISSING_STATUS = 127  # exit status replayed for commands absent from the fixtures
+HOST_FIXTURE = "_host"  # fixture name for commands not tied to one device
+
+_config = {"mode": LIVE, "fixture_dir": ADB_FIXTURE_DIR, "latency": ""}
+_fixtures: dict[str, dict] = {}  # fixture name -> {"serial", "recorded", "commands"}
+_dirty: set[str] = set()
+_lock = threading.Lock()
+
+
+def configure(mode: str = LIVE, fixture_dir: str | None = None, latency: str | float = "") -> None:
+    """
+    Select the transport mode.
+
+    Args:
+        mode (str): LIVE, RECORD or REPLAY.
+        fixture_dir (str): Directory holding one JSON fixture per device.
+        latency: Replay delay per command. "" for none, "recorded" to
+            sleep for each command's recorded wall time, or seconds.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown ADB transport mode: {mode} (expected one of {', '.join(MODES)})")
+    flush()
+    with _lock:
+        _config.update(mode=mode, fixture_dir=fixture_dir or ADB_FIXTURE_DIR, latency=latency)
+        _fixtures.clear()
+        _dirty.clear()
+    if mode != LIVE:
+        log_manager.log_info(f"ADB transport: {mode} ({_config['fixture_dir']})")
+
+
+def mode() -> str:
+    return _config["mode"]
+
+
+def replaying() -> bool:
+    return _config["mode"] == REPLAY
+
+# ─────────────────────────────────────────────
+# FIXTURE FILES
+# ─────────────────────────────────────────────
+def fixture_path(serial: str) -> str:
+    """Return the fixture file for ``serial`` ("" means host commands)."""
+    name = re.sub(r"[^A-Za-z0-9._-]", "_", serial) if serial else HOST_FIXTURE
+    return os.path.join(_config["fixture_dir"], f"{name}.json")
+
+
+def _fixture(serial: str) -> dict:
+    """Return the in-memory fixture for ``serial``; caller holds _lock."""
+    path = fixture_path(serial)
+    if path not in _fixtures:
+        fixture = {"serial": serial, "recorded": None, "commands": {}}
+        if os.path.isfile(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    fixture = json.load(f)
+            except (OSError, ValueError) as e:
+                log_manager.log_warning(f"Unreadable ADB fixture {path}: {e}")
+        _fixtures[path] = fixture
+    return _fixtures[path]
+
+
+def flush() -> None:
+    """Write recorded fixtures that changed since the last flush."""
+    with _lock:
+        pending = [(path, json.dumps(_fixtures[path], indent=2)) for path in _dirty]
+        _dirty.clear()
+    for path, text in pending:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+
+atexit.register(flush)
+
+# ─────────────────────────────────────────────
+# RECORD / REPLAY
+# ─────────────────────────────────────────────
+def record(serial: str, command: str, status: int, stdout: str, seconds: float) -> None:
+    """Save one command result when recording; a no-op in other modes."""
+    if _config["mode"] != RECORD:
+        return
+    with _lock:
+        fixture = _fixture(serial)
+        fixture["recorded"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        fixture["commands"][command] = {
+            "status": status,
+            "stdout": stdout,
+            "seconds": round(seconds, 4),
+        }
+        _dirty.add(fixture_path(serial))
+
+
+def replay(serial: str, command: str) -> tuple[int, str]:
+    """
+    Return the recorded ``(exit_status, stdout)`` of ``command`` on ``serial``.
+
+    Sleeps according to the configured latency. Commands that were never
+    recorded exit with MISSING_STATUS and no output, like an unknown
+    command in a shell.
+    """
+    with _lock:
+        entry = _fixture(serial)["commands"].get(command)
+    if entry is None:
+        log_manager.log_warning(f"No ADB fixture for {serial or 'host'}: {command}")
+        return MISSING_STATUS, ""
+
+    latency = _config["latency"]
+    if latency == "recorded":
+        time.sleep(entry.get("seconds", 0))
+    elif latency not in ("", None):
+        time.sleep(float(latency))
+    return entry["status"], entry["stdout"]
+
+
+def run_adb(args: list[str], serial: str = "", timeout: float = 10,
+            adb_path: str = ADB_PATH) -> tuple[int, str]:
+    """
+    Run a non-shell adb command (e.g. ``["devices", "-l"]``) through the transport.
+
+    Raises:
+        subprocess.TimeoutExpired: If the live command times out.
+    """
+    key = "adb " + " ".join(args)
+    if replaying():
+        return replay(serial, key)
+
+    command = [adb_path] + (["-s", serial] if serial else []) + list(args)
+    started = time.perf_counter()
+    result = subprocess.run(
+        command,
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        timeout=timeout,
+    )
+    stdout = result.stdout or ""
+    record(serial, key, result.returncode, stdout, time.perf_counter() - started)
+    return result.returncode, stdout
+
+
+# Pick up the mode from the environment (STONEHAVEN_ADB_TRANSPORT)
+if ADB_TRANSPORT != LIVE:
+    configure(ADB_TRANSPORT, ADB_FIXTURE_DIR, ADB_REPLAY_LATENCY)
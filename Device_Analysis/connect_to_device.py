@@ -7,6 +7,12 @@ from Device_Analysis import (
     device_display,
     device_summary,
     device_data_collector,
+    device_fleet,
+    device_apk_scan,
+    device_apk_hashes,
+    device_extract,
+    device_logcat,
+    device_permission_inventory,
 )
 from Utils.app_utils import cli_colors, display_utils, menu_utils
 from Utils.logging_utils import log_manager
@@ -31,7 +37,8 @@ def run():
         device_display.render_device_table(devices)
 
         cli_colors.print_section("DEVICE SELECTION")
-        print("Enter the number of the device to connect, or 0 to return to main menu.")
+        print("Enter the number of the device to connect, A to collect from all devices,")
+        print("or 0 to return to main menu.")
         print("-" * 60)
 
         valid_choices = _get_valid_choices(devices)
@@ -41,6 +48,10 @@ def run():
             cli_colors.print_info("Returning to main menu.")
             return
 
+        if user_choice.upper() == "A":
+            _run_fleet_collection()
+            return
+
         selected_index = int(user_choice) - 1
         selected_device = devices[selected_index]
 
@@ -52,11 +63,15 @@ def run():
         # Enrich metadata
         cli_colors.print_info("[INFO] Collecting detailed device info...")
         start = time.time()
-        full_device = device_data_collector.collect_full_device_info(selected_device)
+        full_device = device_data_collector.collect_full_device_info(
+            selected_device, concurrent=True, use_cache=True
+        )
         elapsed = round(time.time() - start, 2)
 
         log_manager.log_info(f"Collected metadata for device: {full_device}")
-        cli_colors.print_info(f"[INFO] Metadata collected in {elapsed} seconds.\n")
+        cli_colors.print_info(
+            f"[INFO] Metadata collected in {elapsed} seconds{_speedup_note(full_device)}.\n"
+        )
 
         _launch_device_menu(full_device)
 
@@ -75,8 +90,37 @@ def _print_header():
     display_utils.print_timestamp("Session Start")
 
 
+def _speedup_note(device: dict) -> str:
+    """Describe the wall-time saved by concurrent collection, if any."""
+    stats = device.get("collection_stats", {})
+    sequential = stats.get("sequential_seconds", 0)
+    wall = stats.get("wall_seconds", 0)
+    if stats.get("mode") != "concurrent" or sequential <= 0 or wall >= sequential:
+        return ""
+    saved = round(100 * (1 - wall / sequential))
+    return f" (vs ~{sequential:.2f}s sequential, {saved}% less wall time)"
+
+
 def _get_valid_choices(devices):
-    return {str(i + 1) for i in range(len(devices))}.union({"0"})
+    return {str(i + 1) for i in range(len(devices))}.union({"0", "A", "a"})
+
+
+def _run_fleet_collection():
+    """Collect full info from every attached device and show per-device latency."""
+    log_manager.log_info("Option: Fleet collection selected.")
+    fleet = device_fleet.list_fleet()
+    if not fleet:
+        cli_colors.print_warning("No online devices available for fleet collection.")
+        return
+
+    cli_colors.print_info(f"[INFO] Collecting detailed info from {len(fleet)} device(s)...")
+    summary = device_fleet.collect_fleet(
+        fleet,
+        on_result=lambda r: print(
+            f"  {r['serial']}: {r['status']} in {r['latency_seconds']:.2f}s"
+        ),
+    )
+    device_display.render_fleet_summary(summary)
 
 
 def _launch_device_menu(device):
@@ -87,8 +131,11 @@ def _launch_device_menu(device):
     while True:
         options = {
             "1": "Show device summary",
-            "2": "Perform APK scan [TODO]",
-            "3": "Pull data from device [TODO]",
+            "2": "Perform APK scan",
+            "3": "Pull data from device",
+            "4": "Monitor logcat (live alerts)",
+            "5": "App permission inventory",
+            "6": "Hash APKs on device (pull unknown only)",
             "0": "Back to Main Menu"
         }
 
@@ -101,12 +148,24 @@ def _launch_device_menu(device):
                 device_summary.show_device_summary(device)
 
             case "2":
-                cli_colors.print_info("[INFO] APK scan feature coming soon.")
-                log_manager.log_info("Option: APK scan selected. (TODO)")
+                log_manager.log_info("Option: APK scan selected.")
+                device_apk_scan.run_apk_scan(device)
 
             case "3":
-                cli_colors.print_info("[INFO] Data extraction coming soon.")
-                log_manager.log_info("Option: Pull data from device selected. (TODO)")
+                log_manager.log_info("Option: Pull data from device selected.")
+                device_extract.run_extraction(device)
+
+            case "4":
+                log_manager.log_info("Option: Monitor logcat selected.")
+                device_logcat.run_monitor(device)
+
+            case "5":
+                log_manager.log_info("Option: App permission inventory selected.")
+                device_permission_inventory.run_permission_inventory(device)
+
+            case "6":
+                log_manager.log_info("Option: Hash APKs on device selected.")
+                device_apk_hashes.run_device_hash_scan(device)
 
             case "0":
                 elapsed = round(time.time() - session_start, 2)
@@ -0,0 +1,178 @@
+# device_apk_hashes.py
+# Hashes installed APKs on the device and pulls only the ones not seen locally
+
+import os
+import re
+import time
+from Utils.app_utils import cli_colors
+from Utils.logging_utils import log_manager
+from App_Analysis import apk_hashing
+from App_Analysis.apk_hash_cache import APKHashCache
+from Device_Analysis import device_apk_scan, device_inspector_core as core
+from Device_Analysis import device_package_inventory as packages
+
+# ─────────────────────────────────────────────
+# HASHING CONFIGURATION
+# ─────────────────────────────────────────────
+HASH_TIMEOUT = 600  # seconds for the whole on-device hashing pass
+
+# One shell: every APK in each package's install directory (base and split
+# APKs), each directory once, hashed with toybox sha256sum
+_HASH_SCRIPT = (
+    "pm list packages -f{flags} | sed -e 's/^package://' -e 's/=[^=]*$//' "
+    "| while read p; do echo \"${{p%/*}}\"; done | sort -u "
+    "| while read d; do sha256sum \"$d\"/*.apk; done 2>/dev/null"
+)
+_SHA256_LINE = re.compile(r"^([0-9a-fA-F]{64})\s+\*?(/.+)$")
+
+
+def hash_command(include_system: bool = False) -> str:
+    return _HASH_SCRIPT.format(flags="" if include_system else " -3")
+
+
+def parse_sha256sum(lines) -> dict[str, str]:
+    """Parse `sha256sum` output into ``{path: sha256}``."""
+    hashes = {}
+    for line in lines:
+        match = _SHA256_LINE.match(line.strip())
+        if match:
+            hashes[match.group(2)] = match.group(1).lower()
+    return hashes
+
+# ─────────────────────────────────────────────
+# ON-DEVICE HASHING
+# ─────────────────────────────────────────────
+@log_manager.log_call("info")
+def hash_installed_apks(serial: str, include_system: bool = False) -> dict[str, str]:
+    """
+    Hash installed APKs on the device in a single batched shell invocation.
+
+    Returns:
+        dict: Remote APK path -> SHA-256, the same shape as
+        apk_hashing.hash_apk_directory() returns for local files.
+    """
+    start = time.perf_counter()
+    hashes = parse_sha256sum(
+        core.adb_shell_lines(serial, hash_command(include_system), timeout=HASH_TIMEOUT)
+    )
+    log_manager.log_info(
+        f"Hashed {len(hashes)} APK(s) on {serial} in {time.perf_counter() - start:.2f}s"
+    )
+    return hashes
+
+
+def local_known_hashes(directory: str = device_apk_scan.APK_OUTPUT_DIR,
+                       cache: APKHashCache | None = None) -> set[str]:
+    """SHA-256 digests of every APK already pulled under ``directory``."""
+    if not os.path.isdir(directory):
+        return set()
+    return {d for d in apk_hashing.hash_apk_directory(directory, cache=cache).values() if d}
+
+
+def _apk_names(serial: str, paths: list[str]) -> dict[str, dict]:
+    """Name remote APK paths after their package: base APKs by package, splits as package.split."""
+    inventory = packages.get_inventory(serial) or {}
+    by_dir = {}
+    for name, info in inventory.items():
+        if info.get("path"):
+            by_dir.setdefault(info["path"].rsplit("/", 1)[0], (name, info))
+
+    apks = {}
+    for path in paths:
+        directory, filename = path.rsplit("/", 1)
+        name, info = by_dir.get(directory, (directory.rsplit("/", 1)[-1], {}))
+        if info.get("path") != path:
+            name = f"{name}.{filename[:-4]}"
+        apks[name] = {"path": path, "version_code": info.get("version_code")}
+    return apks
+
+
+@log_manager.log_call("info")
+def pull_unknown_apks(
+    serial: str,
+    device_hashes: dict[str, str] | None = None,
+    known_hashes: set[str] | None = None,
+    cache: APKHashCache | None = None,
+    known_bad=None,
+    on_result=None,
+) -> dict:
+    """
+    Pull and scan only the APKs whose on-device hash is not known locally.
+
+    Args:
+        serial (str): Device serial number.
+        device_hashes (dict): Output of hash_installed_apks(); computed if omitted.
+        known_hashes (set): Digests already available locally; defaults to
+            the APKs pulled earlier under Output/APKs.
+        cache, known_bad, on_result: Passed to device_apk_scan.pull_and_scan().
+
+    Returns:
+        dict: ``device_hashes``, ``known`` (remote path -> digest of APKs
+        skipped), ``pulled`` (pull_and_scan results) and ``known_bad``
+        (remote paths whose on-device digest is in ``known_bad``, pulled
+        or not). A pulled APK whose local digest differs from the
+        device's gets a finding.
+    """
+    device_hashes = hash_installed_apks(serial) if device_hashes is None else device_hashes
+    known_hashes = local_known_hashes(cache=cache) if known_hashes is None else known_hashes
+
+    known = {p: d for p, d in device_hashes.items() if d in known_hashes}
+    unknown = [p for p in device_hashes if p not in known]
+    apks = _apk_names(serial, unknown)
+    results = device_apk_scan.pull_and_scan(
+        serial, apks, cache=cache, known_bad=known_bad, on_result=on_result
+    ) if apks else []
+
+    flagged = [p for p, d in device_hashes.items() if known_bad is not None and known_bad.contains(d)]
+    for path in flagged:
+        log_manager.log_warning(f"Known-bad APK installed on {serial}: {path}")
+
+    for result in results:
+        expected = device_hashes.get(result["remote_path"])
+        if result["sha256"] and expected and result["sha256"] != expected:
+            result["findings"].append("Pulled file differs from on-device hash")
+
+    log_manager.log_info(
+        f"{len(device_hashes)} APK(s) on {serial}: {len(known)} known locally, {len(results)} pulled"
+    )
+    return {"device_hashes": device_hashes, "known": known, "pulled": results, "known_bad": flagged}
+
+# ─────────────────────────────────────────────
+# MENU ENTRY
+# ─────────────────────────────────────────────
+def run_device_hash_scan(device: dict) -> dict:
+    """Menu action: hash APKs on ``device`` and pull/scan only the unknown ones."""
+    serial = device.get("serial", "")
+    cli_colors.print_info("Hashing third-party APKs on the device...")
+    device_hashes = hash_installed_apks(serial)
+    if not device_hashes:
+        cli_colors.print_warning("No APK hashes returned by the device.")
+        return {"device_hashes": {}, "known": {}, "pulled": [], "known_bad": []}
+
+    known_bad = device_apk_scan.open_known_bad_index()
+    cache = APKHashCache()
+    try:
+        known_hashes = local_known_hashes(cache=cache)
+        unknown = sum(1 for d in device_hashes.values() if d not in known_hashes)
+        cli_colors.print_info(
+            f"{len(device_hashes)} APK(s) hashed; {len(device_hashes) - unknown} already known, "
+            f"pulling {unknown}..."
+        )
+        summary = pull_unknown_apks(
+            serial, device_hashes, known_hashes, cache=cache, known_bad=known_bad,
+            on_result=lambda r: print(f"  {r['package']}: {r['error'] or 'pulled and scanned'}"),
+        )
+    finally:
+        cache.close()
+        if known_bad is not None:
+            known_bad.close()
+
+    for path in summary["known_bad"]:
+        cli_colors.print_error(f"Known-bad APK installed: {path}")
+    if summary["pulled"]:
+        device_apk_scan.render_findings_table(summary["pulled"])
+        report_path = device_apk_scan.export_results_json(serial, summary["pulled"])
+        cli_colors.print_success(f"Report: {report_path}")
+    else:
+        cli_colors.print_success("Every APK on the device is already known locally; nothing pulled.")
+    return summary
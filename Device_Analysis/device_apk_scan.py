@@ -0,0 +1,254 @@
+# device_apk_scan.py
+# Pulls third-party APKs from a device and hashes each one as soon as it lands
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from Utils.app_utils import cli_colors, display_utils
+from Utils.logging_utils import log_manager
+from App_Analysis import apk_hashing
+from App_Analysis.apk_hash_cache import APKHashCache
+from App_Analysis.known_bad_index import KnownBadIndex, INDEX_DIR
+from Device_Analysis import device_inspector_core as core
+from Device_Analysis import device_package_inventory as packages
+
+# ─────────────────────────────────────────────
+# PIPELINE CONFIGURATION
+# ─────────────────────────────────────────────
+PULL_WORKERS = 4        # concurrent `adb pull` transfers per device
+HASH_WORKERS = 2        # APKs hashed while further pulls are in flight
+PULL_TIMEOUT = 300      # seconds allowed per APK transfer
+APK_OUTPUT_DIR = os.path.join("Output", "APKs")
+REPORT_DIR = os.path.join("Output", "Json")
+THIRD_PARTY_COMMAND = "pm list packages -3 -f --show-versioncode"
+
+# ─────────────────────────────────────────────
+# DISCOVERY & TRANSFER
+# ─────────────────────────────────────────────
+def list_third_party_apks(serial: str) -> dict[str, dict]:
+    """
+    Return third-party packages with the on-device path of their base APK.
+
+    Returns:
+        dict: Package name -> {"path", "version_code", "uid"}.
+    """
+    listing = packages.parse_package_list(core.adb_shell_lines(serial, THIRD_PARTY_COMMAND))
+    return {name: info for name, info in listing.items() if info["path"]}
+
+
+def local_apk_path(serial: str, package: str, version_code: str | None,
+                   output_dir: str = APK_OUTPUT_DIR) -> str:
+    """Where a pulled APK is stored: Output/APKs/<serial>/<package>[-<version>].apk."""
+    safe_serial = "".join(c if c.isalnum() or c in "._-" else "_" for c in serial)
+    name = f"{package}-{version_code}.apk" if version_code else f"{package}.apk"
+    return os.path.join(output_dir, safe_serial, name)
+
+
+def pull_apk(serial: str, remote_path: str, local_path: str, timeout: float = PULL_TIMEOUT) -> bool:
+    """
+    Copy one APK off the device with `adb pull`.
+
+    The file is written under a temporary name and renamed when complete,
+    so a partially transferred APK is never hashed.
+    """
+    os.makedirs(os.path.dirname(local_path) or ".", exist_ok=True)
+    partial = local_path + ".part"
+    try:
+        returncode, output = core.adb_pull(serial, remote_path, partial, timeout)
+        if returncode != 0 or not os.path.isfile(partial):
+            log_manager.log_warning(
+                f"adb pull failed for {serial}:{remote_path} (exit {returncode}): {output.strip()}"
+            )
+            return False
+        os.replace(partial, local_path)
+        return True
+    except Exception as e:
+        log_manager.log_exception(f"adb pull failed for {serial}:{remote_path}: {e}")
+        return False
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+
+# ─────────────────────────────────────────────
+# PULL + SCAN PIPELINE
+# ─────────────────────────────────────────────
+def _findings(record: dict) -> list[str]:
+    findings = []
+    if record.get("known_bad"):
+        findings.append("Known-bad SHA-256 match")
+    if record.get("error"):
+        findings.append(f"Unreadable APK: {record['error']}")
+    elif not any(name.endswith("AndroidManifest.xml") for name in record.get("entries", {})):
+        findings.append("No AndroidManifest.xml in archive")
+    return findings
+
+
+def _scan(result: dict, cache, known_bad) -> dict:
+    """Hash one pulled APK into ``result``; a failure goes to ``result["error"]``."""
+    started = time.perf_counter()
+    try:
+        record = apk_hashing.hash_apk_record(result["local_path"], cache=cache, known_bad=known_bad)
+    except Exception as e:
+        log_manager.log_exception(f"Failed to scan {result['local_path']}: {e}")
+        result.update(error=f"Scan failed: {e}", scan_seconds=round(time.perf_counter() - started, 3))
+        return result
+    result.update(
+        record=record,
+        sha256=record["digests"].get("sha256"),
+        dex_files=sum(1 for name in record["entries"] if name.endswith(".dex")),
+        signed_v1=any(name.startswith("META-INF/") for name in record["entries"]),
+        findings=_findings(record),
+        scan_seconds=round(time.perf_counter() - started, 3),
+    )
+    return result
+
+
+@log_manager.log_call("info")
+def pull_and_scan(
+    serial: str,
+    apks: dict[str, dict] | None = None,
+    output_dir: str = APK_OUTPUT_DIR,
+    pull_workers: int = PULL_WORKERS,
+    hash_workers: int = HASH_WORKERS,
+    cache: APKHashCache | None = None,
+    known_bad: KnownBadIndex | None = None,
+    on_result=None,
+) -> list[dict]:
+    """
+    Pull APKs concurrently and hash each one while the rest are still transferring.
+
+    Args:
+        serial (str): Device serial number.
+        apks (dict): Package -> {"path", "version_code", ...}; defaults to
+            list_third_party_apks().
+        output_dir (str): Root directory for pulled APKs.
+        cache (APKHashCache): Optional digest cache for hash_apk_record.
+        known_bad (KnownBadIndex): Optional index checked for every APK.
+        on_result (callable): Called with each result as it completes.
+
+    Returns:
+        list: One dict per package with ``package``, ``version_code``,
+        ``remote_path``, ``local_path``, ``pull_seconds``, ``sha256``,
+        ``dex_files``, ``signed_v1``, ``findings``, ``record`` (the full
+        hash record) and ``error``, sorted by package name.
+    """
+    apks = list_third_party_apks(serial) if apks is None else apks
+    results: list[dict] = []
+    lock = threading.Lock()
+
+    def finished(result: dict) -> None:
+        with lock:
+            results.append(result)
+        if on_result is not None:
+            on_result(result)
+
+    def pull(package: str, info: dict) -> dict:
+        result = {
+            "package": package,
+            "version_code": info.get("version_code"),
+            "remote_path": info["path"],
+            "local_path": local_apk_path(serial, package, info.get("version_code"), output_dir),
+            "sha256": None,
+            "dex_files": 0,
+            "signed_v1": False,
+            "findings": [],
+            "record": None,
+            "error": None,
+        }
+        started = time.perf_counter()
+        if not pull_apk(serial, info["path"], result["local_path"]):
+            result["error"] = "Pull failed"
+        result["pull_seconds"] = round(time.perf_counter() - started, 3)
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, pull_workers)) as pull_pool, \
+            ThreadPoolExecutor(max_workers=max(1, hash_workers)) as hash_pool:
+        pulls = [pull_pool.submit(pull, package, info) for package, info in apks.items()]
+        for future in as_completed(pulls):
+            result = future.result()
+            if result["error"]:
+                finished(result)
+                continue
+            # _scan records its own failures, so every result reaches finished()
+            scan = hash_pool.submit(_scan, result, cache, known_bad)
+            scan.add_done_callback(lambda f: finished(f.result()))
+
+    return sorted(results, key=lambda r: r["package"])
+
+
+def render_findings_table(results: list[dict]) -> None:
+    """Print one row per package with its digest and findings."""
+    if not results:
+        cli_colors.print_warning("No APKs were scanned.")
+        return
+    display_utils.print_spacer()
+    cli_colors.print_banner("APK Scan Findings")
+    header = f"{'Package':<40} {'Version':<10} {'DEX':>3} {'v1':<3} {'SHA-256':<16} Findings"
+    print(cli_colors.bold_green(header))
+    print(cli_colors.green("-" * len(header)))
+    for result in results:
+        package = result["package"] if len(result["package"]) <= 40 else result["package"][:39] + "…"
+        issues = result["findings"] or ([result["error"]] if result["error"] else [])
+        row = (
+            f"{package:<40} {str(result['version_code'] or '-'):<10} {result['dex_files']:>3} "
+            f"{'yes' if result['signed_v1'] else 'no':<3} {(result['sha256'] or '-')[:16]:<16} "
+            f"{'; '.join(issues) or 'None'}"
+        )
+        print(cli_colors.red(row) if issues else cli_colors.cyan(row))
+    display_utils.print_spacer()
+
+
+def export_results_json(serial: str, results: list[dict], directory: str = REPORT_DIR) -> str:
+    """Save pipeline results (including full hash records) as JSON."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"apk_scan_{serial.replace(':', '_')}_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    return path
+
+# ─────────────────────────────────────────────
+# MENU ENTRY
+# ─────────────────────────────────────────────
+def open_known_bad_index() -> KnownBadIndex | None:
+    try:
+        return KnownBadIndex(INDEX_DIR)
+    except (OSError, ValueError):
+        log_manager.log_info("No known-bad index found; skipping known-bad lookups.")
+        return None
+
+
+def run_apk_scan(device: dict) -> list[dict]:
+    """Menu action: pull and scan every third-party APK on ``device``."""
+    serial = device.get("serial", "")
+    cli_colors.print_info("Listing third-party packages...")
+    apks = list_third_party_apks(serial)
+    if not apks:
+        cli_colors.print_warning("No third-party packages found on the device.")
+        return []
+
+    cli_colors.print_info(f"Pulling and scanning {len(apks)} APK(s)...")
+    start = time.perf_counter()
+    known_bad = open_known_bad_index()
+    cache = APKHashCache()
+    try:
+        results = pull_and_scan(
+            serial,
+            apks,
+            cache=cache,
+            known_bad=known_bad,
+            on_result=lambda r: print(
+                f"  {r['package']}: {'pulled and scanned' if not r['error'] else r['error']}"
+            ),
+        )
+    finally:
+        cache.close()
+        if known_bad is not None:
+            known_bad.close()
+
+    render_findings_table(results)
+    report_path = export_results_json(serial, results)
+    elapsed = round(time.perf_counter() - start, 2)
+    cli_colors.print_success(f"Scanned {len(results)} APK(s) in {elapsed}s. Report: {report_path}")
+    return results
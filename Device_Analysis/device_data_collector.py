@@ -1,119 +1,346 @@
 # device_data_collector.py
 # Aggregates and enriches Android device metadata for analysis and summary display
 
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from Device_Analysis import (
+    adb_metrics,
+    adb_transport,
     device_inspector_core as core,
     device_inspector_security as sec,
     device_inspector_network as net,
+    device_package_inventory as packages,
+    device_dumpsys_cache as dumpsys,
+    device_profile_cache as profiles,
 )
+from Utils.app_utils.app_config import ADB_METRICS_PATH
 from Utils.logging_utils import log_manager
 
+BATCH_COMMANDS = (
+    core.BATCH_COMMANDS + sec.BATCH_COMMANDS + net.BATCH_COMMANDS
+    + packages.BATCH_COMMANDS
+)
+
+# Concurrent mode settings
+MAX_WORKERS = 8
+CALL_TIMEOUT = 15  # seconds allowed per inspector call
+
+# ─────────────────────────────────────────────
+# Inspector Field Maps
+# ─────────────────────────────────────────────
+CORE_FIELDS = {
+    "api_level": core.get_api_level,
+    "build_fingerprint": core.get_build_fingerprint,
+    "device_name": core.get_device_name,
+    "uptime": core.get_uptime,
+    "adb_state": core.get_adb_state,
+    "logcat": core.test_logcat_access,
+    "timezone": core.get_timezone,
+    "locale": core.get_locale,
+}
+
+SECURITY_FIELDS = {
+    "shell_access": sec.test_shell_access,
+    "root_status": sec.check_root_status,
+    "usb_debug": sec.get_usb_debug_status,
+    "developer_mode": sec.is_developer_mode_enabled,
+    "play_protect": sec.check_play_protect,
+    "custom_rom": sec.detect_custom_rom,
+    "selinux": sec.get_selinux_status,
+    "bootloader": sec.is_bootloader_unlocked,
+}
+
+NETWORK_FIELDS = {
+    "ip_address": net.get_ip_address,
+    "mac_address": net.get_mac_address,
+    "wifi_status": net.get_wifi_status,
+    "mobile_data": net.get_mobile_data_status,
+    "wifi_ssid": net.get_wifi_ssid,
+    "signal_strength": net.get_signal_strength,
+    "gateway": net.get_default_gateway,
+    "dns_servers": net.get_dns_servers,
+    "network_type": net.get_network_type,
+    "wifi_link_speed": net.get_wifi_link_speed,
+}
+
+# System properties read by each field. On a profile hit the full `getprop`
+# dump is replaced by single-property reads for the fields still collected.
+FIELD_PROPS = {
+    "api_level": ["ro.build.version.sdk"],
+    "build_fingerprint": ["ro.build.fingerprint"],
+    "device_name": ["ro.product.device"],
+    "timezone": ["persist.sys.timezone"],
+    "locale": ["persist.sys.locale", "ro.product.locale"],
+    "custom_rom": ["ro.build.fingerprint"],
+    "bootloader": ["ro.boot.verifiedbootstate"],
+    "dns_servers": ["net.dns1", "net.dns2"],
+    "network_type": ["gsm.network.type"],
+}
+
+
 @log_manager.log_call("info")
-def collect_full_device_info(base_device: dict) -> dict:
+def collect_full_device_info(
+    base_device: dict,
+    concurrent: bool = False,
+    max_workers: int = MAX_WORKERS,
+    call_timeout: float = CALL_TIMEOUT,
+    use_cache: bool = False,
+) -> dict:
     """
     Enriches the base metadata of an Android device with advanced runtime,
     system, security, and network information.
 
     Args:
         base_device (dict): Dictionary with minimal device info (serial, model, brand, etc.)
+        concurrent (bool): Run independent inspector calls in a thread pool.
+        max_workers (int): Pool size in concurrent mode. ADB commands per
+            device are additionally capped by core.MAX_INFLIGHT_PER_DEVICE.
+        call_timeout (float): Seconds to wait for each call in concurrent mode.
+        use_cache (bool): Serve boot-stable fields from the device profile
+            cache when the device has not rebooted since they were saved.
 
     Returns:
         dict: Fully enriched device info dictionary for analysis and reporting.
+        ``collection_stats`` holds ``batch_seconds`` (the prefetch round
+        trip), the wall time, the sequential estimate (the same wall time
+        with the inspector calls' summed time in place of their concurrent
+        span) and ``timed_out`` (calls or fields that hit a timeout);
+        ``cached_fields`` lists fields served from the profile cache.
     """
     serial = base_device.get("serial", "")
+    adb_metrics.label_device(serial, base_device.get("model", ""))
+
+    # All inspector shell commands run as one batched `adb shell`; the
+    # inspectors below then parse their results from memory. Service dumps
+    # are taken afresh once per collection and shared by the inspectors;
+    # the property snapshot is replaced by the batched getprop. The boot ID
+    # is read first on its own, since a profile hit shrinks the batch.
+    dumpsys.invalidate_dumps(serial)
+    core.invalidate_props(serial)
+    start = time.perf_counter()
+    boot_id = profiles.get_boot_id(serial) if use_cache else ""
+    profile = profiles.load_profile(serial, boot_id) if use_cache else None
+    cached = profile["fields"] if profile else {}
+    base = {**base_device, **cached}
+
+    batch_start = time.perf_counter()
+    with core.batched(serial, _batch_commands(cached)):
+        batch_seconds = time.perf_counter() - batch_start
+        calls_start = time.perf_counter()
+        if concurrent:
+            device, timings, timed_out = _collect_concurrent(
+                base, serial, max_workers, call_timeout, skip=cached
+            )
+        else:
+            (device, timings), timed_out = _collect(base, serial, skip=cached), []
+        calls_wall = time.perf_counter() - calls_start
+    wall = time.perf_counter() - start
+
+    device["cached_fields"] = sorted(cached)
+    if profile:
+        device["profile_saved"] = profile["saved"]
+    elif use_cache:
+        profiles.save_profile(serial, boot_id, device)
+
+    device["collection_stats"] = {
+        "mode": "concurrent" if concurrent else "sequential",
+        "batch_seconds": round(batch_seconds, 3),
+        # Both figures include the batch and profile work, which run once either way
+        "wall_seconds": round(wall, 3),
+        "sequential_seconds": round(wall - calls_wall + sum(timings.values()), 3),
+        "calls": len(timings),
+        # Abandoned calls plus fields whose own ADB command timed out
+        "timed_out": sorted(set(timed_out) | {k for k, v in device.items() if v == "Timeout"}),
+    }
+
+    adb_transport.flush()
+    adb_metrics.log_report(serial)
+    if ADB_METRICS_PATH:
+        adb_metrics.dump(ADB_METRICS_PATH)
+    return device
+
+
+def _batch_commands(cached: dict) -> list[str]:
+    """
+    Return the batch for one collection, leaving out what ``cached`` covers.
+
+    Without a profile hit this is the full BATCH_COMMANDS. With one, the
+    `getprop` dump is swapped for the properties of the fields still
+    collected; get_prop() serves those, anything else falls back to a dump.
+    """
+    if not cached:
+        return BATCH_COMMANDS
+    keys = {key for field, props in FIELD_PROPS.items() if field not in cached for key in props}
+    return [command for command in BATCH_COMMANDS if command != "getprop"] + [
+        core.prop_command(key) for key in sorted(keys)
+    ]
+
+
+def _without(function_map: dict, skip) -> dict:
+    return {key: func for key, func in function_map.items() if key not in skip}
+
+
+def _collect(base_device: dict, serial: str, skip=()) -> tuple[dict, dict]:
     device = base_device.copy()
+    timings: dict[str, float] = {}
 
     # ─────────────────────────────────────────────
     # OS & Build Info (Core)
     # ─────────────────────────────────────────────
-    _safe_set(device, {
-        "api_level": core.get_api_level,
-        "build_fingerprint": core.get_build_fingerprint,
-        "device_name": core.get_device_name,
-        "uptime": core.get_uptime,
-        "adb_state": core.get_adb_state,
-        "logcat": core.test_logcat_access,
-        "timezone": core.get_timezone,
-        "locale": core.get_locale,
-    }, serial)
+    _safe_set(device, _without(CORE_FIELDS, skip), serial, timings)
 
     # ─────────────────────────────────────────────
     # Security & Integrity Features
     # ─────────────────────────────────────────────
-    _safe_set(device, {
-        "shell_access": sec.test_shell_access,
-        "root_status": sec.check_root_status,
-        "usb_debug": sec.get_usb_debug_status,
-        "developer_mode": sec.is_developer_mode_enabled,
-        "play_protect": sec.check_play_protect,
-        "custom_rom": sec.detect_custom_rom,
-        "selinux": sec.get_selinux_status,
-        "bootloader": sec.is_bootloader_unlocked,
-    }, serial)
+    _safe_set(device, _without(SECURITY_FIELDS, skip), serial, timings)
 
     # ─────────────────────────────────────────────
     # Networking & Wireless
     # ─────────────────────────────────────────────
-    _safe_set(device, {
-        "ip_address": net.get_ip_address,
-        "mac_address": net.get_mac_address,
-        "wifi_status": net.get_wifi_status,
-        "mobile_data": net.get_mobile_data_status,
-        "wifi_ssid": net.get_wifi_ssid,
-        "signal_strength": net.get_signal_strength,
-        "gateway": net.get_default_gateway,
-        "dns_servers": net.get_dns_servers,
-        "network_type": net.get_network_type,
-        "wifi_link_speed": net.get_wifi_link_speed,
-    }, serial)
+    _safe_set(device, _without(NETWORK_FIELDS, skip), serial, timings)
 
     # ─────────────────────────────────────────────
-    # Installed Apps & Storage
+    # Installed Apps & Storage / Battery
     # ─────────────────────────────────────────────
+    for name, group in (("apps_storage", _apps_and_storage), ("battery", _battery)):
+        started = time.perf_counter()
+        device.update(group(serial))
+        timings[name] = time.perf_counter() - started
+
+    return device, timings
+
+
+def _collect_concurrent(
+    base_device: dict, serial: str, max_workers: int, call_timeout: float, skip=()
+) -> tuple[dict, dict, list]:
+    """
+    Run every inspector call in a bounded pool with per-call timeouts.
+
+    Returns ``(device, timings, timed_out)``, the last listing the calls
+    that were abandoned.
+
+    Each call gets ``call_timeout`` seconds from the moment a worker starts
+    it, so calls queued behind a full pool are not charged for the wait.
+    A call that overruns is abandoned and may start no further ADB
+    commands; neither may any call still running once collection ends.
+    """
+    device = base_device.copy()
+    timings: dict[str, float] = {}
+    field_map = _without({**CORE_FIELDS, **SECURITY_FIELDS, **NETWORK_FIELDS}, skip)
+    groups = {"apps_storage": _apps_and_storage, "battery": _battery}
+    calls = {**field_map, **groups}
+    started: dict[str, float] = {}
+    timed_out: list[str] = []
+    cancels = {key: threading.Event() for key in calls}
+    # The caller's prefetch batch and cancel events, e.g. the fleet's deadline
+    inherited = core.current_scope()
+
+    def timed(key, func):
+        started[key] = time.perf_counter()
+        try:
+            with core.in_scope(inherited), core.cancellable(cancels[key]):
+                return func(serial)
+        finally:
+            timings[key] = time.perf_counter() - started[key]
+
+    def store(key, future):
+        try:
+            value = future.result()
+        except Exception as e:
+            log_manager.log_exception(f"Failed to collect {key}: {e}")
+            value = _GROUP_FALLBACKS[key] if key in groups else "Unknown"
+        if key in groups:
+            device.update(value)
+        else:
+            device[key] = value
+
+    pool = ThreadPoolExecutor(max_workers=max_workers)
     try:
-        device["app_count"] = core.count_installed_apps(serial)
-        device["antivirus_detected"] = sec.check_known_antivirus_apps(serial)
+        pending = {pool.submit(timed, key, func): key for key, func in calls.items()}
+        while pending:
+            deadlines = [started[key] + call_timeout for key in pending.values() if key in started]
+            timeout = max(0.0, min(deadlines) - time.perf_counter()) if deadlines else 0.05
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                store(pending.pop(future), future)
+
+            now = time.perf_counter()
+            for future, key in list(pending.items()):
+                if key in started and now - started[key] >= call_timeout:
+                    pending.pop(future)
+                    cancels[key].set()
+                    timed_out.append(key)
+                    log_manager.log_warning(f"Timed out collecting {key} for {serial}")
+                    if key in groups:
+                        device.update(_GROUP_FALLBACKS[key])
+                    else:
+                        device[key] = "Timeout"
+    finally:
+        # Don't block on calls that overran their deadline, and stop them
+        # from reaching the device once the prefetched batch is gone
+        for event in cancels.values():
+            event.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    return device, dict(timings), timed_out
+
+
+# ─────────────────────────────────────────────
+# Grouped Collectors
+# ─────────────────────────────────────────────
+_GROUP_FALLBACKS = {
+    "apps_storage": {
+        "app_count": "N/A",
+        "antivirus_detected": "Unknown",
+        "storage_mount": "Unknown",
+        "storage_used": "Unknown",
+        "storage_free": "Unknown"
+    },
+    "battery": {
+        "battery_level": "Unknown",
+        "charging": "Unknown",
+        "battery_health": "Unknown",
+        "battery_temp": "Unknown"
+    },
+}
+
+
+def _apps_and_storage(serial: str) -> dict:
+    fields = {}
+    try:
+        fields["app_count"] = core.count_installed_apps(serial)
+        fields["antivirus_detected"] = sec.check_known_antivirus_apps(serial)
 
         storage = core.get_storage_info(serial)
         if isinstance(storage, dict):
-            device["storage_mount"] = storage.get("mount", "Unknown")
-            device["storage_used"] = storage.get("used", "Unknown")
-            device["storage_free"] = storage.get("free", "Unknown")
+            fields["storage_mount"] = storage.get("mount", "Unknown")
+            fields["storage_used"] = storage.get("used", "Unknown")
+            fields["storage_free"] = storage.get("free", "Unknown")
         else:
-            device["raw_storage_info"] = storage
+            fields["raw_storage_info"] = storage
     except Exception:
-        device.update({
-            "app_count": "N/A",
-            "antivirus_detected": "Unknown",
-            "storage_mount": "Unknown",
-            "storage_used": "Unknown",
-            "storage_free": "Unknown"
-        })
+        fields.update(_GROUP_FALLBACKS["apps_storage"])
+    return fields
 
-    # ─────────────────────────────────────────────
-    # Battery / Power
-    # ─────────────────────────────────────────────
+
+def _battery(serial: str) -> dict:
+    fields = {}
     try:
         battery = core.get_battery_status(serial)
         if isinstance(battery, dict):
-            device["battery_level"] = battery.get("level", "Unknown")
-            device["charging"] = battery.get("charging", "Unknown")
-            device["battery_health"] = battery.get("health", "Unknown")
-            device["battery_temp"] = battery.get("temp", "Unknown")
+            fields["battery_level"] = battery.get("level", "Unknown")
+            fields["charging"] = battery.get("charging", "Unknown")
+            fields["battery_health"] = battery.get("health", "Unknown")
+            fields["battery_temp"] = battery.get("temp", "Unknown")
         else:
-            device["raw_battery_info"] = battery
+            fields["raw_battery_info"] = battery
     except Exception:
-        device.update({
-            "battery_level": "Unknown",
-            "charging": "Unknown",
-            "battery_health": "Unknown",
-            "battery_temp": "Unknown"
-        })
-
-    return device
+        fields.update(_GROUP_FALLBACKS["battery"])
+    return fields
 
 
-def _safe_set(device: dict, function_map: dict, serial: str):
+def _safe_set(device: dict, function_map: dict, serial: str, timings: dict | None = None):
     """
     Utility to safely call inspection functions and store results.
 
@@ -121,10 +348,14 @@ def _safe_set(device: dict, function_map: dict, serial: str):
         device (dict): Device info to enrich
         function_map (dict): Keys = property names, values = function references
         serial (str): Device serial for ADB command targeting
+        timings (dict): Optional mapping filled with seconds spent per key
     """
     for key, func in function_map.items():
+        started = time.perf_counter()
         try:
             device[key] = func(serial)
         except Exception as e:
             device[key] = "Unknown"
             log_manager.log_exception(f"Failed to collect {key}: {e}")
+        if timings is not None:
+            timings[key] = time.perf_counter() - started
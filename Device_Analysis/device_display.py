@@ -62,6 +62,58 @@ def render_device_table(device_list: list[dict], title: str = "Connected Android
 
     display_utils.print_spacer()
 
+FLEET_COLUMN_WIDTHS = {
+    "Serial": 17,
+    "Hub": 8,
+    "Status": 7,
+    "Tries": 6,
+    "Latency": 10,
+}
+
+FLEET_COLUMNS = ["Serial", "Hub", "Status", "Tries", "Latency"]
+
+
+def render_fleet_summary(summary: dict) -> None:
+    """
+    Render per-device latency of a fleet collection run.
+
+    Args:
+        summary (dict): Result of device_fleet.collect_fleet()
+    """
+    records = sorted(summary.get("records", []), key=lambda r: r["latency_seconds"])
+    if not records:
+        cli_colors.print_warning("No fleet results to display.")
+        return
+
+    display_utils.print_spacer()
+    cli_colors.print_banner("Fleet Collection Summary")
+
+    header = " ".join(f"{col:<{FLEET_COLUMN_WIDTHS[col]}}" for col in FLEET_COLUMNS)
+    print(cli_colors.bold_green(header))
+    print(cli_colors.green("-" * len(header)))
+
+    for record in records:
+        row_data = {
+            "Serial": _shorten(record["serial"], FLEET_COLUMN_WIDTHS["Serial"]),
+            "Hub": record.get("hub") or "-",
+            "Status": record["status"],
+            "Tries": str(record["attempts"]),
+            "Latency": f"{record['latency_seconds']:.2f}s",
+        }
+        row = " ".join(f"{row_data[col]:<{FLEET_COLUMN_WIDTHS[col]}}" for col in FLEET_COLUMNS)
+        print(cli_colors.cyan(row) if record["status"] == "ok" else cli_colors.red(row))
+
+    display_utils.print_spacer()
+    display_utils.print_key_value("Devices OK", f"{summary['succeeded']}/{len(records)}")
+    display_utils.print_key_value(
+        "Latency (s)",
+        f"min {summary['latency_min']:.2f} / median {summary['latency_median']:.2f} / "
+        f"p95 {summary['latency_p95']:.2f} / max {summary['latency_max']:.2f}",
+    )
+    display_utils.print_key_value("Wall time", f"{summary['wall_seconds']:.2f}s")
+    display_utils.print_key_value("Results", summary["output_path"])
+    display_utils.print_spacer()
+
 # ─────────────────────────────────────────────────────
 # Helper: Model Truncation if Too Long
 # ─────────────────────────────────────────────────────
@@ -0,0 +1,120 @@
+# device_dumpsys_cache.py
+# Runs each dumpsys service once per device and answers grep-style queries from memory
+
+import re
+import threading
+import time
+from Utils.logging_utils import log_manager
+from Device_Analysis import device_inspector_core as core
+
+# ─────────────────────────────────────────────
+# DUMPSYS CONFIGURATION
+# ─────────────────────────────────────────────
+DUMPSYS_TTL = 30.0  # seconds a service dump is trusted
+SERVICES = ["wifi", "telephony.registry"]
+
+# Shell commands issued by this module, prefetched in one batch by the collector
+BATCH_COMMANDS = [f"dumpsys {service}" for service in SERVICES]
+
+# (serial, service) -> (fetched_at, ServiceDump)
+_dumps: dict[tuple[str, str], tuple[float, "ServiceDump"]] = {}
+_locks: dict[tuple[str, str], threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+# ─────────────────────────────────────────────
+# PARSED DUMP
+# ─────────────────────────────────────────────
+class ServiceDump:
+    """
+    A `dumpsys <service>` output split into top-level sections.
+
+    A section starts at every unindented line and runs until the next one;
+    its key is that line without a trailing colon. Repeated headers are
+    merged into one section.
+    """
+
+    def __init__(self, service: str, output: str):
+        self.service = service
+        self.lines = output.replace("\r\n", "\n").splitlines()
+        self.sections: dict[str, list[str]] = {}
+        current = self.sections.setdefault("", [])
+        for line in self.lines:
+            if line and not line[0].isspace():
+                current = self.sections.setdefault(line.strip().rstrip(":"), [])
+            current.append(line)
+
+    def grep(self, pattern: str | re.Pattern, section: str | None = None,
+             max_count: int | None = None) -> list[str]:
+        """
+        Return lines containing ``pattern`` (a substring or compiled regex).
+
+        Args:
+            pattern: Text to look for, like a fixed-string `grep`.
+            section: Limit the search to one section.
+            max_count: Stop after this many matches, like `grep -m`.
+        """
+        lines = self.sections.get(section, []) if section is not None else self.lines
+        if isinstance(pattern, re.Pattern):
+            matches = (line for line in lines if pattern.search(line))
+        else:
+            matches = (line for line in lines if pattern in line)
+        found = []
+        for line in matches:
+            found.append(line)
+            if max_count is not None and len(found) >= max_count:
+                break
+        return found
+
+# ─────────────────────────────────────────────
+# CACHED FETCHER
+# ─────────────────────────────────────────────
+def _lock(key: tuple[str, str]) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(key, threading.Lock())
+
+
+def get_dump(serial: str, service: str, max_age: float = DUMPSYS_TTL,
+             refresh: bool = False) -> ServiceDump | None:
+    """
+    Return the parsed `dumpsys <service>` of a device, fetching it at most
+    once per ``max_age`` seconds.
+
+    Returns:
+        ServiceDump, or None if the dump could not be taken.
+    """
+    key = (serial, service)
+    with _lock(key):
+        entry = _dumps.get(key)
+        if entry and not refresh and time.monotonic() - entry[0] < max_age:
+            return entry[1]
+
+        output = core.adb_shell(serial, f"dumpsys {service}")
+        if output in (core.DEFAULT_VALUE, "Timeout"):
+            log_manager.log_warning(f"dumpsys {service} unavailable for {serial}")
+            return None
+        dump = ServiceDump(service, output)
+        _dumps[key] = (time.monotonic(), dump)
+        return dump
+
+
+def grep(serial: str, service: str, pattern: str | re.Pattern,
+         max_count: int | None = None, section: str | None = None) -> str:
+    """
+    Equivalent of ``dumpsys <service> | grep <pattern>`` served from the cache.
+
+    Returns:
+        str: Matching lines joined by newlines ("" if none), or
+        DEFAULT_VALUE if the dump is unavailable.
+    """
+    dump = get_dump(serial, service)
+    if dump is None:
+        return core.DEFAULT_VALUE
+    return "\n".join(dump.grep(pattern, section=section, max_count=max_count)).strip()
+
+
+def invalidate_dumps(serial: str | None = None) -> None:
+    """Drop cached dumps for ``serial`` (or every device)."""
+    with _locks_guard:
+        for key in list(_dumps):
+            if serial is None or key[0] == serial:
+                _dumps.pop(key, None)
@@ -0,0 +1,327 @@
+# device_extract.py
+# Streams device files through `adb exec-out tar` with incremental re-pulls
+
+import json
+import os
+import re
+import shlex
+import tarfile
+import time
+from Utils.app_utils import cli_colors, display_utils
+from Utils.logging_utils import log_manager
+from Device_Analysis import adb_metrics, adb_transport, device_inspector_core as core
+
+# ─────────────────────────────────────────────
+# EXTRACTION CONFIGURATION
+# ─────────────────────────────────────────────
+DEFAULT_PATHS = ["/sdcard/Download", "/sdcard/Documents", "/sdcard/DCIM", "/sdcard/Pictures"]
+EXTRACT_OUTPUT_DIR = os.path.join("Output", "Extract")
+MANIFEST_NAME = ".manifest.json"
+EXTRACT_TIMEOUT = 3600      # seconds allowed per tar stream
+ARG_BATCH_BYTES = 32 * 1024  # max size of the file list passed to one tar
+PROGRESS_INTERVAL = 0.5     # seconds between progress callbacks
+COPY_CHUNK = 1024 * 1024
+
+# `stat -c '%s %Y %n'`: size, mtime, path
+_STAT_LINE = re.compile(r"^(\d+) (\d+) (/.+)$")
+
+# ─────────────────────────────────────────────
+# REMOTE LISTING & MANIFEST
+# ─────────────────────────────────────────────
+def list_remote_files(serial: str, paths: list[str]) -> dict[str, dict]:
+    """
+    Stat every regular file below ``paths`` on the device in one shell call.
+
+    Returns:
+        dict: Remote path -> {"size", "mtime"}.
+    """
+    quoted = " ".join(shlex.quote(p) for p in paths)
+    command = f"find {quoted} -type f -exec stat -c '%s %Y %n' {{}} + 2>/dev/null"
+    files = {}
+    for line in core.adb_shell_lines(serial, command):
+        match = _STAT_LINE.match(line)
+        if match:
+            files[match.group(3)] = {"size": int(match.group(1)), "mtime": int(match.group(2))}
+    return files
+
+
+def destination_dir(serial: str, output_dir: str = EXTRACT_OUTPUT_DIR) -> str:
+    """Local root for one device: Output/Extract/<serial>."""
+    return os.path.join(output_dir, re.sub(r"[^A-Za-z0-9._-]", "_", serial))
+
+
+def load_manifest(dest: str) -> dict[str, dict]:
+    """Return the remote path -> {"size", "mtime"} map of files already extracted."""
+    path = os.path.join(dest, MANIFEST_NAME)
+    if not os.path.isfile(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("files", {})
+    except (OSError, ValueError) as e:
+        log_manager.log_warning(f"Ignoring unreadable extraction manifest {path}: {e}")
+        return {}
+
+
+def save_manifest(dest: str, files: dict[str, dict]) -> str:
+    os.makedirs(dest, exist_ok=True)
+    path = os.path.join(dest, MANIFEST_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"updated": time.strftime("%Y-%m-%d %H:%M:%S"), "files": files}, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _under(path: str, roots: list[str]) -> bool:
+    """Return True if remote ``path`` is one of ``roots`` or inside one of them."""
+    for root in roots:
+        root = root.rstrip("/")
+        if path == root or path.startswith(root + "/"):
+            return True
+    return False
+
+
+def plan_incremental(remote: dict[str, dict], manifest: dict[str, dict], dest: str,
+                     paths: list[str] | None = None) -> dict:
+    """
+    Compare a remote listing with the manifest.
+
+    A file is fetched again when it is new, its size or mtime changed, or
+    its local copy is missing.
+
+    Args:
+        paths (list): The remote paths that were listed. Only manifest
+            entries under them can count as removed; None means all.
+
+    Returns:
+        dict: ``fetch`` (paths to pull), ``unchanged`` and ``removed``
+        (in the manifest but gone from the device) path lists.
+    """
+    fetch, unchanged = [], []
+    for path, info in sorted(remote.items()):
+        local = _local_path(dest, path)
+        if manifest.get(path) == info and local is not None and os.path.isfile(local):
+            unchanged.append(path)
+        else:
+            fetch.append(path)
+    removed = sorted(
+        path for path in set(manifest) - set(remote) if paths is None or _under(path, paths)
+    )
+    return {"fetch": fetch, "unchanged": unchanged, "removed": removed}
+
+
+def _batches(paths: list[str], limit: int = ARG_BATCH_BYTES) -> list[list[str]]:
+    """Split ``paths`` so each tar command line stays under ``limit`` bytes."""
+    batches, current, size = [], [], 0
+    for path in paths:
+        length = len(shlex.quote(path)) + 1
+        if current and size + length > limit:
+            batches.append(current)
+            current, size = [], 0
+        current.append(path)
+        size += length
+    if current:
+        batches.append(current)
+    return batches
+
+# ─────────────────────────────────────────────
+# TAR STREAM
+# ─────────────────────────────────────────────
+class _ChunkReader:
+    """File-like view over byte chunks that counts bytes for progress reports."""
+
+    def __init__(self, chunks, progress):
+        self._chunks = iter(chunks)
+        self._buffer = b""
+        self._progress = progress
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, b"")
+            if not chunk:
+                break
+            self._buffer += chunk
+            self._progress(len(chunk))
+        if size < 0:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def _local_path(dest: str, name: str) -> str | None:
+    """Map a tar member name into ``dest``; None if it would escape it."""
+    root = os.path.realpath(dest)
+    target = os.path.realpath(os.path.join(root, name.lstrip("/")))
+    return target if target.startswith(root + os.sep) else None
+
+
+def _extract_stream(serial: str, paths: list[str], dest: str, manifest: dict,
+                    stats: dict, progress) -> int:
+    """Extract one `tar -c` stream into ``dest``; returns tar's exit status."""
+    command = "tar -cf - " + " ".join(shlex.quote(p) for p in paths) + " 2>/dev/null"
+    with adb_metrics.track(serial, "exec-out tar") as tracked:
+        chunks, finish = core.open_raw_stream(serial, command, EXTRACT_TIMEOUT)
+        tracked["bytes"] = 0
+
+        def count(size: int) -> None:
+            tracked["bytes"] += size
+            stats["bytes"] += size
+            progress()
+
+        reader = _ChunkReader(chunks, count)
+        try:
+            with tarfile.open(fileobj=reader, mode="r|") as archive:
+                for member in archive:
+                    target = _local_path(dest, member.name)
+                    if target is None:
+                        log_manager.log_warning(f"Skipping unsafe tar entry: {member.name}")
+                        continue
+                    if member.isdir():
+                        os.makedirs(target, exist_ok=True)
+                        continue
+                    if not member.isfile():
+                        continue
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    partial = target + ".part"
+                    with archive.extractfile(member) as src, open(partial, "wb") as out:
+                        while block := src.read(COPY_CHUNK):
+                            out.write(block)
+                    os.replace(partial, target)
+                    os.utime(target, (member.mtime, member.mtime))
+                    manifest["/" + member.name.lstrip("/")] = {"size": member.size, "mtime": int(member.mtime)}
+                    stats["files"] += 1
+                    progress()
+            # Let tar write its end-of-archive padding so it exits cleanly
+            while reader.read(COPY_CHUNK):
+                pass
+        finally:
+            status = finish()
+            tracked["status"] = status
+    return status
+
+# ─────────────────────────────────────────────
+# EXTRACTION
+# ─────────────────────────────────────────────
+@log_manager.log_call("info")
+def extract(
+    serial: str,
+    paths: list[str] | None = None,
+    output_dir: str = EXTRACT_OUTPUT_DIR,
+    incremental: bool = True,
+    on_progress=None,
+) -> dict:
+    """
+    Copy ``paths`` from the device into Output/Extract/<serial>.
+
+    Files travel in one `adb exec-out tar -c` stream (per argument batch)
+    instead of one `adb pull` round trip each, and are unpacked as they
+    arrive. With ``incremental`` the device is listed with `stat` first
+    and only new or changed files are requested. The manifest is saved
+    after every stream, so an interrupted run resumes where it stopped.
+
+    Args:
+        serial (str): Device serial number.
+        paths (list): Remote files or directories; defaults to DEFAULT_PATHS.
+        output_dir (str): Root of the local extraction tree.
+        incremental (bool): Skip files already extracted unchanged.
+        on_progress (callable): Called with a progress dict (``files``,
+            ``bytes``, ``seconds``, ``bytes_per_second``) at most every
+            PROGRESS_INTERVAL seconds.
+
+    Returns:
+        dict: ``destination``, ``manifest_path``, ``files``, ``bytes``,
+        ``seconds``, ``bytes_per_second``, ``skipped``, ``removed``,
+        ``streams`` and ``failed_streams``.
+    """
+    paths = paths or DEFAULT_PATHS
+    dest = destination_dir(serial, output_dir)
+    summary = {"destination": dest, "manifest_path": None, "files": 0, "bytes": 0,
+               "seconds": 0.0, "bytes_per_second": 0.0, "skipped": 0, "removed": 0,
+               "streams": 0, "failed_streams": 0}
+    if adb_transport.replaying():
+        log_manager.log_warning("Data extraction is not available in ADB replay mode.")
+        return summary
+
+    manifest = load_manifest(dest) if incremental else {}
+    if manifest:
+        plan = plan_incremental(list_remote_files(serial, paths), manifest, dest, paths)
+        batches = _batches(plan["fetch"])
+        summary.update(skipped=len(plan["unchanged"]), removed=len(plan["removed"]))
+    else:
+        batches = _batches(paths)  # first run: stream whole directories
+
+    start = time.perf_counter()
+    last_report = [0.0]
+
+    def progress(force: bool = False) -> None:
+        now = time.perf_counter()
+        elapsed = now - start
+        summary["seconds"] = round(elapsed, 3)
+        summary["bytes_per_second"] = round(summary["bytes"] / elapsed, 1) if elapsed else 0.0
+        if on_progress is not None and (force or now - last_report[0] >= PROGRESS_INTERVAL):
+            last_report[0] = now
+            on_progress({key: summary[key] for key in ("files", "bytes", "seconds", "bytes_per_second")})
+
+    os.makedirs(dest, exist_ok=True)
+    try:
+        for batch in batches:
+            summary["streams"] += 1
+            try:
+                status = _extract_stream(serial, batch, dest, manifest, summary, progress)
+                if status not in (0, None):
+                    # tar exits non-zero when some paths were unreadable; the rest still arrived
+                    log_manager.log_warning(f"tar exited with {status} on {serial} ({len(batch)} path(s))")
+            except (tarfile.TarError, OSError, TimeoutError) as e:
+                summary["failed_streams"] += 1
+                log_manager.log_exception(f"Extraction stream failed on {serial}: {e}")
+            summary["manifest_path"] = save_manifest(dest, manifest)
+    finally:
+        progress(force=True)
+        summary["manifest_path"] = save_manifest(dest, manifest)
+
+    log_manager.log_info(
+        f"Extracted {summary['files']} file(s), {summary['bytes']} bytes from {serial} "
+        f"in {summary['seconds']}s ({summary['skipped']} unchanged) -> {dest}"
+    )
+    return summary
+
+# ─────────────────────────────────────────────
+# MENU ENTRY
+# ─────────────────────────────────────────────
+def _format_rate(bytes_per_second: float) -> str:
+    return f"{bytes_per_second / (1024 * 1024):.2f} MB/s"
+
+
+def run_extraction(device: dict) -> dict:
+    """Menu action: prompt for remote paths and extract them from ``device``."""
+    serial = device.get("serial", "")
+    entered = input(cli_colors.cyan(
+        f"Remote paths to pull (space-separated) [{' '.join(DEFAULT_PATHS)}]: "
+    )).strip()
+    paths = shlex.split(entered) if entered else DEFAULT_PATHS
+
+    def show(progress: dict) -> None:
+        print(
+            f"\r  {progress['files']} file(s), {progress['bytes'] / (1024 * 1024):.1f} MB, "
+            f"{_format_rate(progress['bytes_per_second'])}",
+            end="",
+            flush=True,
+        )
+
+    cli_colors.print_info(f"Streaming {len(paths)} path(s) from {serial}...")
+    summary = extract(serial, paths, on_progress=show)
+    print()
+    display_utils.print_spacer()
+    display_utils.print_key_value("Files extracted", str(summary["files"]))
+    display_utils.print_key_value("Unchanged (skipped)", str(summary["skipped"]))
+    display_utils.print_key_value("Removed on device", str(summary["removed"]))
+    display_utils.print_key_value("Transferred", f"{summary['bytes'] / (1024 * 1024):.2f} MB")
+    display_utils.print_key_value("Throughput", _format_rate(summary["bytes_per_second"]))
+    display_utils.print_key_value("Destination", summary["destination"])
+    if summary["failed_streams"]:
+        cli_colors.print_warning(f"{summary['failed_streams']} tar stream(s) failed; re-run to resume.")
+    else:
+        cli_colors.print_success(f"Extraction finished in {summary['seconds']}s.")
+    return summary
@@ -0,0 +1,323 @@
+# device_fleet.py
+# Collects full device info from every attached device under bounded concurrency
+
+import json
+import os
+import statistics
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from Utils.app_utils.app_config import ADB_PATH, ADB_NATIVE_CLIENT, ADB_METRICS_PATH
+from Utils.logging_utils import log_manager
+from Device_Analysis import adb_client, adb_metrics, adb_transport, device_data_collector, device_scanner
+from Device_Analysis import device_watcher
+from Device_Analysis import device_inspector_core as core
+
+# ─────────────────────────────────────────────
+# FLEET CONFIGURATION
+# ─────────────────────────────────────────────
+MAX_PARALLEL = 8        # devices collected at once
+MAX_PER_HUB = 2         # devices collected at once behind one USB hub
+DEVICE_DEADLINE = 45.0  # seconds allowed per collection attempt
+MAX_RETRIES = 2         # extra attempts after a failed collection
+RETRY_BACKOFF = 2.0     # seconds before the first retry, doubled each time
+FLEET_OUTPUT_DIR = os.path.join("Output", "Json")
+
+# ─────────────────────────────────────────────
+# DEVICE DISCOVERY (`adb devices -l`)
+# ─────────────────────────────────────────────
+def parse_device_details(output: str) -> list[dict]:
+    """
+    Parse `adb devices -l` lines such as
+    ``0123456789ABCDEF device usb:1-2.3 product:x model:Pixel_7 transport_id:4``.
+
+    Returns:
+        list: Dicts with ``serial``, ``state`` and every ``key:value`` field.
+    """
+    devices = []
+    for line in output.splitlines():
+        parts = line.split()
+        if len(parts) < 2 or line.startswith(("List of devices", "*")):
+            continue
+        entry = {"serial": parts[0], "state": parts[1]}
+        for field in parts[2:]:
+            key, sep, value = field.partition(":")
+            if sep:
+                entry[key] = value
+        devices.append(entry)
+    return devices
+
+
+def hub_of(usb_path: str | None) -> str | None:
+    """
+    Return the USB hub a device hangs off, from its ``usb:`` port path.
+
+    ``1-2.3`` is port 3 of the hub at ``1-2``; ``1-4`` sits directly on
+    bus 1's root hub. Network and emulator devices have no hub (None).
+    """
+    if not usb_path:
+        return None
+    if "." in usb_path:
+        return usb_path.rsplit(".", 1)[0]
+    return usb_path.split("-", 1)[0]
+
+
+def list_fleet(adb_path: str = ADB_PATH) -> list[dict]:
+    """
+    Return online devices from `adb devices -l`, each tagged with its ``hub``.
+
+    The shared device watcher's latest listing is used when it is running;
+    otherwise the adb server or binary is asked directly.
+    """
+    watcher = device_watcher.get_watcher()
+    output = watcher.listing() if watcher is not None else None
+    client = None
+    if output is None and ADB_NATIVE_CLIENT and not adb_transport.replaying():
+        client = adb_client.get_client()
+    if client is not None:
+        try:
+            output = client.host_command("host:devices-l")
+        except (OSError, adb_client.AdbProtocolError) as e:
+            log_manager.log_warning(f"Native device listing failed, using adb binary: {e}")
+    if output is None:
+        try:
+            with adb_metrics.track("", "devices -l") as tracked:
+                returncode, output = adb_transport.run_adb(["devices", "-l"], adb_path=adb_path)
+                tracked.update(status=returncode, output=output)
+        except Exception as e:
+            log_manager.log_exception(f"Fleet device listing failed: {e}")
+            return []
+
+    fleet = []
+    for entry in parse_device_details(output):
+        if entry["state"] != "device":
+            log_manager.log_warning(f"Skipping {entry['serial']} (state: {entry['state']})")
+            continue
+        entry["hub"] = hub_of(entry.get("usb"))
+        fleet.append(entry)
+    return fleet
+
+# ─────────────────────────────────────────────
+# SCHEDULER
+# ─────────────────────────────────────────────
+class PartialCollection(RuntimeError):
+    """A collection attempt that finished with some calls timed out."""
+
+    def __init__(self, device: dict, timed_out: list[str]):
+        super().__init__(f"timed out: {', '.join(timed_out)}")
+        self.device = device
+
+
+def _collect_one(serial: str, deadline: float, attempt: dict) -> dict:
+    """
+    One collection attempt.
+
+    Marks ``attempt["started"]`` when a worker picks it up and stops issuing
+    ADB commands once ``attempt["cancel"]`` is set.
+
+    Raises:
+        RuntimeError: If the device is unreachable.
+        PartialCollection: If any call timed out; carries the partial device.
+    """
+    attempt["started"] = time.perf_counter()
+    call_timeout = min(device_data_collector.CALL_TIMEOUT, deadline)
+    with core.cancellable(attempt["cancel"]):
+        base = device_scanner.DeviceScanner().probe(serial)
+        # Once abandoned, leave the device's caches to the attempt that replaced this one
+        core.check_cancelled(serial, "collection")
+        device = device_data_collector.collect_full_device_info(
+            base, concurrent=True, call_timeout=call_timeout
+        )
+    if device.get("adb_state") != "device":
+        raise RuntimeError(f"device not reachable (adb state: {device.get('adb_state')})")
+    timed_out = device.get("collection_stats", {}).get("timed_out")
+    if timed_out:
+        raise PartialCollection(device, timed_out)
+    return device
+
+
+@contextmanager
+def _attempt_pool(workers: int):
+    """Thread pool that does not wait on abandoned attempts when closed."""
+    pool = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        yield pool
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+@log_manager.log_call("info")
+def collect_fleet(
+    fleet: list[dict] | None = None,
+    output_path: str | None = None,
+    max_parallel: int = MAX_PARALLEL,
+    max_per_hub: int = MAX_PER_HUB,
+    deadline: float = DEVICE_DEADLINE,
+    retries: int = MAX_RETRIES,
+    backoff: float = RETRY_BACKOFF,
+    on_result=None,
+) -> dict:
+    """
+    Collect full device info from every device in ``fleet`` concurrently.
+
+    At most ``max_parallel`` devices run at once, and at most
+    ``max_per_hub`` behind the same USB hub, so one hub's bandwidth is not
+    saturated while others sit idle. Each attempt gets ``deadline``
+    seconds from the moment a worker starts it; an attempt that overruns
+    is abandoned (it may send no further ADB commands, and keeps its hub
+    slot until its worker exits) and counts as failed, as does one where
+    any call timed out. Failed attempts are retried with exponential
+    backoff. Every finished device is appended
+    to a JSONL file as soon as it completes; a device whose last attempt
+    was partial is recorded with status "partial" and its partial data.
+
+    Args:
+        fleet (list): Entries from list_fleet(); discovered if omitted.
+        output_path (str): JSONL destination. Defaults to a timestamped
+            file under Output/Json.
+        on_result (callable): Optional callback receiving each record.
+
+    Returns:
+        dict: ``records`` (one per device, in completion order),
+        ``output_path``, ``wall_seconds`` and latency statistics.
+    """
+    fleet = list_fleet() if fleet is None else fleet
+    if output_path is None:
+        output_path = os.path.join(FLEET_OUTPUT_DIR, f"fleet_{time.strftime('%Y%m%d_%H%M%S')}.jsonl")
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+
+    pending = deque(
+        {"serial": d["serial"], "hub": d.get("hub"), "attempts": 0, "not_before": 0.0,
+         "first_start": None, "errors": []}
+        for d in fleet
+    )
+    running: dict = {}
+    abandoned: dict = {}  # future -> hub, until the abandoned worker exits
+    hub_load: Counter = Counter()
+    records: list[dict] = []
+    start = time.perf_counter()
+
+    with _attempt_pool(max_parallel) as pool, \
+            open(output_path, "a", encoding="utf-8") as out:
+        while pending or running:
+            now = time.perf_counter()
+
+            # An abandoned attempt holds its hub slot until its worker exits
+            for future in [f for f in abandoned if f.done()]:
+                hub_load[abandoned.pop(future)] -= 1
+
+            # Dispatch every waiting job whose hub and retry delay allow it
+            for job in list(pending):
+                if len(running) + len(abandoned) >= max_parallel:
+                    break
+                if job["not_before"] > now:
+                    continue
+                if job["hub"] is not None and hub_load[job["hub"]] >= max_per_hub:
+                    continue
+                pending.remove(job)
+                hub_load[job["hub"]] += 1
+                job["attempts"] += 1
+                job["attempt"] = {"started": None, "cancel": threading.Event()}
+                if job["first_start"] is None:
+                    job["first_start"] = now
+                running[pool.submit(_collect_one, job["serial"], deadline, job["attempt"])] = job
+
+            next_retry = min((j["not_before"] for j in pending), default=now + 1.0)
+            next_deadline = min(
+                (j["attempt"]["started"] + deadline for j in running.values() if j["attempt"]["started"]),
+                default=next_retry,
+            )
+            timeout = max(0.05, min(1.0, next_retry - now, next_deadline - now))
+            if not running and not abandoned:
+                time.sleep(timeout)
+                continue
+
+            done, _ = wait([*running, *abandoned], timeout=timeout, return_when=FIRST_COMPLETED)
+            finished = time.perf_counter()
+            outcomes = []
+            for future in done:
+                if future not in running:
+                    continue
+                job = running.pop(future)
+                hub_load[job["hub"]] -= 1
+                try:
+                    outcomes.append((job, future.result(), None))
+                except PartialCollection as e:
+                    outcomes.append((job, e.device, str(e)))
+                except Exception as e:
+                    outcomes.append((job, None, str(e)))
+
+            # Abandon attempts past their deadline; their workers stop at the next command
+            for future, job in list(running.items()):
+                started = job["attempt"]["started"]
+                if started is not None and finished - started > deadline:
+                    running.pop(future)
+                    abandoned[future] = job["hub"]
+                    job["attempt"]["cancel"].set()
+                    outcomes.append((job, None, f"deadline of {deadline}s exceeded"))
+
+            for job, device, error in outcomes:
+                if error and job["attempts"] <= retries:
+                    delay = backoff * 2 ** (job["attempts"] - 1)
+                    job["errors"].append(error)
+                    job["not_before"] = finished + delay
+                    pending.append(job)
+                    log_manager.log_warning(
+                        f"Fleet collection failed for {job['serial']} "
+                        f"(attempt {job['attempts']}), retrying in {delay:.1f}s: {error}"
+                    )
+                    continue
+
+                record = {
+                    "serial": job["serial"],
+                    "hub": job["hub"],
+                    "status": "ok" if error is None else "partial" if device else "failed",
+                    "attempts": job["attempts"],
+                    "latency_seconds": round(finished - job["first_start"], 3),
+                    "last_attempt_seconds": round(finished - (job["attempt"]["started"] or finished), 3),
+                    "errors": job["errors"] + ([error] if error else []),
+                    "device": device,
+                }
+                out.write(json.dumps(record, default=str) + "\n")
+                out.flush()
+                records.append(record)
+                if on_result is not None:
+                    on_result(record)
+
+    summary = {
+        "records": records,
+        "output_path": output_path,
+        "wall_seconds": round(time.perf_counter() - start, 3),
+        **latency_stats(records),
+    }
+    log_manager.log_info(
+        f"Fleet collection finished: {summary['succeeded']}/{len(records)} devices "
+        f"in {summary['wall_seconds']}s -> {output_path}"
+    )
+    adb_metrics.log_report()
+    if ADB_METRICS_PATH:
+        adb_metrics.dump(ADB_METRICS_PATH)
+    return summary
+
+
+def latency_stats(records: list[dict]) -> dict:
+    """Summarise per-device latency of fleet records."""
+    latencies = sorted(r["latency_seconds"] for r in records)
+    stats = {
+        "succeeded": sum(1 for r in records if r["status"] == "ok"),
+        "failed": sum(1 for r in records if r["status"] != "ok"),
+        "latency_min": None,
+        "latency_median": None,
+        "latency_p95": None,
+        "latency_max": None,
+    }
+    if latencies:
+        stats.update(
+            latency_min=latencies[0],
+            latency_median=round(statistics.median(latencies), 3),
+            latency_p95=latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))],
+            latency_max=latencies[-1],
+        )
+    return stats
@@ -1,18 +1,171 @@
 # device_inspector_core.py
 # Provides core ADB command execution and essential device information access
 
+import re
+import secrets
 import subprocess
-from Utils.app_utils.app_config import ADB_PATH
+import threading
+import time
+from contextlib import contextmanager
+from Utils.app_utils.app_config import ADB_PATH, ADB_NATIVE_CLIENT
 from Utils.logging_utils import log_manager
+from Device_Analysis import adb_client, adb_metrics, adb_transport, device_watcher
 
 # ─────────────────────────────────────────────
 # ADB CONFIGURATION (Cross-Platform)
 # ─────────────────────────────────────────────
 DEFAULT_VALUE = "Unknown"
+BATCH_TIMEOUT = 30
+STREAM_TIMEOUT = 120  # seconds a streamed command may run
+STREAM_CHUNK = 65536
+PROP_TTL = 60.0  # seconds a getprop snapshot is trusted
+MAX_INFLIGHT_PER_DEVICE = 4  # concurrent ADB commands allowed per device
+
+# Shell commands issued by this module, prefetched in one batch by the collector
+BATCH_COMMANDS = [
+    "getprop",
+    "cat /proc/uptime",
+    "logcat -d -t 1",
+    "dumpsys battery",
+    "df /data",
+]
+
+# (serial, batch token) -> {command: output} served by adb_shell while a
+# batch is active. The token is per batched() block and visible only to its
+# thread and the workers it hands its scope to, so an abandoned collection
+# cannot read or clear a later attempt's results.
+_prefetched: dict[tuple[str, object], dict[str, str]] = {}
+_prefetch_lock = threading.Lock()
+
+# serial -> semaphore bounding in-flight commands so adbd isn't overloaded
+_inflight: dict[str, threading.BoundedSemaphore] = {}
+_inflight_guard = threading.Lock()
+
+# serial -> (fetched_at, {property: value}) from a single `getprop` dump
+_prop_snapshots: dict[str, tuple[float, dict[str, str]]] = {}
+_prop_locks: dict[str, threading.Lock] = {}
+_prop_locks_guard = threading.Lock()
+_GETPROP_LINE = re.compile(r"^\[([^\]]+)\]: \[(.*)\]$")
+
+# Per-thread scope: ``events`` (once one is set the thread may start no new
+# ADB command) and ``batch`` (the token of the active prefetch batch)
+_cancel_scope = threading.local()
+
+
+class CommandCancelled(RuntimeError):
+    """Raised instead of starting an ADB command its caller has abandoned."""
+
+# ─────────────────────────────────────────────
+# CANCELLATION
+# ─────────────────────────────────────────────
+@contextmanager
+def cancellable(*events: threading.Event):
+    """
+    Refuse new ADB commands from this thread once any of ``events`` is set.
+
+    Lets a caller that stops waiting on a worker (e.g. after a timeout)
+    keep it from sending further commands; the command already running
+    finishes or times out on its own. Scopes nest.
+    """
+    previous = getattr(_cancel_scope, "events", ())
+    _cancel_scope.events = previous + tuple(e for e in events if e is not None)
+    try:
+        yield
+    finally:
+        _cancel_scope.events = previous
+
+
+def cancel_events() -> tuple:
+    """Return the events governing this thread, to pass on to its worker threads."""
+    return getattr(_cancel_scope, "events", ())
+
+
+def current_scope() -> tuple:
+    """Return this thread's cancel events and prefetch batch, for in_scope()."""
+    return cancel_events(), getattr(_cancel_scope, "batch", None)
+
+
+@contextmanager
+def in_scope(scope: tuple):
+    """Run a worker thread under a scope taken with current_scope()."""
+    events, batch = scope
+    previous = getattr(_cancel_scope, "batch", None)
+    _cancel_scope.batch = batch
+    try:
+        with cancellable(*events):
+            yield
+    finally:
+        _cancel_scope.batch = previous
+
+
+def check_cancelled(serial: str, command: str) -> None:
+    """
+    Raise CommandCancelled if this thread's caller has abandoned it.
+
+    Raises:
+        CommandCancelled: If any of the thread's cancel events is set.
+    """
+    if any(event.is_set() for event in cancel_events()):
+        raise CommandCancelled(f"Cancelled before running on {serial}: {command}")
 
 # ─────────────────────────────────────────────
 # UTILITY: Execute ADB shell command
 # ─────────────────────────────────────────────
+def _inflight_slot(serial: str) -> threading.BoundedSemaphore:
+    with _inflight_guard:
+        if serial not in _inflight:
+            _inflight[serial] = threading.BoundedSemaphore(MAX_INFLIGHT_PER_DEVICE)
+        return _inflight[serial]
+
+
+def _exec_shell(serial: str, command: str, timeout: float, label: str | None = None) -> tuple[int, str]:
+    """
+    Run ``command`` and return ``(exit_status, stdout)``.
+
+    Uses the native adb server client when a server is reachable, and
+    falls back to forking the adb executable otherwise. At most
+    MAX_INFLIGHT_PER_DEVICE commands run against one device at a time.
+    Each call is recorded in adb_metrics under ``label`` (default: the
+    command itself). Unlabelled commands are also saved or served by
+    adb_transport in record/replay mode.
+
+    Raises:
+        subprocess.TimeoutExpired / TimeoutError: If the command times out.
+        CommandCancelled: If the calling thread's cancellable() scope is set.
+    """
+    check_cancelled(serial, label or command)
+    with _inflight_slot(serial), adb_metrics.track(serial, label or command) as result:
+        if adb_transport.replaying():
+            result["status"], result["output"] = adb_transport.replay(serial, command)
+        else:
+            started = time.perf_counter()
+            result["status"], result["output"] = _exec_shell_unbounded(serial, command, timeout)
+            if label is None:
+                adb_transport.record(
+                    serial, command, result["status"], result["output"], time.perf_counter() - started
+                )
+        return result["status"], result["output"]
+
+
+def _exec_shell_unbounded(serial: str, command: str, timeout: float) -> tuple[int, str]:
+    client = adb_client.get_client() if ADB_NATIVE_CLIENT else None
+    if client is not None:
+        try:
+            return client.shell(serial, command, timeout=timeout)
+        except TimeoutError:
+            raise
+        except (OSError, adb_client.AdbProtocolError) as e:
+            log_manager.log_warning(f"Native ADB client failed for {serial}, using adb binary: {e}")
+
+    result = subprocess.run(
+        [ADB_PATH, "-s", serial, "shell", command],
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+    )
+    return result.returncode, result.stdout or ""
+
+
 def adb_shell(serial: str, command: str) -> str:
     """
     Execute an ADB shell command on the specified device.
@@ -24,49 +177,537 @@ def adb_shell(serial: str, command: str) -> str:
     Returns:
         str: Output of the command or DEFAULT_VALUE on failure.
     """
+    cached = _prefetched_result(serial, command)
+    if cached is not None:
+        return cached
     try:
-        result = subprocess.run(
-            [ADB_PATH, "-s", serial, "shell", command],
-            capture_output=True,
-            text=True,
-            timeout=6,
-        )
-        if result.returncode != 0:
+        returncode, stdout = _exec_shell(serial, command, timeout=6)
+        if returncode != 0:
             log_manager.log_warning(
-                f"ADB shell returned code {result.returncode} for {serial}: {command}"
+                f"ADB shell returned code {returncode} for {serial}: {command}"
             )
-        return result.stdout.strip() if result.returncode == 0 else DEFAULT_VALUE
-    except subprocess.TimeoutExpired:
+        return stdout.strip() if returncode == 0 else DEFAULT_VALUE
+    except (subprocess.TimeoutExpired, TimeoutError):
         log_manager.log_exception(f"ADB shell timeout for {serial}: {command}")
         return "Timeout"
+    except CommandCancelled:
+        return DEFAULT_VALUE
     except Exception as e:
         log_manager.log_exception(f"ADB shell failed for {serial}: {e}")
         return DEFAULT_VALUE
 
+# ─────────────────────────────────────────────
+# STREAMED SHELL EXECUTION
+# ─────────────────────────────────────────────
+def _open_native_stream(client, serial: str, command: str, timeout: float):
+    conn = client.open_device_service(serial, f"exec:{command}")
+    conn.settimeout(timeout)
+    deadline = time.monotonic() + timeout
+
+    def chunks():
+        for chunk in conn.iter_chunks():
+            yield chunk
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"stream exceeded {timeout}s")
+
+    def finish() -> None:
+        conn.close()
+        return None  # exec: carries no exit status
+
+    return chunks(), finish
+
+
+def _open_process_stream(serial: str, command: str, timeout: float, service: str = "shell"):
+    proc = subprocess.Popen(
+        [ADB_PATH, "-s", serial, service, command],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    expired = threading.Event()
+
+    def kill_on_timeout():
+        expired.set()
+        proc.kill()
+
+    watchdog = threading.Timer(timeout, kill_on_timeout)
+    watchdog.daemon = True
+    watchdog.start()
+
+    def chunks():
+        yield from iter(lambda: proc.stdout.read1(STREAM_CHUNK), b"")
+        if expired.is_set():
+            raise TimeoutError(f"stream exceeded {timeout}s")
+
+    def finish() -> int:
+        watchdog.cancel()
+        if proc.poll() is None:
+            proc.kill()
+        proc.stdout.close()
+        return proc.wait()
+
+    return chunks(), finish
+
+
+def _open_stream(serial: str, command: str, timeout: float, service: str = "shell"):
+    """
+    Return ``(byte_chunks, finish)``; ``finish()`` cleans up and returns the
+    exit status, or None when it is unknown (native ``exec:`` streams).
+    """
+    client = adb_client.get_client() if ADB_NATIVE_CLIENT else None
+    if client is not None:
+        try:
+            return _open_native_stream(client, serial, command, timeout)
+        except (OSError, adb_client.AdbProtocolError) as e:
+            log_manager.log_warning(f"Native ADB stream failed for {serial}, using adb binary: {e}")
+    return _open_process_stream(serial, command, timeout, service)
+
+
+def open_raw_stream(serial: str, command: str, timeout: float = STREAM_TIMEOUT):
+    """
+    Run ``command`` on the device and return its stdout as raw byte chunks.
+
+    Uses ``exec:`` / ``adb exec-out`` so binary output (e.g. a tar stream)
+    passes through unmodified. The caller must call ``finish()`` when done;
+    it stops the command if still running and returns its exit status, or
+    None when the native client was used (``exec:`` reports no status).
+
+    Returns:
+        tuple: ``(byte_chunks, finish)``.
+    """
+    return _open_stream(serial, command, timeout, service="exec-out")
+
+
+def _decode_lines(chunks, max_bytes: int | None, counter: dict):
+    """Split byte chunks into decoded lines, stopping after ``max_bytes``."""
+    pending = b""
+    counter["bytes"] = 0
+    for chunk in chunks:
+        truncated = max_bytes is not None and counter["bytes"] + len(chunk) > max_bytes
+        if truncated:
+            chunk = chunk[:max_bytes - counter["bytes"]]
+        counter["bytes"] += len(chunk)
+        *lines, pending = (pending + chunk).split(b"\n")
+        for line in lines:
+            yield line.rstrip(b"\r").decode("utf-8", "replace")
+        if truncated:
+            counter["truncated"] = True
+            return  # drop the partial last line
+    if pending:
+        yield pending.rstrip(b"\r").decode("utf-8", "replace")
+
+
+def adb_shell_lines(serial: str, command: str, max_bytes: int | None = None,
+                    timeout: float = STREAM_TIMEOUT):
+    """
+    Execute an ADB shell command and yield its output line by line.
+
+    Output is decoded as it arrives instead of being buffered whole, so
+    parsers of large outputs (package lists, dumpsys, logcat) run in
+    constant memory. Prefetched results are served from memory.
+
+    Args:
+        serial (str): Device serial number.
+        command (str): ADB shell command to run.
+        max_bytes (int): Stop reading after this many bytes of output.
+        timeout (float): Seconds the whole stream may take.
+
+    Yields:
+        str: Output lines without line terminators. A failed or timed-out
+        command simply stops yielding; the failure is logged. A cancelled
+        one (see cancellable) yields nothing.
+    """
+    cached = _prefetched_result(serial, command)
+    if cached is not None:
+        if cached not in (DEFAULT_VALUE, "Timeout"):
+            yield from cached.splitlines()
+        return
+
+    if adb_transport.replaying():
+        try:
+            returncode, stdout = _exec_shell(serial, command, timeout)
+        except CommandCancelled:
+            return
+        if returncode == 0:
+            yield from stdout.splitlines()
+        return
+
+    if any(event.is_set() for event in cancel_events()):
+        return
+
+    # Recording needs the full output; every other mode keeps nothing
+    captured = [] if adb_transport.mode() == adb_transport.RECORD else None
+    # A trailing marker line carries the exit status, which `exec:` streams lack
+    marker = f"__STONEHAVEN_RC_{secrets.token_hex(4)}:"
+    started = time.perf_counter()
+    # Acquired explicitly so close() or garbage collection of an abandoned
+    # generator always gives the slot back through the finally below
+    slot = _inflight_slot(serial)
+    slot.acquire()
+    try:
+        with adb_metrics.track(serial, command) as result:
+            finish = None
+            status = None
+            try:
+                chunks, finish = _open_stream(serial, f"{command}\necho {marker}$?", timeout)
+                for line in _decode_lines(chunks, max_bytes, result):
+                    if marker in line:
+                        line, _, code = line.partition(marker)
+                        status = int(code) if code.isdigit() else None
+                        if not line:
+                            continue
+                    if captured is not None:
+                        captured.append(line)
+                    yield line
+            except GeneratorExit:
+                result["truncated"] = True  # consumer stopped early; not a command failure
+                raise
+            except (subprocess.TimeoutExpired, TimeoutError):
+                result["status"] = "timeout"
+                log_manager.log_exception(f"ADB stream timeout for {serial}: {command}")
+                return
+            except Exception as e:
+                result["status"] = "error"
+                log_manager.log_exception(f"ADB stream failed for {serial}: {e}")
+                return
+            finally:
+                if finish is not None:
+                    returncode = finish()
+                    if result["status"] == 0 and not result.get("truncated"):
+                        # None (unknown) when the marker never arrived on an exec: stream
+                        result["status"] = returncode if status is None else status
+
+            if result.get("truncated"):
+                log_manager.log_warning(
+                    f"ADB stream for {serial} truncated at {max_bytes} bytes: {command}"
+                )
+            elif result["status"] not in (0, None):
+                log_manager.log_warning(
+                    f"ADB shell returned code {result['status']} for {serial}: {command}"
+                )
+            elif captured is not None and result["status"] == 0:
+                adb_transport.record(
+                    serial, command, 0, "\n".join(captured), time.perf_counter() - started
+                )
+    finally:
+        slot.release()
+
+# ─────────────────────────────────────────────
+# FILE TRANSFER
+# ─────────────────────────────────────────────
+def adb_pull(serial: str, remote_path: str, local_path: str,
+             timeout: float = STREAM_TIMEOUT) -> tuple[int, str]:
+    """
+    Copy ``remote_path`` off the device with `adb pull`.
+
+    Runs through adb_transport and counts against MAX_INFLIGHT_PER_DEVICE
+    like any shell command. Fixtures hold no file contents, so in replay
+    mode nothing is pulled and MISSING_STATUS is returned.
+
+    Returns:
+        tuple: ``(exit_status, output)``.
+
+    Raises:
+        subprocess.TimeoutExpired: If the transfer times out.
+        CommandCancelled: If the calling thread's cancellable() scope is set.
+    """
+    if adb_transport.replaying():
+        log_manager.log_warning(f"adb pull is not available in ADB replay mode: {remote_path}")
+        return adb_transport.MISSING_STATUS, ""
+    check_cancelled(serial, "pull")
+    with _inflight_slot(serial), adb_metrics.track(serial, "pull") as result:
+        result["status"], result["output"] = adb_transport.run_adb(
+            ["pull", remote_path, local_path], serial=serial, timeout=timeout
+        )
+        return result["status"], result["output"]
+
+# ─────────────────────────────────────────────
+# BATCHED SHELL EXECUTION
+# ─────────────────────────────────────────────
+def _build_batch_script(commands: list[str], marker: str) -> str:
+    # Markers carry the device uptime read with the `read` builtin, so timing
+    # each command costs no extra process (resolution: 10 ms)
+    lines = []
+    for idx, command in enumerate(commands):
+        lines.append(f'read __t __ </proc/uptime; echo "{marker}:{idx}:BEGIN:$__t"')
+        lines.append(f"( {command} ) </dev/null 2>/dev/null")
+        lines.append(f'__s=$?; read __t __ </proc/uptime; echo "{marker}:{idx}:END:$__s:$__t"')
+    return "\n".join(lines)
+
+
+def _split_batch_output(output: str, commands: list[str], marker: str) -> dict[str, tuple[int, str, float | None]]:
+    """
+    Split batch output back per command.
+
+    Returns:
+        dict: Command -> ``(exit_status, stripped_stdout, seconds)``;
+        ``seconds`` is None when the markers carried no usable timestamps.
+    """
+    pattern = re.compile(
+        rf"{marker}:(\d+):BEGIN:([\d.]*)\n(.*?){marker}:\1:END:(\d+):([\d.]*)", re.DOTALL
+    )
+    results: dict[str, tuple[int, str, float | None]] = {}
+    for match in pattern.finditer(output.replace("\r\n", "\n")):
+        idx, body, code = int(match.group(1)), match.group(3), int(match.group(4))
+        try:
+            seconds = max(0.0, float(match.group(5)) - float(match.group(2)))
+        except ValueError:
+            seconds = None
+        if idx < len(commands):
+            results[commands[idx]] = (code, body.strip(), seconds)
+    return results
+
+
+def adb_shell_batch(serial: str, commands: list[str]) -> dict[str, str]:
+    """
+    Run many shell commands over a single `adb shell` invocation.
+
+    Commands are wrapped in a delimited script and the combined output is
+    split back per command. Each result follows adb_shell semantics: the
+    stripped stdout, or DEFAULT_VALUE when the command exits non-zero.
+    adb_metrics gets the whole batch under its label plus one sample per
+    command timed on the device.
+
+    Args:
+        serial (str): Device serial number.
+        commands (list): Shell commands to execute.
+
+    Returns:
+        dict: Command -> output. Commands whose output could not be
+        recovered (e.g. the batch timed out) are omitted.
+    """
+    unique = list(dict.fromkeys(commands))
+    if not unique:
+        return {}
+    if adb_transport.replaying():
+        # Fixtures hold individual commands, never the marker-delimited script
+        results = {}
+        for command in unique:
+            try:
+                returncode, stdout = _exec_shell(serial, command, timeout=BATCH_TIMEOUT)
+            except CommandCancelled:
+                break
+            results[command] = stdout.strip() if returncode == 0 else DEFAULT_VALUE
+        return results
+
+    marker = f"__STONEHAVEN_{secrets.token_hex(4)}"
+    script = _build_batch_script(unique, marker)
+    started = time.perf_counter()
+    try:
+        _returncode, stdout = _exec_shell(
+            serial, script, timeout=BATCH_TIMEOUT, label=f"batch ({len(unique)} commands)"
+        )
+    except (subprocess.TimeoutExpired, TimeoutError):
+        log_manager.log_exception(f"ADB batch timeout for {serial} ({len(unique)} commands)")
+        return {}
+    except CommandCancelled:
+        return {}
+    except Exception as e:
+        log_manager.log_exception(f"ADB batch failed for {serial}: {e}")
+        return {}
+
+    # The batch row above is the total; each command also gets its own sample
+    share = (time.perf_counter() - started) / len(unique)
+    results = {}
+    for command, (code, output, seconds) in _split_batch_output(stdout, unique, marker).items():
+        seconds = share if seconds is None else seconds
+        adb_metrics.record(command, serial, seconds, len(output.encode("utf-8", "replace")), code)
+        adb_transport.record(serial, command, code, output if code == 0 else "", seconds)
+        results[command] = output if code == 0 else DEFAULT_VALUE
+    if len(results) < len(unique):
+        log_manager.log_warning(
+            f"ADB batch for {serial} returned {len(results)}/{len(unique)} results"
+        )
+    return results
+
+
+def prefetch(serial: str, commands: list[str]) -> dict[str, str]:
+    """
+    Run ``commands`` as one batch and serve them from adb_shell afterwards.
+
+    A batched ``getprop`` also replaces the device's property snapshot, so
+    get_prop() reads the same dump instead of an older or a second one.
+    """
+    results = adb_shell_batch(serial, commands)
+    with _prefetch_lock:
+        _prefetched.setdefault((serial, getattr(_cancel_scope, "batch", None)), {}).update(results)
+    props = parse_getprop(results.get("getprop", ""))
+    if props:
+        with _prop_lock(serial):
+            _prop_snapshots[serial] = (time.monotonic(), props)
+    return results
+
+
+def _prefetched_result(serial: str, command: str) -> str | None:
+    batch = _prefetched.get((serial, getattr(_cancel_scope, "batch", None)), {})
+    return batch.get(command)
+
+
+def clear_prefetch(serial: str | None = None) -> None:
+    """Forget every prefetched batch of ``serial`` (or every device)."""
+    with _prefetch_lock:
+        for key in list(_prefetched):
+            if serial is None or key[0] == serial:
+                _prefetched.pop(key, None)
+
+
+@contextmanager
+def batched(serial: str, commands: list[str]):
+    """
+    Prefetch ``commands`` for the duration of a ``with`` block.
+
+    The results are served to this thread and to workers started under its
+    current_scope(); leaving the block forgets only this batch.
+    """
+    previous = getattr(_cancel_scope, "batch", None)
+    token = _cancel_scope.batch = object()
+    try:
+        prefetch(serial, commands)
+        yield
+    finally:
+        _cancel_scope.batch = previous
+        with _prefetch_lock:
+            _prefetched.pop((serial, token), None)
+
+# ─────────────────────────────────────────────
+# PROPERTY SNAPSHOT (single getprop dump)
+# ─────────────────────────────────────────────
+def parse_getprop(output: str) -> dict[str, str]:
+    """Parse `getprop` output lines of the form ``[key]: [value]``."""
+    props: dict[str, str] = {}
+    for line in output.splitlines():
+        match = _GETPROP_LINE.match(line.strip())
+        if match:
+            props[match.group(1)] = match.group(2)
+    return props
+
+
+def _prop_lock(serial: str) -> threading.Lock:
+    with _prop_locks_guard:
+        return _prop_locks.setdefault(serial, threading.Lock())
+
+
+def get_prop_snapshot(serial: str, max_age: float = PROP_TTL, refresh: bool = False) -> dict[str, str]:
+    """
+    Return every system property of a device from one cached `getprop` dump.
+
+    Args:
+        serial (str): Device serial number.
+        max_age (float): Seconds before a snapshot is re-fetched.
+        refresh (bool): Force a new dump regardless of age.
+
+    Returns:
+        dict: Property -> value. Empty if the dump failed.
+    """
+    with _prop_lock(serial):
+        entry = _prop_snapshots.get(serial)
+        if entry and not refresh and time.monotonic() - entry[0] < max_age:
+            return entry[1]
+
+        output = adb_shell(serial, "getprop")
+        props = parse_getprop(output) if output not in (DEFAULT_VALUE, "Timeout") else {}
+        if props:
+            _prop_snapshots[serial] = (time.monotonic(), props)
+        else:
+            log_manager.log_warning(f"getprop snapshot unavailable for {serial}")
+        return props
+
+
+def refresh_props(serial: str) -> dict[str, str]:
+    """Force a new property snapshot for ``serial``."""
+    return get_prop_snapshot(serial, refresh=True)
+
+
+def invalidate_props(serial: str | None = None) -> None:
+    """Drop the cached snapshot for ``serial`` (or every device)."""
+    with _prop_locks_guard:
+        if serial is None:
+            _prop_snapshots.clear()
+        else:
+            _prop_snapshots.pop(serial, None)
+
+
+def prop_command(key: str) -> str:
+    """Return the shell command that reads the single property ``key``."""
+    return f"getprop {key}"
+
+
+def get_prop(serial: str, key: str) -> str:
+    """
+    Look up a single property from the device snapshot.
+
+    A batched ``getprop <key>`` (see prop_command) is served first, so a
+    collection that only needs a few properties can skip the full dump.
+
+    Returns:
+        str: The value, "" if the property is unset (as `getprop` does), or
+        DEFAULT_VALUE when no snapshot could be taken.
+    """
+    value = _prefetched_result(serial, prop_command(key))
+    if value is not None and value not in (DEFAULT_VALUE, "Timeout"):
+        return value
+    props = get_prop_snapshot(serial)
+    if not props:
+        return DEFAULT_VALUE
+    return props.get(key, "")
+
 # ─────────────────────────────────────────────
 # CORE DEVICE INFORMATION
 # ─────────────────────────────────────────────
+def _native_state(serial: str) -> str | None:
+    """
+    Return the state of ``serial`` without forking adb, or None if unavailable.
+
+    The shared device watcher's registry is used when it is running,
+    otherwise the adb server's ``host-serial:<serial>:get-state``. A device
+    neither knows about is reported as "" like `adb get-state` does.
+    """
+    if adb_transport.replaying():
+        return None
+    watcher = device_watcher.get_watcher()
+    if watcher is not None:
+        return watcher.devices().get(serial, "")
+    client = adb_client.get_client() if ADB_NATIVE_CLIENT else None
+    if client is None:
+        return None
+    try:
+        return client.get_state(serial)
+    except adb_client.AdbProtocolError:
+        return ""
+    except OSError as e:
+        log_manager.log_warning(f"Native get-state failed for {serial}, using adb binary: {e}")
+        return None
+
+
 def get_adb_state(serial: str) -> str:
     try:
-        result = subprocess.run(
-            [ADB_PATH, "-s", serial, "get-state"],
-            capture_output=True,
-            text=True,
-            timeout=4
-        )
-        return result.stdout.strip() or DEFAULT_VALUE
+        check_cancelled(serial, "get-state")
+        with adb_metrics.track(serial, "get-state") as tracked:
+            started = time.perf_counter()
+            stdout = _native_state(serial)
+            if stdout is not None:
+                returncode = 0 if stdout else 1
+                # Saved under the binary's key so a replay serves it the same way
+                adb_transport.record(
+                    serial, "adb get-state", returncode, stdout, time.perf_counter() - started
+                )
+            else:
+                returncode, stdout = adb_transport.run_adb(["get-state"], serial=serial, timeout=4)
+            tracked.update(status=returncode, output=stdout)
+        return stdout.strip() or DEFAULT_VALUE
+    except CommandCancelled:
+        return DEFAULT_VALUE
     except Exception as e:
         log_manager.log_exception(f"Failed to get ADB state for {serial}: {e}")
         return DEFAULT_VALUE
 
 def get_device_name(serial: str) -> str:
-    return adb_shell(serial, "getprop ro.product.device")
+    return get_prop(serial, "ro.product.device")
 
 def get_api_level(serial: str) -> str:
-    return adb_shell(serial, "getprop ro.build.version.sdk")
+    return get_prop(serial, "ro.build.version.sdk")
 
 def get_build_fingerprint(serial: str) -> str:
-    return adb_shell(serial, "getprop ro.build.fingerprint")
+    return get_prop(serial, "ro.build.fingerprint")
 
 def get_uptime(serial: str) -> str:
     output = adb_shell(serial, "cat /proc/uptime")
@@ -83,11 +724,11 @@ def get_uptime(serial: str) -> str:
 # SYSTEM LOCALE & DEBUGGING
 # ─────────────────────────────────────────────
 def get_timezone(serial: str) -> str:
-    return adb_shell(serial, "getprop persist.sys.timezone")
+    return get_prop(serial, "persist.sys.timezone")
 
 def get_locale(serial: str) -> str:
-    locale = adb_shell(serial, "getprop persist.sys.locale")
-    return locale if locale != DEFAULT_VALUE else adb_shell(serial, "getprop ro.product.locale")
+    locale = get_prop(serial, "persist.sys.locale")
+    return locale if locale and locale != DEFAULT_VALUE else get_prop(serial, "ro.product.locale")
 
 def test_logcat_access(serial: str) -> str:
     output = adb_shell(serial, "logcat -d -t 1")
@@ -154,10 +795,8 @@ def count_installed_apps(serial: str) -> int:
     Returns:
         int: Number of installed packages, or -1 if error occurs.
     """
-    output = adb_shell(serial, "pm list packages")
-    if output == DEFAULT_VALUE:
-        return -1
-    try:
-        return len(output.splitlines())
-    except Exception:
-        return -1
+    # Imported here: the inventory module is built on adb_shell above
+    from Device_Analysis import device_package_inventory as packages
+
+    inventory = packages.get_inventory(serial)
+    return len(inventory) if inventory else -1
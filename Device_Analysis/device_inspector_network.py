@@ -2,31 +2,47 @@
 # Extracts network-related metadata from a connected Android device via ADB
 
 from Device_Analysis import device_inspector_core as core
+from Device_Analysis import device_dumpsys_cache as dumpsys
 import re
 
 DEFAULT = core.DEFAULT_VALUE
 
+IP_ADDR_COMMAND = "ip addr show wlan0 | grep 'inet '"
+IP_ROUTE_COMMAND = "ip route"
+MAC_FILE_COMMAND = "cat /sys/class/net/wlan0/address"
+MAC_LINK_COMMAND = "ip addr show wlan0 | grep 'link/ether'"
+NETSTATS_COMMAND = "dumpsys netstats | grep -m 1 'iface=wlan0'"
+
+# Shell commands issued by this module, prefetched in one batch by the collector
+BATCH_COMMANDS = [
+    IP_ADDR_COMMAND,
+    IP_ROUTE_COMMAND,
+    MAC_FILE_COMMAND,
+    MAC_LINK_COMMAND,
+    NETSTATS_COMMAND,
+] + dumpsys.BATCH_COMMANDS
+
 def get_ip_address(serial: str) -> str:
     """Return the current Wi-Fi IPv4 address."""
     # Prefer ip addr which is available on modern Android builds
-    output = core.adb_shell(serial, "ip addr show wlan0 | grep 'inet '")
+    output = core.adb_shell(serial, IP_ADDR_COMMAND)
     match = re.search(r'inet (\d+\.\d+\.\d+\.\d+)', output)
     if match:
         return match.group(1)
 
     # Fallback to routing table parsing
-    route = core.adb_shell(serial, "ip route")
+    route = core.adb_shell(serial, IP_ROUTE_COMMAND)
     match = re.search(r'src (\d+\.\d+\.\d+\.\d+)', route)
     return match.group(1) if match else "Unknown"
 
 def get_mac_address(serial: str) -> str:
     """Return the Wi-Fi MAC address."""
-    address = core.adb_shell(serial, "cat /sys/class/net/wlan0/address")
+    address = core.adb_shell(serial, MAC_FILE_COMMAND)
     if address and ":" in address:
         return address
 
     # Some devices restrict direct file access; try ip link as fallback
-    alt = core.adb_shell(serial, "ip addr show wlan0 | grep 'link/ether'")
+    alt = core.adb_shell(serial, MAC_LINK_COMMAND)
     match = re.search(r'link/ether\s+([0-9a-f:]{17})', alt)
     return match.group(1) if match else "Unknown"
 
@@ -40,7 +56,7 @@ def get_wifi_ssid(serial: str) -> str:
     Returns:
         str: SSID name or 'Unknown'
     """
-    output = core.adb_shell(serial, "dumpsys netstats | grep -m 1 'iface=wlan0'")
+    output = core.adb_shell(serial, NETSTATS_COMMAND)
     if not output:
         return "Unknown"
     # Attempt to extract just the SSID name from the complex dumpsys output
@@ -59,7 +75,7 @@ def get_mobile_data_status(serial: str) -> str:
     Returns:
         str: 'Enabled' or 'Disabled'
     """
-    output = core.adb_shell(serial, "dumpsys telephony.registry | grep mDataConnectionState")
+    output = dumpsys.grep(serial, "telephony.registry", "mDataConnectionState")
     return "Enabled" if "mDataConnectionState=2" in output else "Disabled"
 
 def get_wifi_status(serial: str) -> str:
@@ -72,7 +88,7 @@ def get_wifi_status(serial: str) -> str:
     Returns:
         str: Wi-Fi status string.
     """
-    state = core.adb_shell(serial, "dumpsys wifi | grep 'Wi-Fi is '")
+    state = dumpsys.grep(serial, "wifi", "Wi-Fi is ")
     if not state:
         return "Unknown"
     if "Wi-Fi is enabled" in state:
@@ -91,7 +107,7 @@ def get_signal_strength(serial: str) -> str:
     Returns:
         str: Signal strength info or 'Unknown'
     """
-    output = core.adb_shell(serial, "dumpsys telephony.registry | grep mSignalStrength")
+    output = dumpsys.grep(serial, "telephony.registry", "mSignalStrength")
     if not output:
         return "Unknown"
 
@@ -118,7 +134,7 @@ def get_signal_strength(serial: str) -> str:
 
 def get_default_gateway(serial: str) -> str:
     """Return the default gateway IP address."""
-    output = core.adb_shell(serial, "ip route")
+    output = core.adb_shell(serial, IP_ROUTE_COMMAND)
     if not output:
         return "Unknown"
     for line in output.splitlines():
@@ -134,8 +150,8 @@ def get_default_gateway(serial: str) -> str:
 
 def get_dns_servers(serial: str) -> str:
     """Return configured DNS servers (comma separated)."""
-    dns1 = core.adb_shell(serial, "getprop net.dns1")
-    dns2 = core.adb_shell(serial, "getprop net.dns2")
+    dns1 = core.get_prop(serial, "net.dns1")
+    dns2 = core.get_prop(serial, "net.dns2")
     servers = [dns for dns in [dns1, dns2] if dns and dns != DEFAULT]
     # Remove duplicates while preserving order
     unique = []
@@ -147,20 +163,17 @@ def get_dns_servers(serial: str) -> str:
 
 def get_network_type(serial: str) -> str:
     """Return current mobile network type (e.g., LTE, NR)."""
-    output = core.adb_shell(serial, "getprop gsm.network.type")
+    output = core.get_prop(serial, "gsm.network.type")
     if output and output != DEFAULT:
         return output.strip()
-    alt = core.adb_shell(
-        serial,
-        "dumpsys telephony.registry | grep -m 1 dataNetworkType"
-    )
+    alt = dumpsys.grep(serial, "telephony.registry", "dataNetworkType", max_count=1)
     match = re.search(r'dataNetworkType=(\S+)', alt)
     return match.group(1) if match else "Unknown"
 
 
 def get_wifi_link_speed(serial: str) -> str:
     """Return the connected Wi-Fi link speed if available."""
-    output = core.adb_shell(serial, "dumpsys wifi | grep 'Link speed'")
+    output = dumpsys.grep(serial, "wifi", "Link speed")
     if not output:
         return "Unknown"
     match = re.search(r'Link speed:\s*(\d+)\s*Mbps', output)
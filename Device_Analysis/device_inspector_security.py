@@ -2,10 +2,26 @@
 # Extracts security, debugging, and integrity-related metadata from an Android device
 
 from Device_Analysis import device_inspector_core as core
+from Device_Analysis import device_package_inventory as packages
+
+ID_COMMAND = "id"
+SHELL_TEST_COMMAND = "echo shell_test"
+ADB_ENABLED_COMMAND = "settings get global adb_enabled"
+DEV_SETTINGS_COMMAND = "settings get global development_settings_enabled"
+SELINUX_COMMAND = "getenforce"
+
+# Shell commands issued by this module, prefetched in one batch by the collector
+BATCH_COMMANDS = [
+    ID_COMMAND,
+    SHELL_TEST_COMMAND,
+    ADB_ENABLED_COMMAND,
+    DEV_SETTINGS_COMMAND,
+    SELINUX_COMMAND,
+]
 
 
 def check_root_status(serial: str) -> str:
-    output = core.adb_shell(serial, "id")
+    output = core.adb_shell(serial, ID_COMMAND)
     if not output or "Error" in output:
         return "Unknown"
     if "uid=0" in output:
@@ -20,7 +36,7 @@ def test_shell_access(serial: str) -> str:
     Returns:
         str: 'Available', 'Restricted', or 'Unknown'
     """
-    output = core.adb_shell(serial, "echo shell_test")
+    output = core.adb_shell(serial, SHELL_TEST_COMMAND)
     if not output or "Error" in output:
         return "Unknown"
     return "Available" if "shell_test" in output else "Restricted"
@@ -34,28 +50,28 @@ def get_usb_debug_status(serial: str) -> str:
 
 
 def is_usb_debug_enabled(serial: str) -> str:
-    val = core.adb_shell(serial, "settings get global adb_enabled")
+    val = core.adb_shell(serial, ADB_ENABLED_COMMAND)
     if not val or "Error" in val:
         return "Unknown"
     return "Enabled" if val.strip() == "1" else "Disabled"
 
 
 def is_developer_mode_enabled(serial: str) -> str:
-    val = core.adb_shell(serial, "settings get global development_settings_enabled")
+    val = core.adb_shell(serial, DEV_SETTINGS_COMMAND)
     if not val or "Error" in val:
         return "Unknown"
     return "Enabled" if val.strip() == "1" else "Disabled"
 
 
 def check_play_protect(serial: str) -> str:
-    output = core.adb_shell(serial, "pm list packages")
-    if not output or "Error" in output:
+    found = packages.find_packages(serial, ["com.google.android.gms"])
+    if found is None:
         return "Unknown"
-    return "Enabled" if "com.google.android.gms" in output else "Disabled"
+    return "Enabled" if found else "Disabled"
 
 
 def detect_custom_rom(serial: str) -> str:
-    fingerprint = core.adb_shell(serial, "getprop ro.build.fingerprint")
+    fingerprint = core.get_prop(serial, "ro.build.fingerprint")
     if not fingerprint or "Error" in fingerprint:
         return "Unknown"
     if any(x in fingerprint.lower() for x in ["lineage", "twrp", "dirty"]):
@@ -66,14 +82,14 @@ def detect_custom_rom(serial: str) -> str:
 
 
 def is_bootloader_unlocked(serial: str) -> str:
-    status = core.adb_shell(serial, "getprop ro.boot.verifiedbootstate")
+    status = core.get_prop(serial, "ro.boot.verifiedbootstate")
     if not status or "Error" in status:
         return "Unknown"
     return status.capitalize()
 
 
 def get_selinux_status(serial: str) -> str:
-    result = core.adb_shell(serial, "getenforce")
+    result = core.adb_shell(serial, SELINUX_COMMAND)
     return result if result else "Unknown"
 
 
@@ -98,9 +114,7 @@ def check_known_antivirus_apps(serial: str) -> str:
         "com.psafe.msuite"
     ]
 
-    output = core.adb_shell(serial, "pm list packages")
-    if not output or "Error" in output:
+    found = packages.find_packages(serial, known_av)
+    if found is None:
         return "Unknown"
-
-    found = [pkg for pkg in known_av if pkg in output]
     return ", ".join(found) if found else "None"
@@ -0,0 +1,286 @@
+# device_logcat.py
+# Continuous logcat reader with a bounded ring buffer and pattern alerts
+
+import re
+import threading
+import time
+from collections import deque
+from Utils.app_utils import cli_colors
+from Utils.logging_utils import log_manager
+from Device_Analysis import adb_transport, device_inspector_core as core
+
+# ─────────────────────────────────────────────
+# MONITOR CONFIGURATION
+# ─────────────────────────────────────────────
+LOGCAT_COMMAND = "logcat -v threadtime -T 1"  # follow from the newest entry
+BUFFER_LINES = 10000     # lines kept in the ring buffer
+ALERT_BUFFER = 1000      # alerts kept for alerts()
+MAX_LINE_BYTES = 4096    # longer lines are cut before matching; the rest is discarded
+RESTART_DELAY = 2.0      # seconds before reopening a stream that ended
+STREAM_TIMEOUT = 7 * 24 * 3600
+
+# Alert name -> regex; every pattern is folded into one compiled alternation
+ALERT_PATTERNS = {
+    "fatal_exception": r"FATAL EXCEPTION",
+    "native_crash": r"Fatal signal \d+|\*\*\* \*\*\* \*\*\* \*\*\*",
+    "anr": r"\bANR in \S+",
+    "cleartext_url": r"\bhttp://[^\s\"'<>]+",
+    "cleartext_blocked": r"CLEARTEXT communication to \S+ not permitted",
+    "selinux_denial": r"avc:\s+denied",
+}
+
+
+def compile_patterns(patterns: dict[str, str]) -> re.Pattern:
+    """
+    Fold ``{name: regex}`` into one pattern with a named group per alert.
+
+    A single search per line is much cheaper than one search per pattern;
+    ``match.lastgroup`` tells which alert fired.
+    """
+    for name in patterns:
+        if not name.isidentifier():
+            raise ValueError(f"Alert name must be a valid identifier: {name}")
+    return re.compile("|".join(f"(?P<{name}>{regex})" for name, regex in patterns.items()))
+
+
+class LogcatMonitor:
+    """
+    Follows ``adb logcat`` for one device on a background thread.
+
+    Every line goes into a ring buffer of ``buffer_lines``; when readers
+    fall behind the oldest lines are evicted (counted in ``evicted_lines``)
+    rather than growing memory. Lines matching an alert pattern are kept in a
+    separate bounded buffer and passed to listeners registered with
+    ``subscribe`` (called from the reader thread). The stream is reopened
+    after RESTART_DELAY if it ends, e.g. when the device reboots.
+
+    Example:
+        with LogcatMonitor(serial) as monitor:
+            monitor.subscribe(print)
+            time.sleep(60)
+            print(monitor.stats())
+    """
+
+    def __init__(self, serial: str, patterns: dict[str, str] | None = None,
+                 buffer_lines: int = BUFFER_LINES, alert_buffer: int = ALERT_BUFFER,
+                 command: str = LOGCAT_COMMAND):
+        self.serial = serial
+        self.command = command
+        self._matcher = compile_patterns(ALERT_PATTERNS if patterns is None else patterns)
+        self._lines: deque = deque(maxlen=buffer_lines)
+        self._alerts: deque = deque(maxlen=alert_buffer)
+        self._listeners: list = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._finish = None
+        self._thread: threading.Thread | None = None
+        self._started = None
+        self._counters = {
+            "lines": 0,
+            "bytes": 0,
+            "evicted_lines": 0,
+            "truncated_lines": 0,
+            "alerts": 0,
+            "dropped_alerts": 0,
+            "restarts": 0,
+        }
+
+    # ─────────────────────────────────────────
+    # Lifecycle
+    # ─────────────────────────────────────────
+    def start(self) -> "LogcatMonitor":
+        if adb_transport.replaying():
+            log_manager.log_warning("Logcat monitoring is not available in ADB replay mode.")
+            return self
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._started = time.perf_counter()
+            self._thread = threading.Thread(target=self._run, name=f"logcat-{self.serial}", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        self._stopped.set()
+        finish = self._finish
+        if finish is not None:
+            finish()  # unblocks the reader thread
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *_exc):
+        self.stop()
+
+    def subscribe(self, callback) -> None:
+        """Call ``callback(alert)`` for every future alert."""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def unsubscribe(self, callback) -> None:
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    # ─────────────────────────────────────────
+    # Ingestion (hot path)
+    # ─────────────────────────────────────────
+    def ingest(self, lines: list[str]) -> list[dict]:
+        """
+        Buffer ``lines`` and return the alerts they raised.
+
+        Called by the reader thread for every chunk; also usable directly
+        to scan saved logs.
+        """
+        search = self._matcher.search
+        alerts = []
+        for line in lines:
+            match = search(line)
+            if match:
+                alerts.append({
+                    "serial": self.serial,
+                    "alert": match.lastgroup,
+                    "match": match.group(),
+                    "line": line,
+                    "time": time.time(),
+                })
+
+        with self._lock:
+            counters = self._counters
+            overflow = len(self._lines) + len(lines) - self._lines.maxlen
+            if overflow > 0:
+                counters["evicted_lines"] += overflow
+            self._lines.extend(lines)
+            counters["lines"] += len(lines)
+            if alerts:
+                overflow = len(self._alerts) + len(alerts) - self._alerts.maxlen
+                if overflow > 0:
+                    counters["dropped_alerts"] += overflow
+                self._alerts.extend(alerts)
+                counters["alerts"] += len(alerts)
+            listeners = list(self._listeners) if alerts else ()
+
+        for alert in alerts:
+            for callback in listeners:
+                try:
+                    callback(alert)
+                except Exception as e:
+                    log_manager.log_exception(f"Logcat alert listener failed: {e}")
+        return alerts
+
+    def _split(self, chunks):
+        """
+        Yield lists of decoded lines, one list per chunk.
+
+        A line longer than MAX_LINE_BYTES is cut to its first MAX_LINE_BYTES
+        and everything after that up to the next newline is discarded, so a
+        runaway line never turns into several bogus lines.
+        """
+        pending = b""
+        discarding = False
+        for chunk in chunks:
+            with self._lock:
+                self._counters["bytes"] += len(chunk)
+            if discarding:
+                end = chunk.find(b"\n")
+                if end < 0:
+                    continue
+                chunk, discarding = chunk[end + 1:], False
+            *raw, pending = (pending + chunk).split(b"\n")
+            if len(pending) > MAX_LINE_BYTES:
+                raw.append(pending)  # emit the cut line now and skip the rest of it
+                pending, discarding = b"", True
+            lines = []
+            for line in raw:
+                if len(line) > MAX_LINE_BYTES:
+                    line = line[:MAX_LINE_BYTES]
+                    with self._lock:
+                        self._counters["truncated_lines"] += 1
+                lines.append(line.rstrip(b"\r").decode("utf-8", "replace"))
+            if lines:
+                yield lines
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                chunks, self._finish = core.open_raw_stream(self.serial, self.command, STREAM_TIMEOUT)
+                log_manager.log_info(f"Logcat monitor attached to {self.serial}.")
+                for lines in self._split(chunks):
+                    self.ingest(lines)
+            except (OSError, ValueError, TimeoutError) as e:
+                if not self._stopped.is_set():
+                    log_manager.log_warning(f"Logcat stream for {self.serial} failed: {e}")
+            finally:
+                finish, self._finish = self._finish, None
+                if finish is not None:
+                    try:
+                        finish()
+                    except (OSError, ValueError):
+                        pass
+            if self._stopped.wait(RESTART_DELAY):
+                break
+            with self._lock:
+                self._counters["restarts"] += 1
+
+    # ─────────────────────────────────────────
+    # Consumers
+    # ─────────────────────────────────────────
+    def recent(self, count: int | None = None) -> list[str]:
+        """Return the newest ``count`` buffered lines (all if None) without consuming them."""
+        with self._lock:
+            lines = list(self._lines)
+        return lines if count is None else lines[-count:]
+
+    def drain(self) -> list[str]:
+        """Remove and return every buffered line."""
+        with self._lock:
+            lines = list(self._lines)
+            self._lines.clear()
+        return lines
+
+    def alerts(self, clear: bool = False) -> list[dict]:
+        """Return buffered alerts, oldest first."""
+        with self._lock:
+            alerts = list(self._alerts)
+            if clear:
+                self._alerts.clear()
+        return alerts
+
+    def stats(self) -> dict:
+        """Return ingestion counters, including lines evicted and alerts dropped on overflow."""
+        with self._lock:
+            stats = dict(self._counters, buffered=len(self._lines), buffered_alerts=len(self._alerts))
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        stats["lines_per_second"] = round(stats["lines"] / elapsed, 1) if elapsed else 0.0
+        return stats
+
+# ─────────────────────────────────────────────
+# MENU ENTRY
+# ─────────────────────────────────────────────
+def run_monitor(device: dict, report_interval: float = 10.0) -> dict:
+    """Menu action: follow logcat on ``device`` and print alerts until Ctrl+C."""
+    serial = device.get("serial", "")
+
+    def show(alert: dict) -> None:
+        print(cli_colors.red(f"[{alert['alert']}] ") + alert["line"])
+
+    cli_colors.print_info(f"Monitoring logcat on {serial}. Press Ctrl+C to stop.")
+    with LogcatMonitor(serial) as monitor:
+        monitor.subscribe(show)
+        try:
+            while True:
+                time.sleep(report_interval)
+                stats = monitor.stats()
+                print(cli_colors.dim_gray(
+                    f"  {stats['lines']} lines ({stats['lines_per_second']}/s), "
+                    f"{stats['alerts']} alerts, {stats['evicted_lines']} evicted"
+                ))
+        except KeyboardInterrupt:
+            print()
+    stats = monitor.stats()
+    cli_colors.print_success(
+        f"Logcat monitor stopped: {stats['lines']} lines, {stats['alerts']} alerts, "
+        f"{stats['restarts']} restart(s)."
+    )
+    return stats
@@ -0,0 +1,175 @@
+# device_package_inventory.py
+# Per-device cache of installed packages shared by the inspectors
+
+import threading
+import time
+from Utils.logging_utils import log_manager
+from Device_Analysis import device_inspector_core as core
+
+# ─────────────────────────────────────────────
+# INVENTORY CONFIGURATION
+# ─────────────────────────────────────────────
+INVENTORY_TTL = 120.0  # seconds an inventory is trusted
+INVENTORY_COMMAND = "pm list packages -f -U --show-versioncode"
+FALLBACK_COMMAND = "pm list packages"  # for pm builds without -U/--show-versioncode
+
+# Shell commands issued by this module, prefetched in one batch by the collector
+BATCH_COMMANDS = [INVENTORY_COMMAND]
+
+# serial -> (fetched_at, {package: details}) and the inventory it replaced
+_inventories: dict[str, tuple[float, dict[str, dict]]] = {}
+_previous: dict[str, dict[str, dict]] = {}
+_locks: dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+# ─────────────────────────────────────────────
+# PARSING
+# ─────────────────────────────────────────────
+def parse_package_list(output) -> dict[str, dict]:
+    """
+    Parse `pm list packages` output, with or without -f/-U/--show-versioncode.
+
+    ``output`` may be the whole text or any iterable of lines, such as
+    core.adb_shell_lines(), so large listings are parsed as they stream in.
+
+    Lines look like
+    ``package:/data/app/~~x==/com.foo-y==/base.apk=com.foo versionCode:42 uid:10123``
+    or simply ``package:com.foo``.
+
+    Returns:
+        dict: Package name -> {"path", "version_code", "uid"}; fields the
+        command did not report are None.
+    """
+    packages: dict[str, dict] = {}
+    lines = output.splitlines() if isinstance(output, str) else output
+    for line in lines:
+        line = line.strip()
+        if not line.startswith("package:"):
+            continue
+        fields = line[len("package:"):].split()
+        if not fields:
+            continue
+        # APK directories may contain '=', so the name is after the last one
+        path, sep, name = fields[0].rpartition("=")
+        if not sep:
+            path, name = None, fields[0]
+        details = {"path": path, "version_code": None, "uid": None}
+        for field in fields[1:]:
+            key, _, value = field.partition(":")
+            if key == "versionCode":
+                details["version_code"] = value
+            elif key == "uid":
+                details["uid"] = value
+        packages[name] = details
+    return packages
+
+
+def _fetch(serial: str) -> dict[str, dict]:
+    for command in (INVENTORY_COMMAND, FALLBACK_COMMAND):
+        packages = parse_package_list(core.adb_shell_lines(serial, command))
+        if packages:
+            return packages
+    return {}
+
+# ─────────────────────────────────────────────
+# CACHED INVENTORY
+# ─────────────────────────────────────────────
+def _lock(serial: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(serial, threading.Lock())
+
+
+def get_inventory(serial: str, max_age: float = INVENTORY_TTL, refresh: bool = False) -> dict[str, dict]:
+    """
+    Return the installed packages of a device from one cached `pm` listing.
+
+    Args:
+        serial (str): Device serial number.
+        max_age (float): Seconds before the inventory is re-fetched.
+        refresh (bool): Force a new listing regardless of age.
+
+    Returns:
+        dict: Package name -> details (see parse_package_list). Empty if
+        the listing failed.
+    """
+    with _lock(serial):
+        entry = _inventories.get(serial)
+        if entry and not refresh and time.monotonic() - entry[0] < max_age:
+            return entry[1]
+
+        packages = _fetch(serial)
+        if packages:
+            if entry:
+                _previous[serial] = entry[1]
+            _inventories[serial] = (time.monotonic(), packages)
+        else:
+            log_manager.log_warning(f"Package inventory unavailable for {serial}")
+        return packages
+
+
+def refresh_inventory(serial: str) -> dict[str, dict]:
+    """Force a new package listing for ``serial``."""
+    return get_inventory(serial, refresh=True)
+
+
+def invalidate_inventory(serial: str | None = None) -> None:
+    """
+    Drop the cached inventory for ``serial`` (or every device).
+
+    The dropped listing becomes the diff baseline, so the next
+    get_inventory_changes() still reports what changed since it.
+    """
+    with _locks_guard:
+        serials = list(_inventories) if serial is None else [serial]
+        for key in serials:
+            entry = _inventories.pop(key, None)
+            if entry:
+                _previous[key] = entry[1]
+
+
+def find_packages(serial: str, prefixes: list[str]) -> list[str] | None:
+    """
+    Return the prefixes that match at least one installed package name.
+
+    Returns:
+        list: Matching prefixes in the given order, or None if the
+        inventory is unavailable.
+    """
+    packages = get_inventory(serial)
+    if not packages:
+        return None
+    return [prefix for prefix in prefixes if any(name.startswith(prefix) for name in packages)]
+
+# ─────────────────────────────────────────────
+# CHANGE TRACKING
+# ─────────────────────────────────────────────
+def diff_inventory(old: dict[str, dict], new: dict[str, dict]) -> dict[str, list[str]]:
+    """
+    Compare two inventories.
+
+    Returns:
+        dict: "added", "removed" and "updated" (version or APK path
+        changed) package names, each sorted.
+    """
+    return {
+        "added": sorted(new.keys() - old.keys()),
+        "removed": sorted(old.keys() - new.keys()),
+        "updated": sorted(
+            name for name in new.keys() & old.keys()
+            if new[name]["version_code"] != old[name]["version_code"]
+            or new[name]["path"] != old[name]["path"]
+        ),
+    }
+
+
+def get_inventory_changes(serial: str, refresh: bool = True) -> dict[str, list[str]]:
+    """
+    Diff the current inventory of ``serial`` against the one it replaced.
+
+    With ``refresh`` a new listing is taken first. If no earlier inventory
+    exists every package is reported as added.
+    """
+    current = get_inventory(serial, refresh=refresh)
+    with _lock(serial):
+        previous = _previous.get(serial, {})
+    return diff_inventory(previous, current)
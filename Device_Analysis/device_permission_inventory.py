@@ -0,0 +1,182 @@
+# device_permission_inventory.py
+# Per-app requested and granted permissions from one streamed `dumpsys package`
+
+import os
+import re
+from Utils.app_utils import cli_colors, display_utils
+from Utils.logging_utils import log_manager
+from App_Analysis import apk_permission_analysis as perm
+from App_Analysis.apk_baseline import APKPermissionBaselineAnalyzer
+from Device_Analysis import device_inspector_core as core
+
+# ─────────────────────────────────────────────
+# INVENTORY CONFIGURATION
+# ─────────────────────────────────────────────
+# The `packages` section holds every package's permission state
+PACKAGE_DUMP_COMMAND = "dumpsys package packages"
+REPORT_DIR_TEXT = os.path.join("Output", "Text")
+REPORT_DIR_EXCEL = os.path.join("Output", "Excel")
+
+_PACKAGE_LINE = re.compile(r"^Package \[([^\]]+)\]")
+_PERMISSION_NAME = re.compile(r"^[\w.$-]+")
+_GRANT_LINE = re.compile(r"^([\w.$-]+): granted=(true|false)")
+_SECTIONS = {
+    "requested permissions:": "requested",
+    "install permissions:": "install",
+    "runtime permissions:": "runtime",
+}
+
+# ─────────────────────────────────────────────
+# PARSING
+# ─────────────────────────────────────────────
+def _new_package() -> dict:
+    return {
+        "uid": None,
+        "version_code": None,
+        "code_path": None,
+        "system": False,
+        "requested": [],
+        "granted": [],
+        "denied": [],
+    }
+
+
+def _finish(package: dict | None) -> None:
+    if package is not None:
+        granted = package.pop("_granted")
+        package["granted"] = [p for p in granted if granted[p]]
+        package["denied"] = [p for p in granted if not granted[p]]
+
+
+def parse_package_dump(lines) -> dict[str, dict]:
+    """
+    Parse the ``Packages:`` section of `dumpsys package` in a single pass.
+
+    Args:
+        lines: Iterable of output lines (e.g. a core.adb_shell_lines stream).
+
+    Returns:
+        dict: Package name -> {"uid", "version_code", "code_path",
+        "system", "requested", "granted", "denied"}. ``granted`` holds
+        install-time and runtime grants (for any user); ``denied`` holds
+        runtime permissions that are currently revoked.
+    """
+    packages: dict[str, dict] = {}
+    current = None
+    in_packages = False
+    section, section_indent = None, 0
+
+    for line in lines:
+        stripped = line.strip()
+        if not stripped:
+            continue
+        indent = len(line) - len(line.lstrip())
+
+        if indent == 0:
+            if stripped == "Packages:":
+                in_packages = True
+                continue
+            if in_packages:
+                break  # later sections (hidden system packages, etc.) repeat entries
+            continue
+        if not in_packages:
+            continue
+
+        match = _PACKAGE_LINE.match(stripped)
+        if match and indent <= 2:
+            _finish(current)
+            current = packages[match.group(1)] = dict(_new_package(), _granted={})
+            section = None
+            continue
+        if current is None:
+            continue
+
+        if section is not None and indent > section_indent:
+            if section == "requested":
+                name = _PERMISSION_NAME.match(stripped)
+                if name and name.group() not in current["requested"]:
+                    current["requested"].append(name.group())
+            else:
+                grant = _GRANT_LINE.match(stripped)
+                if grant:
+                    name, granted = grant.group(1), grant.group(2) == "true"
+                    current["_granted"][name] = current["_granted"].get(name, False) or granted
+            continue
+
+        section = _SECTIONS.get(stripped)
+        section_indent = indent
+        if section is not None:
+            continue
+        if stripped.startswith(("userId=", "appId=")) and current["uid"] is None:
+            current["uid"] = stripped.split("=", 1)[1].split()[0]
+        elif stripped.startswith("versionCode="):
+            current["version_code"] = stripped.split("=", 1)[1].split()[0]
+        elif stripped.startswith("codePath="):
+            current["code_path"] = stripped.split("=", 1)[1]
+        elif stripped.startswith("flags=[") and indent <= 4:
+            current["system"] = " SYSTEM " in stripped
+
+    _finish(current)
+    return packages
+
+
+def get_permission_inventory(serial: str, include_system: bool = True) -> dict[str, dict]:
+    """
+    Return per-package permissions for ``serial`` with no APK transfer.
+
+    Each entry also carries ``classification`` (permission -> type, from
+    apk_permission_analysis.classify_permissions), ``dangerous_granted``
+    and ``dangerous_combinations`` over the granted set.
+    """
+    inventory = parse_package_dump(core.adb_shell_lines(serial, PACKAGE_DUMP_COMMAND))
+    if not inventory:
+        log_manager.log_warning(f"No package permissions parsed from {serial}.")
+    result = {}
+    for name, info in sorted(inventory.items()):
+        if info["system"] and not include_system:
+            continue
+        info["classification"] = perm.classify_permissions(info["requested"])
+        info["dangerous_granted"] = [
+            p for p in info["granted"] if perm.classify_permission(p) == "dangerous"
+        ]
+        info["dangerous_combinations"] = perm.detect_dangerous_combinations(info["granted"])
+        result[name] = info
+    return result
+
+
+def build_baseline(inventory: dict[str, dict], source: str = "device") -> APKPermissionBaselineAnalyzer:
+    """Load requested permissions into a baseline analyzer and compute its statistics."""
+    analyzer = APKPermissionBaselineAnalyzer(source)
+    analyzer.load_permission_map({name: info["requested"] for name, info in inventory.items()})
+    analyzer.compute_statistics()
+    return analyzer
+
+# ─────────────────────────────────────────────
+# MENU ENTRY
+# ─────────────────────────────────────────────
+def run_permission_inventory(device: dict) -> dict[str, dict]:
+    """Menu action: inventory third-party app permissions and write baseline reports."""
+    serial = device.get("serial", "")
+    cli_colors.print_info("Reading package permissions from the device...")
+    inventory = get_permission_inventory(serial, include_system=False)
+    if not inventory:
+        cli_colors.print_warning("No third-party package permissions found.")
+        return inventory
+
+    display_utils.print_section_title("Granted Dangerous Permissions")
+    for name, info in inventory.items():
+        if not info["dangerous_granted"]:
+            continue
+        line = f"{name}: {', '.join(p.rsplit('.', 1)[-1] for p in info['dangerous_granted'])}"
+        if info["dangerous_combinations"]:
+            line += f"  [{'; '.join(info['dangerous_combinations'])}]"
+        print(cli_colors.red(line) if info["dangerous_combinations"] else cli_colors.yellow(line))
+    display_utils.print_spacer()
+
+    analyzer = build_baseline(inventory, source=f"device:{serial}")
+    analyzer.display_summary()
+    safe_serial = re.sub(r"[^A-Za-z0-9._-]", "_", serial)
+    analyzer.generate_txt_report(os.path.join(REPORT_DIR_TEXT, f"permission_baseline_{safe_serial}.txt"))
+    analyzer.generate_csv_report(os.path.join(REPORT_DIR_EXCEL, f"permission_baseline_{safe_serial}.csv"))
+    cli_colors.print_success("Reports saved to Output/Text and Output/Excel directories")
+    return inventory
@@ -0,0 +1,120 @@
+# device_profile_cache.py
+# Persists boot-stable device fields so re-selecting a device skips them
+
+import json
+import os
+import threading
+import time
+from Utils.logging_utils import log_manager
+from Device_Analysis import device_inspector_core as core
+
+# ─────────────────────────────────────────────
+# PROFILE CACHE CONFIGURATION
+# ─────────────────────────────────────────────
+PROFILE_CACHE_PATH = os.path.join("Output", "Cache", "device_profiles.json")
+BOOT_ID_PROP = "ro.boot.bootid"
+BOOT_ID_COMMAND = "cat /proc/sys/kernel/random/boot_id"
+
+# Fields that cannot change without a reboot; everything else is re-fetched
+STATIC_FIELDS = (
+    "api_level",
+    "build_fingerprint",
+    "device_name",
+    "custom_rom",
+    "bootloader",
+)
+
+_UNCACHEABLE = {core.DEFAULT_VALUE, "Timeout", "", None}
+_lock = threading.Lock()
+
+# ─────────────────────────────────────────────
+# BOOT IDENTITY
+# ─────────────────────────────────────────────
+def get_boot_id(serial: str) -> str:
+    """
+    Return an identifier that changes on every reboot of the device.
+
+    Both sources are read live, never from core's property snapshot, which
+    may predate a reboot. The collector reads this before building its
+    batch, since a profile hit changes what the batch needs.
+
+    Returns:
+        str: The kernel boot_id, else ``ro.boot.bootid``, else "".
+    """
+    for command in (BOOT_ID_COMMAND, core.prop_command(BOOT_ID_PROP)):
+        boot_id = core.adb_shell(serial, command)
+        if boot_id and boot_id not in (core.DEFAULT_VALUE, "Timeout"):
+            return boot_id.strip()
+    return ""
+
+# ─────────────────────────────────────────────
+# CACHE FILE
+# ─────────────────────────────────────────────
+def _read(path: str) -> dict:
+    if not os.path.isfile(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        log_manager.log_warning(f"Ignoring unreadable device profile cache {path}: {e}")
+        return {}
+
+
+def _write(path: str, profiles: dict) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(profiles, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_profile(serial: str, boot_id: str, path: str = PROFILE_CACHE_PATH) -> dict | None:
+    """
+    Return the cached profile of ``serial`` if it was saved during this boot.
+
+    Returns:
+        dict: ``{"boot_id", "saved", "fields"}``, or None on a miss.
+    """
+    if not serial or not boot_id:
+        return None
+    with _lock:
+        entry = _read(path).get(serial)
+    if not entry or entry.get("boot_id") != boot_id:
+        return None
+    return entry
+
+
+def save_profile(serial: str, boot_id: str, device: dict, path: str = PROFILE_CACHE_PATH) -> dict:
+    """
+    Store the static fields of a collected ``device`` for this boot.
+
+    Fields that could not be collected are left out so they are retried
+    next time.
+
+    Returns:
+        dict: The fields that were cached.
+    """
+    fields = {key: device[key] for key in STATIC_FIELDS if device.get(key) not in _UNCACHEABLE}
+    if not serial or not boot_id or not fields:
+        return {}
+    with _lock:
+        profiles = _read(path)
+        profiles[serial] = {
+            "boot_id": boot_id,
+            "saved": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "fields": fields,
+        }
+        _write(path, profiles)
+    return fields
+
+
+def invalidate_profile(serial: str | None = None, path: str = PROFILE_CACHE_PATH) -> None:
+    """Drop the cached profile of ``serial`` (or every device)."""
+    with _lock:
+        profiles = _read(path)
+        if serial is None:
+            profiles.clear()
+        else:
+            profiles.pop(serial, None)
+        _write(path, profiles)
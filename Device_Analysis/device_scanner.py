@@ -4,10 +4,15 @@
 import subprocess
 import time
 import os
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Iterator
 from Utils.logging_utils import log_manager
 from Utils.app_utils.app_config import ADB_PATH
 from Device_Analysis import device_inspector_core as core
+from Device_Analysis import adb_metrics, adb_transport, device_watcher
 
+SCAN_WORKERS = 8        # devices probed concurrently
+DEVICE_TIMEOUT = 15     # seconds before a device's properties are abandoned
 
 # ─────────────────────────────────────────────────────
 # DeviceScanner Class
@@ -16,21 +21,50 @@ from Device_Analysis import device_inspector_core as core
 class DeviceScanner:
     """Scan connected Android devices via ADB."""
 
-    def __init__(self, adb_path: str = ADB_PATH):
+    def __init__(
+        self,
+        adb_path: str = ADB_PATH,
+        max_workers: int = SCAN_WORKERS,
+        device_timeout: float = DEVICE_TIMEOUT,
+        watcher=None,
+    ):
         self.adb_path = adb_path
+        self.max_workers = max_workers
+        self.device_timeout = device_timeout
+        # Running DeviceWatcher whose live registry replaces `adb devices`;
+        # defaults to the shared one (see device_watcher.get_watcher)
+        self.watcher = watcher
 
     @log_manager.log_call("info")
     def scan(self) -> list[dict]:
         """Return a list of detected Android devices with basic properties."""
-        if not os.path.isfile(self.adb_path):
+        serials = self.list_serials()
+        if not serials:
+            return []
+
+        order = {serial: idx for idx, serial in enumerate(serials)}
+        devices = sorted(self.scan_iter(serials), key=lambda d: order[d["serial"]])
+        log_manager.log_info(f"{len(devices)} device(s) successfully scanned.")
+        return devices
+
+    def list_serials(self) -> list[str]:
+        """Return serials of online devices from the device watcher, else `adb devices`."""
+        watcher = self.watcher or device_watcher.get_watcher()
+        if watcher is not None:
+            serials = watcher.online()
+            if not serials:
+                log_manager.log_info("No active ADB devices found.")
+            return serials
+
+        if not adb_transport.replaying() and not os.path.isfile(self.adb_path):
             log_manager.log_error(f"ADB executable not found at: {self.adb_path}")
             return []
 
-        result = self._run_adb_devices()
-        if result is None:
+        output = self._run_adb_devices()
+        if output is None:
             return []
 
-        serials = self._parse_serials(result.stdout.strip().splitlines())
+        serials = self._parse_serials(output.strip().splitlines())
         if not serials:
             log_manager.log_info("No active ADB devices found.")
             log_manager.log_warning(
@@ -39,21 +73,50 @@ class DeviceScanner:
                 "- USB Debugging is enabled\n"
                 "- RSA key prompt is accepted"
             )
-            return []
+        return serials
 
-        devices = []
-        for serial in serials:
-            props = self._get_device_props(serial)
-            devices.append({
-                "serial": serial,
-                "brand": props.get("brand", "?"),
-                "model": props.get("model", "?"),
-                "android": props.get("android", "?"),
-                "abi": props.get("abi", "?"),
-            })
+    def scan_iter(self, serials: list[str] | None = None) -> Iterator[dict]:
+        """
+        Probe devices concurrently and yield each one as soon as it completes.
 
-        log_manager.log_info(f"{len(devices)} device(s) successfully scanned.")
-        return devices
+        A device still running after ``device_timeout`` seconds is yielded
+        with placeholder properties so it cannot hold up the others.
+        """
+        if serials is None:
+            serials = self.list_serials()
+        if not serials:
+            return
+
+        started: dict[str, float] = {}
+
+        def timed_probe(serial: str) -> dict:
+            started[serial] = time.monotonic()
+            return self.probe(serial)
+
+        pool = ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(serials))))
+        try:
+            pending = {pool.submit(timed_probe, serial): serial for serial in serials}
+            while pending:
+                done, _ = wait(pending, timeout=1.0, return_when=FIRST_COMPLETED)
+                for future in done:
+                    serial = pending.pop(future)
+                    try:
+                        yield future.result()
+                    except Exception as e:
+                        log_manager.log_exception(f"Failed to scan {serial}: {e}")
+                        yield self._build_device(serial, {})
+
+                now = time.monotonic()
+                for future, serial in list(pending.items()):
+                    if serial in started and now - started[serial] > self.device_timeout:
+                        log_manager.log_warning(
+                            f"Device {serial} did not respond within {self.device_timeout}s"
+                        )
+                        pending.pop(future)
+                        yield self._build_device(serial, {})
+        finally:
+            # Abandon probes of hung devices instead of waiting on them
+            pool.shutdown(wait=False, cancel_futures=True)
 
     # ─────────────────────────────────────────────────
     # Helpers
@@ -62,30 +125,24 @@ class DeviceScanner:
     def _run_adb_devices(self):
         """Execute adb devices command with retry on timeout."""
         try:
-            return subprocess.run(
-                [self.adb_path, "devices"],
-                capture_output=True,
-                text=True,
-                encoding="utf-8",
-                timeout=10
-            )
+            return self._adb_devices_once()
         except subprocess.TimeoutExpired:
             log_manager.log_warning("ADB timeout. Retrying after 1 second...")
             time.sleep(1)
             try:
-                return subprocess.run(
-                    [self.adb_path, "devices"],
-                    capture_output=True,
-                    text=True,
-                    encoding="utf-8",
-                    timeout=10
-                )
+                return self._adb_devices_once()
             except Exception as e:
                 log_manager.log_exception(f"Second ADB attempt failed: {e}")
         except Exception as e:
             log_manager.log_exception(f"ADB scan failed: {e}")
         return None
 
+    def _adb_devices_once(self) -> str:
+        with adb_metrics.track("", "devices") as tracked:
+            returncode, stdout = adb_transport.run_adb(["devices"], timeout=10, adb_path=self.adb_path)
+            tracked.update(status=returncode, output=stdout)
+        return stdout
+
     def _parse_serials(self, lines: list[str]) -> list[str]:
         """Parse output from `adb devices` and return online serial numbers."""
         serials = []
@@ -97,13 +154,27 @@ class DeviceScanner:
                 log_manager.log_warning(f"Skipping device with state '{parts[1]}': {parts[0]}")
         return serials
 
+    def probe(self, serial: str) -> dict:
+        """Return the basic device dict (serial, brand, model, android, abi) for one device."""
+        return self._build_device(serial, self._get_device_props(serial))
+
+    @staticmethod
+    def _build_device(serial: str, props: dict) -> dict:
+        return {
+            "serial": serial,
+            "brand": props.get("brand", "?"),
+            "model": props.get("model", "?"),
+            "android": props.get("android", "?"),
+            "abi": props.get("abi", "?"),
+        }
+
     def _get_device_props(self, serial: str) -> dict:
-        """Retrieve basic device properties via `adb getprop`."""
+        """Retrieve basic device properties from one `adb getprop` snapshot."""
         return {
-            "brand": core.adb_shell(serial, "getprop ro.product.brand"),
-            "model": core.adb_shell(serial, "getprop ro.product.model"),
-            "android": core.adb_shell(serial, "getprop ro.build.version.release"),
-            "abi": core.adb_shell(serial, "getprop ro.product.cpu.abi"),
+            "brand": core.get_prop(serial, "ro.product.brand"),
+            "model": core.get_prop(serial, "ro.product.model"),
+            "android": core.get_prop(serial, "ro.build.version.release"),
+            "abi": core.get_prop(serial, "ro.product.cpu.abi"),
         }
 
 
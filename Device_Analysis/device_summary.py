@@ -12,6 +12,18 @@ def show_device_summary(device: dict):
     """
     model_name = device.get("model", "Unknown")
     display_utils.print_section_title(f"Device Summary — {model_name}")
+    cached = set(device.get("cached_fields", []))
+
+    def value(key: str, default: str = "Unknown"):
+        """Field value, marked when served from the device profile cache."""
+        result = device.get(key, default)
+        return f"{result} (cached)" if key in cached else result
+
+    if cached:
+        cli_colors.print_info(
+            f"Boot-stable fields marked (cached) were saved {device.get('profile_saved', 'earlier')}"
+            " during this boot."
+        )
 
     # ─────────────────────────────
     # [1] Basic Device Identification
@@ -22,8 +34,8 @@ def show_device_summary(device: dict):
     display_utils.print_status("Model", model_name)
     display_utils.print_status("Android Version", device.get("android", "N/A"))
     display_utils.print_status("ABI (Arch)", device.get("abi", "N/A"))
-    display_utils.print_status("API Level", device.get("api_level", "N/A"))
-    display_utils.print_status("Build Fingerprint", device.get("build_fingerprint", "Unknown"))
+    display_utils.print_status("API Level", value("api_level", "N/A"))
+    display_utils.print_status("Build Fingerprint", value("build_fingerprint"))
     display_utils.print_spacer()
 
     # ─────────────────────────────
@@ -31,11 +43,11 @@ def show_device_summary(device: dict):
     # ─────────────────────────────
     cli_colors.print_section("Security & System Integrity")
     display_utils.print_status("Root Access", device.get("root_status", "Unknown"))
-    display_utils.print_status("Bootloader Unlocked", device.get("bootloader", "Unknown"))
+    display_utils.print_status("Bootloader Unlocked", value("bootloader"))
     display_utils.print_status("USB Debugging Enabled", device.get("usb_debug", "Unknown"))
     display_utils.print_status("Developer Mode", device.get("developer_mode", "Unknown"))
     display_utils.print_status("Play Protect Status", device.get("play_protect", "Unknown"))
-    display_utils.print_status("Custom ROM", device.get("custom_rom", "Unknown"))
+    display_utils.print_status("Custom ROM", value("custom_rom"))
     display_utils.print_status("SELinux Status", device.get("selinux", "Unknown"))
     display_utils.print_spacer()
 
@@ -0,0 +1,232 @@
+# device_watcher.py
+# Tracks device hotplug events from the adb server's track-devices stream
+
+import threading
+import time
+from Utils.app_utils.app_config import ADB_NATIVE_CLIENT
+from Utils.logging_utils import log_manager
+from Device_Analysis import adb_client, adb_transport
+from Device_Analysis.adb_client import AdbClient, AdbConnection, AdbProtocolError, parse_device_list
+
+# ─────────────────────────────────────────────
+# WATCHER CONFIGURATION
+# ─────────────────────────────────────────────
+RECONNECT_DELAY = 2.0  # seconds between attempts to reopen the stream
+READY_TIMEOUT = 2.0    # seconds the shared watcher may take to deliver its first list
+RETRY_INTERVAL = 30.0  # seconds before retrying a shared watcher that never became ready
+
+ATTACHED = "attached"
+DETACHED = "detached"
+STATE_CHANGED = "state_changed"
+
+
+def diff_devices(old: dict[str, str], new: dict[str, str]) -> list[dict]:
+    """
+    Turn two ``{serial: state}`` snapshots into hotplug events.
+
+    Each event is a dict with ``event`` (ATTACHED, DETACHED or
+    STATE_CHANGED), ``serial``, ``state`` and ``previous`` (None on attach,
+    and ``state`` is None on detach).
+    """
+    events = []
+    for serial, state in new.items():
+        if serial not in old:
+            events.append({"event": ATTACHED, "serial": serial, "state": state, "previous": None})
+        elif old[serial] != state:
+            events.append({"event": STATE_CHANGED, "serial": serial, "state": state,
+                           "previous": old[serial]})
+    for serial, state in old.items():
+        if serial not in new:
+            events.append({"event": DETACHED, "serial": serial, "state": None, "previous": state})
+    return events
+
+
+class DeviceWatcher:
+    """
+    Keeps a live ``{serial: state}`` registry from ``host:track-devices``.
+
+    The adb server pushes a full device list whenever anything changes, so
+    no polling is involved. ``track-devices-l`` is used where the server
+    supports it so ``listing()`` carries the same details as
+    `adb devices -l`. Listeners registered with ``subscribe`` are called
+    from the watcher thread with each event dict (see diff_devices). If
+    the server goes away every device is reported detached and the stream
+    is reopened after RECONNECT_DELAY.
+
+    Example:
+        with DeviceWatcher() as watcher:
+            watcher.subscribe(print)
+            watcher.wait_for("emulator-5554", timeout=30)
+    """
+
+    def __init__(self, client: AdbClient | None = None, reconnect_delay: float = RECONNECT_DELAY):
+        self.client = client or AdbClient()
+        self.reconnect_delay = reconnect_delay
+        self._registry: dict[str, str] = {}
+        self._listing = ""
+        self._long = True  # cleared if the server rejects track-devices-l
+        self._listeners: list = []
+        self._changed = threading.Condition()
+        self._stopped = threading.Event()
+        self._ready = threading.Event()  # set while the registry mirrors the server
+        self._conn: AdbConnection | None = None
+        self._thread: threading.Thread | None = None
+
+    # ─────────────────────────────────────────
+    # Lifecycle
+    # ─────────────────────────────────────────
+    def start(self) -> "DeviceWatcher":
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="adb-device-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        self._stopped.set()
+        conn = self._conn
+        if conn is not None:
+            conn.close()  # unblocks the reader thread
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *_exc):
+        self.stop()
+
+    # ─────────────────────────────────────────
+    # Registry queries
+    # ─────────────────────────────────────────
+    def subscribe(self, callback) -> None:
+        """Call ``callback(event)`` for every future hotplug event."""
+        with self._changed:
+            self._listeners.append(callback)
+
+    def unsubscribe(self, callback) -> None:
+        with self._changed:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def devices(self) -> dict[str, str]:
+        """Return a copy of the current ``{serial: state}`` registry."""
+        with self._changed:
+            return dict(self._registry)
+
+    def listing(self) -> str:
+        """Return the latest device list as sent by the server (`adb devices -l` lines if supported)."""
+        with self._changed:
+            return self._listing
+
+    def ready(self, timeout: float | None = 0) -> bool:
+        """Return True once the registry holds a list from a live stream, waiting up to ``timeout``."""
+        return self._ready.wait(timeout)
+
+    def online(self) -> list[str]:
+        """Return serials currently in the ``device`` state."""
+        with self._changed:
+            return [serial for serial, state in self._registry.items() if state == "device"]
+
+    def wait_for(self, serial: str, state: str | None = "device", timeout: float | None = None) -> bool:
+        """
+        Block until ``serial`` reaches ``state`` (None waits for it to detach).
+
+        Returns:
+            bool: True if the condition was met before ``timeout``.
+        """
+        with self._changed:
+            return self._changed.wait_for(
+                lambda: self._registry.get(serial) == state, timeout=timeout
+            )
+
+    # ─────────────────────────────────────────
+    # Stream handling
+    # ─────────────────────────────────────────
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                self._conn = self._open()
+                self._conn.settimeout(None)
+                log_manager.log_info("Device watcher connected to adb server.")
+                while not self._stopped.is_set():
+                    payload = self._conn.read_length_prefixed().decode("utf-8", "replace")
+                    self._apply(dict(parse_device_list(payload)), payload)
+                    self._ready.set()
+            except (OSError, AdbProtocolError, ValueError) as e:
+                self._ready.clear()
+                if self._stopped.is_set():
+                    break
+                log_manager.log_warning(f"Device watcher lost adb server: {e}")
+                self._apply({})
+            finally:
+                if self._conn is not None:
+                    self._conn.close()
+                    self._conn = None
+            self._stopped.wait(self.reconnect_delay)
+
+    def _open(self) -> AdbConnection:
+        if self._long:
+            try:
+                return self.client.open_stream("host:track-devices-l")
+            except AdbProtocolError as e:
+                log_manager.log_debug(f"track-devices-l unsupported, using track-devices: {e}")
+                self._long = False
+        return self.client.open_stream("host:track-devices")
+
+    def _apply(self, snapshot: dict[str, str], listing: str = "") -> None:
+        with self._changed:
+            events = diff_devices(self._registry, snapshot)
+            self._registry = snapshot
+            self._listing = listing
+            listeners = list(self._listeners)
+            self._changed.notify_all()
+
+        for event in events:
+            log_manager.log_info(
+                f"Device {event['serial']} {event['event']}"
+                + (f" ({event['previous']} -> {event['state']})" if event["event"] == STATE_CHANGED else "")
+            )
+            for callback in listeners:
+                try:
+                    callback(event)
+                except Exception as e:
+                    log_manager.log_exception(f"Device watcher listener failed: {e}")
+
+# ─────────────────────────────────────────────
+# SHARED WATCHER
+# ─────────────────────────────────────────────
+_shared: DeviceWatcher | None = None
+_shared_lock = threading.Lock()
+_retry_after = 0.0
+
+
+def get_watcher() -> DeviceWatcher | None:
+    """
+    Return the process-wide watcher, starting it on first use.
+
+    Device listings read its registry instead of running `adb devices`.
+    Returns None (callers poll instead) in replay mode, when the native
+    client is disabled or no adb server is reachable, or when the stream
+    delivered no device list within READY_TIMEOUT.
+    """
+    global _shared, _retry_after
+    if adb_transport.replaying() or not ADB_NATIVE_CLIENT:
+        return None
+    with _shared_lock:
+        if _shared is not None and _shared.ready():
+            return _shared
+        if time.monotonic() < _retry_after:
+            return None
+        client = adb_client.get_client()
+        if client is None:
+            return None
+        if _shared is None:
+            _shared = DeviceWatcher(client).start()
+        if _shared.ready(READY_TIMEOUT):
+            return _shared
+        log_manager.log_warning("adb track-devices unavailable; polling `adb devices` instead.")
+        _shared.stop(timeout=0)
+        _shared = None
+        _retry_after = time.monotonic() + RETRY_INTERVAL
+        return None
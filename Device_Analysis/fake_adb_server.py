@@ -0,0 +1,246 @@
+# fake_adb_server.py
+# Local stand-in for the adb server so protocol code can run without hardware
+
+import re
+import socket
+import socketserver
+import threading
+import time
+from Device_Analysis.adb_client import AdbConnection
+
+# ─────────────────────────────────────────────
+# SCRIPTED SHELL
+# ─────────────────────────────────────────────
+_SUBSHELL = re.compile(r"^\( (.*) \) </dev/null 2>/dev/null$", re.DOTALL)
+_SESSION_END = re.compile(rb'echo "(__STONEHAVEN_RC_[0-9a-f]+):\$\?"\n')
+_ECHO = re.compile(r'^echo "?(.*?)"?$')
+# Batch marker prefixes: the uptime read and the saved exit status
+_MARKER_PREFIX = re.compile(r"^(__s=\$\?; )?read __t __ </proc/uptime; (?=echo )")
+
+
+class ScriptedShell:
+    """
+    Answers device shell commands from a lookup table.
+
+    ``responses`` maps a command string to its stdout, or to an
+    ``(stdout, exit_status)`` tuple. Unknown commands exit with 127. The
+    scripts Stonehaven generates (batched commands and persistent-session
+    wrappers) are interpreted line by line: ``echo`` lines are printed with
+    ``$?`` substituted (batch markers also get ``$__s`` and a host-clock
+    ``$__t``) and each ``( cmd ) </dev/null 2>/dev/null`` line is looked up
+    in the table.
+    """
+
+    def __init__(self, responses: dict | None = None):
+        self.responses = dict(responses or {})
+        self.calls: list[str] = []
+
+    def lookup(self, command: str) -> tuple[str, int]:
+        self.calls.append(command)
+        result = self.responses.get(command)
+        if result is None:
+            return "", 127
+        if isinstance(result, tuple):
+            return result
+        return result, 0
+
+    def run(self, script: str) -> tuple[str, int]:
+        """Interpret ``script`` and return ``(stdout, last_exit_status)``."""
+        match = _SUBSHELL.match(script.strip())
+        if match:
+            script = match.group(1)
+
+        out: list[str] = []
+        status = 0
+        for line in script.splitlines():
+            line = _MARKER_PREFIX.sub("", line.strip())
+            if not line:
+                continue
+            sub = _SUBSHELL.match(line)
+            echo = _ECHO.match(line)
+            if sub or line in self.responses or not echo:
+                text, status = self.lookup(sub.group(1) if sub else line)
+                out.append(text if not text or text.endswith("\n") else text + "\n")
+            else:
+                text = echo.group(1).replace("$?", str(status)).replace("$__s", str(status))
+                out.append(text.replace("$__t", f"{time.monotonic():.2f}") + "\n")
+                status = 0
+        return "".join(out), status
+
+
+# ─────────────────────────────────────────────
+# SERVER
+# ─────────────────────────────────────────────
+class FakeAdbServer:
+    """
+    Threaded TCP server speaking enough of the adb host protocol for tests.
+
+    Supports host:version, host:devices(-l), host:track-devices(-l),
+    host-serial:<serial>:get-state, host:transport:<serial>, shell:<cmd>, exec:<cmd> and persistent
+    ``exec:sh`` sessions.
+
+    Example:
+        with FakeAdbServer({"emulator-5554": "device"},
+                           {"emulator-5554": {"getprop ro.product.model": "Pixel"}}) as srv:
+            client = AdbClient(port=srv.port)
+            client.shell("emulator-5554", "getprop ro.product.model")
+    """
+
+    def __init__(self, devices: dict[str, str] | None = None, responses: dict | None = None,
+                 host: str = "127.0.0.1", port: int = 0, details: dict | None = None):
+        self.devices = dict(devices or {})
+        self.details = dict(details or {})
+        self.shells = {
+            serial: ScriptedShell((responses or {}).get(serial))
+            for serial in set(self.devices) | set(responses or {})
+        }
+        self._trackers: list[AdbConnection] = []
+        self._long_trackers: set[AdbConnection] = set()  # opened with track-devices-l
+        self._lock = threading.Lock()
+
+        outer = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                outer._handle(self.request)
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self._server = socketserver.ThreadingTCPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.host, self.port = self._server.server_address
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    # ─────────────────────────────────────────
+    # Lifecycle
+    # ─────────────────────────────────────────
+    def start(self) -> "FakeAdbServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        with self._lock:
+            for conn in self._trackers:
+                conn.close()
+            self._trackers.clear()
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *_exc):
+        self.stop()
+
+    # ─────────────────────────────────────────
+    # Scripting helpers
+    # ─────────────────────────────────────────
+    def set_device(self, serial: str, state: str | None) -> None:
+        """Attach, change state of, or (state=None) detach a device and notify trackers."""
+        with self._lock:
+            if state is None:
+                self.devices.pop(serial, None)
+            else:
+                self.devices[serial] = state
+                self.shells.setdefault(serial, ScriptedShell())
+            payloads = {long: self._device_list(long) for long in (False, True)}
+            trackers = [(conn, conn in self._long_trackers) for conn in self._trackers]
+        for conn, long in trackers:
+            try:
+                self._send_payload(conn, payloads[long])
+            except OSError:
+                with self._lock:
+                    if conn in self._trackers:
+                        self._trackers.remove(conn)
+
+    # ─────────────────────────────────────────
+    # Protocol handling
+    # ─────────────────────────────────────────
+    def _device_list(self, long: bool) -> str:
+        lines = []
+        for serial, state in self.devices.items():
+            extra = f" {self.details[serial]}" if long and serial in self.details else ""
+            lines.append(f"{serial}\t{state}{extra}\n")
+        return "".join(lines)
+
+    @staticmethod
+    def _send_payload(conn: AdbConnection, text: str) -> None:
+        data = text.encode("utf-8")
+        conn.sendall(b"%04x" % len(data) + data)
+
+    @staticmethod
+    def _fail(conn: AdbConnection, message: str) -> None:
+        data = message.encode("utf-8")
+        conn.sendall(b"FAIL" + b"%04x" % len(data) + data)
+
+    def _handle(self, sock: socket.socket) -> None:
+        conn = AdbConnection.from_socket(sock)
+        serial = None
+        try:
+            while True:
+                request = conn.read_length_prefixed().decode("utf-8")
+                if request == "host:version":
+                    conn.sendall(b"OKAY")
+                    self._send_payload(conn, "0029")
+                    return
+                if request in ("host:devices", "host:devices-l"):
+                    conn.sendall(b"OKAY")
+                    with self._lock:
+                        self._send_payload(conn, self._device_list(request.endswith("-l")))
+                    return
+                if request in ("host:track-devices", "host:track-devices-l"):
+                    long = request.endswith("-l")
+                    conn.sendall(b"OKAY")
+                    with self._lock:
+                        self._send_payload(conn, self._device_list(long))
+                        self._trackers.append(conn)
+                        if long:
+                            self._long_trackers.add(conn)
+                    # Hold the socket open; set_device() pushes updates
+                    while sock.recv(1):
+                        pass
+                    with self._lock:
+                        if conn in self._trackers:
+                            self._trackers.remove(conn)
+                        self._long_trackers.discard(conn)
+                    return
+                if request.startswith("host-serial:") and request.endswith(":get-state"):
+                    state = self.devices.get(request[len("host-serial:"):-len(":get-state")])
+                    if state is None:
+                        self._fail(conn, "device not found")
+                        return
+                    conn.sendall(b"OKAY")
+                    self._send_payload(conn, state)
+                    return
+                if request.startswith("host:transport:"):
+                    serial = request.split(":", 2)[2]
+                    if self.devices.get(serial) != "device":
+                        self._fail(conn, f"device '{serial}' not found")
+                        return
+                    conn.sendall(b"OKAY")
+                    continue
+                if serial and request == "exec:sh":
+                    conn.sendall(b"OKAY")
+                    self._serve_session(conn, serial)
+                    return
+                if serial and request.startswith(("shell:", "exec:")):
+                    conn.sendall(b"OKAY")
+                    output, _status = self.shells[serial].run(request.split(":", 1)[1])
+                    conn.sendall(output.encode("utf-8"))
+                    return
+                self._fail(conn, f"unknown service {request}")
+                return
+        except Exception:
+            return
+        finally:
+            if conn not in self._trackers:
+                conn.close()
+
+    def _serve_session(self, conn: AdbConnection, serial: str) -> None:
+        """Emulate a persistent `sh` reading wrapped commands from the socket."""
+        shell = self.shells[serial]
+        while True:
+            before, match = conn.read_until(_SESSION_END)
+            script = before.decode("utf-8").rstrip().rstrip(";").strip()
+            output, status = shell.run(script)
+            marker = match.group(1).decode("utf-8")
+            conn.sendall(output.encode("utf-8") + f"{marker}:{status}\n".encode("utf-8"))
@@ -39,6 +39,24 @@ ADB_PATH = os.environ.get(
     else "adb",
 )
 
+# Local adb server used by the native protocol client. Set
+# STONEHAVEN_ADB_NATIVE=0 to always fork the adb executable instead.
+ADB_SERVER_HOST = os.environ.get("STONEHAVEN_ADB_SERVER_HOST", "127.0.0.1")
+ADB_SERVER_PORT = int(os.environ.get("ANDROID_ADB_SERVER_PORT", "5037"))
+ADB_NATIVE_CLIENT = os.environ.get("STONEHAVEN_ADB_NATIVE", "1") != "0"
+
+# Optional JSON file receiving ADB latency metrics after each collection
+ADB_METRICS_PATH = os.environ.get("STONEHAVEN_ADB_METRICS", "")
+
+# ADB transport: "live", "record" (save command output per device as
+# fixtures) or "replay" (serve fixtures without a device). Replay latency
+# is "", "recorded" or a fixed number of seconds per command.
+ADB_TRANSPORT = os.environ.get("STONEHAVEN_ADB_TRANSPORT", "live").lower()
+ADB_FIXTURE_DIR = os.environ.get(
+    "STONEHAVEN_ADB_FIXTURES", os.path.join(DEFAULT_OUTPUT_DIR, "Fixtures")
+)
+ADB_REPLAY_LATENCY = os.environ.get("STONEHAVEN_ADB_REPLAY_LATENCY", "")
+
 # ─────────────────────────────────────────────────────
 # Debug Settings
 # ─────────────────────────────────────────────────────
@@ -1,7 +1,18 @@
-"""Minimal CVSS v3.0 base score calculator."""
+"""CVSS v3.0/v3.1 base, temporal and environmental score calculator.
+
+Vectors are validated strictly: every base metric must be present exactly
+once with a legal value. Scores are memoised per canonical vector, so
+scoring the same finding type repeatedly costs a dictionary lookup.
+
+``score_findings_by_environment`` scores a whole findings table under
+several environment profiles (CR/IR/AR requirements and modified base
+metrics) in one call, parsing each distinct vector only once.
+"""
 from __future__ import annotations
 
 import math
+from functools import lru_cache
+from typing import Iterable
 
 # Metric weight mappings based on the official specification
 AV = {"N": 0.85, "A": 0.62, "L": 0.55, "P": 0.2}
@@ -12,6 +23,47 @@ SCORES_CIA = {"H": 0.56, "L": 0.22, "N": 0.0}
 PR_U = {"N": 0.85, "L": 0.62, "H": 0.27}
 PR_C = {"N": 0.85, "L": 0.68, "H": 0.5}
 
+SCOPE = {"U", "C"}
+
+# Base metrics in specification order with their legal values
+BASE_METRICS = {
+    "AV": set(AV),
+    "AC": set(AC),
+    "PR": set(PR_U),
+    "UI": set(UI),
+    "S": SCOPE,
+    "C": set(SCORES_CIA),
+    "I": set(SCORES_CIA),
+    "A": set(SCORES_CIA),
+}
+
+# Temporal metric weights ("X" = Not Defined)
+E = {"X": 1.0, "U": 0.91, "P": 0.94, "F": 0.97, "H": 1.0}
+RL = {"X": 1.0, "O": 0.95, "T": 0.96, "W": 0.97, "U": 1.0}
+RC = {"X": 1.0, "U": 0.92, "R": 0.96, "C": 1.0}
+
+TEMPORAL_METRICS = {"E": set(E), "RL": set(RL), "RC": set(RC)}
+
+# Environmental security requirements
+REQUIREMENT = {"X": 1.0, "L": 0.5, "M": 1.0, "H": 1.5}
+
+# Environmental metrics; modified base metrics map onto their base metric
+MODIFIED_METRICS = {
+    "MAV": "AV", "MAC": "AC", "MPR": "PR", "MUI": "UI",
+    "MS": "S", "MC": "C", "MI": "I", "MA": "A",
+}
+ENVIRONMENTAL_METRICS = {
+    "CR": set(REQUIREMENT),
+    "IR": set(REQUIREMENT),
+    "AR": set(REQUIREMENT),
+    **{mod: BASE_METRICS[base] | {"X"} for mod, base in MODIFIED_METRICS.items()},
+}
+
+OPTIONAL_METRICS = {**TEMPORAL_METRICS, **ENVIRONMENTAL_METRICS}
+
+SUPPORTED_VERSIONS = ("3.0", "3.1")
+DEFAULT_VERSION = "3.0"
+
 SEVERITY_RANGES = [
     (0.0, 0.0, "None"),
     (0.1, 3.9, "Low"),
@@ -21,10 +73,26 @@ SEVERITY_RANGES = [
 ]
 
 
+class CVSSVectorError(ValueError):
+    """Raised when a CVSS vector string is malformed or incomplete."""
+
+
 def _round_up(value: float) -> float:
     return math.ceil(value * 10) / 10.0
 
 
+def _round_up_31(value: float) -> float:
+    """CVSS 3.1 Roundup, immune to floating point representation errors."""
+    int_input = round(value * 100000)
+    if int_input % 10000 == 0:
+        return int_input / 100000.0
+    return (math.floor(int_input / 10000) + 1) / 10.0
+
+
+def _roundup_for(version: str):
+    return _round_up_31 if version == "3.1" else _round_up
+
+
 def parse_vector(vector: str) -> dict[str, str]:
     parts = vector.split("/")
     metrics = {}
@@ -36,35 +104,336 @@ def parse_vector(vector: str) -> dict[str, str]:
     return metrics
 
 
-def calculate_base_score(vector: str) -> tuple[float, str]:
-    m = parse_vector(vector)
-    scope = m.get("S", "U")
-    av = AV[m.get("AV", "N")]
-    ac = AC[m.get("AC", "L")]
-    pr = (PR_C if scope == "C" else PR_U)[m.get("PR", "N")]
-    ui = UI[m.get("UI", "N")]
-    c = SCORES_CIA[m.get("C", "N")]
-    i = SCORES_CIA[m.get("I", "N")]
-    a = SCORES_CIA[m.get("A", "N")]
-
-    iss = 1 - (1 - c) * (1 - i) * (1 - a)
+def validate_vector(
+    vector: str, allowed: dict[str, set[str]] | None = None
+) -> tuple[str, dict[str, str]]:
+    """
+    Parse and strictly validate a CVSS v3 vector.
+
+    Args:
+        vector (str): Vector with or without a ``CVSS:3.x/`` prefix.
+        allowed (dict): Optional extra metrics and their legal values.
+
+    Returns:
+        tuple: ``(version, metrics)``. Vectors without a prefix are
+        treated as CVSS 3.0.
+
+    Raises:
+        CVSSVectorError: On unknown, duplicate, invalid or missing metrics.
+    """
+    if not isinstance(vector, str) or not vector.strip():
+        raise CVSSVectorError("Empty CVSS vector")
+
+    parts = vector.strip().split("/")
+    version = DEFAULT_VERSION
+    if parts[0].startswith("CVSS:"):
+        version = parts[0][len("CVSS:"):]
+        if version not in SUPPORTED_VERSIONS:
+            raise CVSSVectorError(f"Unsupported CVSS version '{version}' in {vector}")
+        parts = parts[1:]
+
+    legal = dict(BASE_METRICS)
+    if allowed:
+        legal.update(allowed)
+
+    metrics: dict[str, str] = {}
+    for part in parts:
+        if not part:
+            raise CVSSVectorError(f"Empty metric in vector {vector}")
+        key, sep, val = part.partition(":")
+        if not sep or not key or not val:
+            raise CVSSVectorError(f"Malformed metric '{part}' in {vector}")
+        if key not in legal:
+            raise CVSSVectorError(f"Unknown metric '{key}' in {vector}")
+        if key in metrics:
+            raise CVSSVectorError(f"Duplicate metric '{key}' in {vector}")
+        if val not in legal[key]:
+            raise CVSSVectorError(
+                f"Invalid value '{val}' for metric '{key}' in {vector}; "
+                f"expected one of {sorted(legal[key])}"
+            )
+        metrics[key] = val
+
+    missing = [key for key in BASE_METRICS if key not in metrics]
+    if missing:
+        raise CVSSVectorError(
+            f"Missing base metric(s) {', '.join(missing)} in {vector}"
+        )
+    return version, metrics
+
+
+def canonical_vector(vector: str) -> str:
+    """Return ``vector`` as ``CVSS:3.x/AV:../...`` in specification order."""
+    version, metrics = validate_vector(vector, OPTIONAL_METRICS)
+    order = list(BASE_METRICS) + list(OPTIONAL_METRICS)
+    body = "/".join(
+        f"{key}:{metrics[key]}" for key in order
+        if key in metrics and (key in BASE_METRICS or metrics[key] != "X")
+    )
+    return f"CVSS:{version}/{body}"
+
+
+def severity_rating(score: float) -> str:
+    """Map a numeric score to its qualitative severity."""
+    for low, high, label in SEVERITY_RANGES:
+        if low <= score <= high:
+            return label
+    return "None"
+
+
+def _base_components(metrics: tuple[str, ...]) -> tuple[float, float]:
+    """Return ``(impact, exploitability)`` for base metric values in order."""
+    av, ac, pr, ui, scope, c, i, a = metrics
+    pr_weight = (PR_C if scope == "C" else PR_U)[pr]
+
+    iss = 1 - (1 - SCORES_CIA[c]) * (1 - SCORES_CIA[i]) * (1 - SCORES_CIA[a])
     if scope == "U":
         impact = 6.42 * iss
     else:
         impact = 7.52 * (iss - 0.029) - 3.25 * pow(iss - 0.02, 15)
 
-    exploit = 8.22 * av * ac * pr * ui
+    exploit = 8.22 * AV[av] * AC[ac] * pr_weight * UI[ui]
+    return impact, exploit
+
+
+@lru_cache(maxsize=None)
+def _score_metrics(metrics: tuple[str, ...], version: str) -> tuple[float, str]:
+    """Memoised base score keyed by the canonical metric tuple."""
+    roundup = _roundup_for(version)
+    impact, exploit = _base_components(metrics)
+    scope = metrics[4]
 
     if impact <= 0:
         score = 0.0
+    elif scope == "U":
+        score = roundup(min(impact + exploit, 10))
     else:
-        if scope == "U":
-            score = _round_up(min(impact + exploit, 10))
-        else:
-            score = _round_up(min(1.08 * (impact + exploit), 10))
+        score = roundup(min(1.08 * (impact + exploit), 10))
+    return score, severity_rating(score)
 
-    for low, high, label in SEVERITY_RANGES:
-        if low <= score <= high:
-            return score, label
-    return score, "None"
 
+@lru_cache(maxsize=8192)
+def calculate_base_score(vector: str) -> tuple[float, str]:
+    """
+    Score a CVSS v3 vector.
+
+    Temporal and environmental metrics are accepted but do not affect the
+    base score.
+
+    Args:
+        vector (str): e.g. ``CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:N/A:N``.
+
+    Returns:
+        tuple: ``(score, severity)``.
+
+    Raises:
+        CVSSVectorError: If the vector fails validation.
+    """
+    version, metrics = validate_vector(vector, OPTIONAL_METRICS)
+    return _score_metrics(tuple(metrics[key] for key in BASE_METRICS), version)
+
+
+def calculate_base_scores(
+    vectors: Iterable[str], skip_invalid: bool = False
+) -> list[tuple[float, str] | None]:
+    """
+    Score many vectors in one call.
+
+    Each distinct vector is parsed and scored once; repeats are served
+    from the memo table.
+
+    Args:
+        vectors: Iterable of vector strings.
+        skip_invalid (bool): Return ``None`` for invalid vectors instead
+            of raising.
+
+    Returns:
+        list: ``(score, severity)`` per input vector, in order.
+    """
+    results: list[tuple[float, str] | None] = []
+    for vector in vectors:
+        try:
+            results.append(calculate_base_score(vector))
+        except CVSSVectorError:
+            if not skip_invalid:
+                raise
+            results.append(None)
+    return results
+
+
+def score_findings(findings: list[dict], vector_key: str = "vector") -> list[dict]:
+    """
+    Fill in ``score`` and ``severity`` for every finding in place.
+
+    Findings with an invalid vector get ``score`` ``None`` and severity
+    ``"Invalid"``.
+    """
+    scores = calculate_base_scores(
+        (f.get(vector_key, "") for f in findings), skip_invalid=True
+    )
+    for finding, result in zip(findings, scores):
+        finding["score"], finding["severity"] = result or (None, "Invalid")
+    return findings
+
+
+# ----------------------------------------------------------------------
+# Temporal & Environmental Scores
+# ----------------------------------------------------------------------
+
+def _temporal_multiplier(temporal: tuple[str, str, str]) -> float:
+    e, rl, rc = temporal
+    return E[e] * RL[rl] * RC[rc]
+
+
+@lru_cache(maxsize=None)
+def _score_temporal(
+    base: tuple[str, ...], temporal: tuple[str, str, str], version: str
+) -> tuple[float, str]:
+    base_score, _label = _score_metrics(base, version)
+    score = _roundup_for(version)(base_score * _temporal_multiplier(temporal))
+    return score, severity_rating(score)
+
+
+@lru_cache(maxsize=None)
+def _score_environmental(
+    modified: tuple[str, ...],
+    requirements: tuple[str, str, str],
+    temporal: tuple[str, str, str],
+    version: str,
+) -> tuple[float, str]:
+    """Environmental score from resolved modified metrics (no ``X`` left)."""
+    roundup = _roundup_for(version)
+    mav, mac, mpr, mui, ms, mc, mi, ma = modified
+    cr, ir, ar = (REQUIREMENT[r] for r in requirements)
+
+    miss = min(
+        1 - (1 - cr * SCORES_CIA[mc]) * (1 - ir * SCORES_CIA[mi]) * (1 - ar * SCORES_CIA[ma]),
+        0.915,
+    )
+    if ms == "U":
+        impact = 6.42 * miss
+    elif version == "3.1":
+        impact = 7.52 * (miss - 0.029) - 3.25 * pow(miss * 0.9731 - 0.02, 13)
+    else:
+        impact = 7.52 * (miss - 0.029) - 3.25 * pow(miss - 0.02, 15)
+
+    pr_weight = (PR_C if ms == "C" else PR_U)[mpr]
+    exploit = 8.22 * AV[mav] * AC[mac] * pr_weight * UI[mui]
+
+    if impact <= 0:
+        score = 0.0
+    else:
+        combined = impact + exploit if ms == "U" else 1.08 * (impact + exploit)
+        score = roundup(roundup(min(combined, 10)) * _temporal_multiplier(temporal))
+    return score, severity_rating(score)
+
+
+def _split_metrics(
+    metrics: dict[str, str],
+) -> tuple[tuple[str, ...], tuple[str, str, str], tuple[str, ...], tuple[str, str, str]]:
+    """Return ``(base, temporal, modified, requirements)`` value tuples."""
+    base = tuple(metrics[key] for key in BASE_METRICS)
+    temporal = tuple(metrics.get(key, "X") for key in TEMPORAL_METRICS)
+    modified = tuple(
+        metrics[base_key] if metrics.get(mod, "X") == "X" else metrics[mod]
+        for mod, base_key in MODIFIED_METRICS.items()
+    )
+    requirements = tuple(metrics.get(key, "X") for key in ("CR", "IR", "AR"))
+    return base, temporal, modified, requirements
+
+
+def validate_profile(profile: dict[str, str] | None) -> dict[str, str]:
+    """
+    Validate an environment profile of temporal/environmental overrides.
+
+    Raises:
+        CVSSVectorError: If a metric or value is not recognised.
+    """
+    checked: dict[str, str] = {}
+    for key, val in (profile or {}).items():
+        if key not in OPTIONAL_METRICS:
+            raise CVSSVectorError(f"Unknown profile metric '{key}'")
+        if val not in OPTIONAL_METRICS[key]:
+            raise CVSSVectorError(
+                f"Invalid value '{val}' for profile metric '{key}'; "
+                f"expected one of {sorted(OPTIONAL_METRICS[key])}"
+            )
+        checked[key] = val
+    return checked
+
+
+def calculate_temporal_score(vector: str) -> tuple[float, str]:
+    """Score the base and temporal metrics of ``vector``."""
+    version, metrics = validate_vector(vector, OPTIONAL_METRICS)
+    base, temporal, _modified, _req = _split_metrics(metrics)
+    return _score_temporal(base, temporal, version)
+
+
+def calculate_environmental_score(
+    vector: str, profile: dict[str, str] | None = None
+) -> tuple[float, str]:
+    """
+    Score ``vector`` for a deployment environment.
+
+    Args:
+        vector (str): CVSS v3 vector, optionally with temporal and
+            environmental metrics.
+        profile (dict): Metrics such as ``{"CR": "H", "MAV": "L"}`` that
+            override those in the vector.
+
+    Returns:
+        tuple: ``(score, severity)``.
+    """
+    version, metrics = validate_vector(vector, OPTIONAL_METRICS)
+    metrics.update(validate_profile(profile))
+    _base, temporal, modified, requirements = _split_metrics(metrics)
+    return _score_environmental(modified, requirements, temporal, version)
+
+
+def score_findings_by_environment(
+    findings: list[dict],
+    profiles: dict[str, dict[str, str]],
+    vector_key: str = "vector",
+) -> dict[str, list[tuple[float, str] | None]]:
+    """
+    Score every finding under every environment profile in one call.
+
+    Distinct vectors are validated once and profiles once; each unique
+    (vector, profile) combination is then a memoised lookup.
+
+    Args:
+        findings: Rows carrying a CVSS vector under ``vector_key``.
+        profiles: Mapping of profile name to temporal/environmental
+            metric overrides.
+
+    Returns:
+        dict: Profile name -> list of ``(score, severity)`` aligned with
+        ``findings``; ``None`` marks a finding with an invalid vector.
+    """
+    checked_profiles = {name: validate_profile(p) for name, p in profiles.items()}
+
+    parsed: dict[str, tuple[str, dict[str, str]] | None] = {}
+    for finding in findings:
+        vector = finding.get(vector_key, "")
+        if vector not in parsed:
+            try:
+                parsed[vector] = validate_vector(vector, OPTIONAL_METRICS)
+            except CVSSVectorError:
+                parsed[vector] = None
+
+    results: dict[str, list[tuple[float, str] | None]] = {}
+    for name, profile in checked_profiles.items():
+        per_vector: dict[str, tuple[float, str] | None] = {}
+        for vector, entry in parsed.items():
+            if entry is None:
+                per_vector[vector] = None
+                continue
+            version, metrics = entry
+            _base, temporal, modified, requirements = _split_metrics(
+                {**metrics, **profile}
+            )
+            per_vector[vector] = _score_environmental(
+                modified, requirements, temporal, version
+            )
+        results[name] = [per_vector[f.get(vector_key, "")] for f in findings]
+    return results